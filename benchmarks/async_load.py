@@ -0,0 +1,80 @@
+"""
+Throughput of Chatbot.aask_question as the number of concurrent questions grows.
+
+Usage:
+    python benchmarks/async_load.py [--models 1000] [--questions 256] [--embedding-ms 50] [--completion-ms 200]
+
+Bedrock is replaced by a LocalBedrockClient, which sleeps for a lognormally distributed
+time before returning an embedding or a completion. All questions are awaited at once on a
+single event loop, and the Chatbot's max_concurrency bounds how many Bedrock requests are in flight.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from dbt_llm_tools import Chatbot
+from dbt_llm_tools.bedrock_stub import LocalBedrockClient
+from synthetic_project import build_models, build_questions
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), "..", "tests", "test_data", "valid_dbt_project")
+
+
+async def ask_all(chatbot: Chatbot, questions: list[str]) -> None:
+    await asyncio.gather(*(chatbot.aask_question(question) for question in questions))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=256)
+    parser.add_argument("--embedding-ms", type=float, default=50)
+    parser.add_argument("--completion-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    models = build_models(args.models)
+    questions = [question for question, _ in build_questions(models, args.questions)]
+
+    vector_db_path = tempfile.mkdtemp()
+    try:
+        chatbot = Chatbot(
+            PROJECT_ROOT,
+            vector_db_path=vector_db_path,
+            database_path=f"{vector_db_path}/db.json",
+            bedrock_client=LocalBedrockClient(),
+        )
+        chatbot.store.upsert_models(models)
+
+        for max_concurrency in (4, 16, 64, 256):
+            client = LocalBedrockClient(
+                embedding_latency_ms=args.embedding_ms,
+                completion_latency_ms=args.completion_ms,
+                latency_distribution="lognormal",
+                latency_spread=0.3,
+            )
+            chatbot = Chatbot(
+                PROJECT_ROOT,
+                vector_db_path=vector_db_path,
+                database_path=f"{vector_db_path}/db.json",
+                max_concurrency=max_concurrency,
+                bedrock_client=client,
+            )
+            # Distinct questions per run, so that nothing is served from the result cache.
+            batch = [f"{question} ({max_concurrency})" for question in questions]
+
+            start = time.perf_counter()
+            asyncio.run(ask_all(chatbot, batch))
+            seconds = time.perf_counter() - start
+
+            print(
+                f"max_concurrency={max_concurrency:>4}  {len(batch) / seconds:8.1f} questions/s  "
+                f"({seconds:.2f}s, peak in-flight requests={client.stats()['peak_concurrency']})"
+            )
+    finally:
+        shutil.rmtree(vector_db_path)
+
+
+if __name__ == "__main__":
+    main()
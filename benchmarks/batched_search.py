@@ -0,0 +1,69 @@
+"""
+Throughput of query_collection called in a loop against query_collection_many.
+
+Usage:
+    python benchmarks/batched_search.py [--models 1000] [--questions 1000] [--latency-ms 50]
+
+Bedrock is replaced by a stub client that sleeps for --latency-ms before returning an
+embedding, so the numbers reflect the embedding round trips without any AWS access.
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from dbt_llm_tools import VectorStore
+from synthetic_project import build_models, build_questions
+
+
+class SleepingBedrockClient:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def invoke_model(self, body: str, **kwargs):  # pylint: disable=unused-argument
+        time.sleep(self.latency)
+        rng = random.Random(json.loads(body)["inputText"])
+        embedding = [rng.uniform(-1, 1) for _ in range(1536)]
+        return {"body": io.BytesIO(json.dumps({"embedding": embedding}).encode())}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    models = build_models(args.models)
+    questions = [question for question, _ in build_questions(models, args.questions)]
+
+    vector_db_path = tempfile.mkdtemp()
+    try:
+        with mock.patch("boto3.client", return_value=SleepingBedrockClient(args.latency_ms / 1000)):
+            store = VectorStore(
+                vector_db_path=vector_db_path, cache_size=0, max_embedding_workers=args.workers
+            )
+            store.upsert_models(models)
+
+            start = time.perf_counter()
+            for question in questions:
+                store.query_collection(question)
+            loop_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.query_collection_many(questions)
+            batch_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(vector_db_path)
+
+    print(f"loop:  {len(questions) / loop_seconds:8.1f} questions/s ({loop_seconds:.2f}s)")
+    print(f"batch: {len(questions) / batch_seconds:8.1f} questions/s ({batch_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
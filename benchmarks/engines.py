@@ -0,0 +1,78 @@
+"""
+Cold start and query latency of the Chroma and NumPy VectorStore engines.
+
+Usage:
+    python benchmarks/engines.py [--models 10000] [--questions 200]
+
+Both stores embed with the offline HashingEmbeddingBackend (test mode). Cold start is
+measured in a fresh interpreter: importing the package, opening the store and running
+a first query.
+"""
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from dbt_llm_tools import VectorStore
+from synthetic_project import build_models, build_questions
+
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+from dbt_llm_tools import VectorStore
+store = VectorStore(vector_db_path={path!r}, test_mode=True, engine={engine!r})
+store.query_collection("which table has the customers_1_amount column?")
+print(time.perf_counter() - start)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=200)
+    args = parser.parse_args()
+
+    models = build_models(args.models)
+    questions = [question for question, _ in build_questions(models, args.questions)]
+
+    for engine in ("chroma", "numpy"):
+        vector_db_path = tempfile.mkdtemp()
+        try:
+            store = VectorStore(vector_db_path=vector_db_path, test_mode=True, engine=engine, cache_size=0)
+
+            start = time.perf_counter()
+            store.upsert_models(models)
+            load_seconds = time.perf_counter() - start
+
+            latencies = []
+            for question in questions:
+                start = time.perf_counter()
+                store.query_collection(question, n_results=5)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            store.query_collection_many(questions, n_results=5)
+            batch_ms = (time.perf_counter() - start) * 1000 / len(questions)
+
+            cold_start = subprocess.run(
+                [sys.executable, "-c", COLD_START_SCRIPT.format(path=vector_db_path, engine=engine)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip().splitlines()[-1]
+
+            latencies.sort()
+            print(
+                f"{engine:>6}  load={load_seconds:.1f}s  cold_start={float(cold_start) * 1000:.0f}ms  "
+                f"query p50={statistics.median(latencies):.2f}ms p95={latencies[int(len(latencies) * 0.95)]:.2f}ms  "
+                f"batched={batch_ms:.2f}ms/query"
+            )
+        finally:
+            shutil.rmtree(vector_db_path)
+
+
+if __name__ == "__main__":
+    main()
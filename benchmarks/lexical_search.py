@@ -0,0 +1,60 @@
+"""
+Recall and latency of the vector, lexical and hybrid search modes of VectorStore.
+
+Usage:
+    python benchmarks/lexical_search.py [--models 1000] [--questions 200] [--bedrock]
+
+Without --bedrock the store runs in test mode and embeds with the offline
+HashingEmbeddingBackend.
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from dbt_llm_tools import VectorStore
+from synthetic_project import build_models, build_questions
+
+
+def run(store: VectorStore, questions: list[tuple[str, str]], mode: str, k: int) -> None:
+    latencies = []
+    hits = 0
+
+    for question, expected in questions:
+        start = time.perf_counter()
+        results = store.query_collection(question, n_results=k, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += expected in [result["id"] for result in results]
+
+    latencies.sort()
+    print(
+        f"{mode:>8}  recall@{k}={hits / len(questions):.3f}  "
+        f"p50={statistics.median(latencies):.2f}ms  p95={latencies[int(len(latencies) * 0.95)]:.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--bedrock", action="store_true")
+    args = parser.parse_args()
+
+    models = build_models(args.models)
+    questions = build_questions(models, args.questions)
+
+    vector_db_path = tempfile.mkdtemp()
+    try:
+        store = VectorStore(vector_db_path=vector_db_path, test_mode=not args.bedrock)
+        store.upsert_models(models)
+
+        for mode in ("vector", "lexical", "hybrid"):
+            run(store, questions, mode, args.k)
+    finally:
+        shutil.rmtree(vector_db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Index size, scan latency and recall@k of the compressed NumPy index.
+
+Usage:
+    python benchmarks/quantization.py [--models 10000] [--questions 200] [--k 5]
+
+Documents and questions are embedded once with the offline HashingEmbeddingBackend, then
+loaded into a NumpyCollection per configuration. "overlap@k" is the share of the exact
+float32 top k that the compressed index also returns, "recall@k" is the share of questions
+whose source model is returned.
+
+int8 quantization is only offered on top of PCA: NumPy has no int8 matrix product, and casting
+the full dimension codes back to float32 made int8 alone about 3.5x slower to scan than float32
+(p50 24ms against 7ms on 10k models).
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from dbt_llm_tools import HashingEmbeddingBackend
+from dbt_llm_tools.numpy_index import NumpyCollection
+from synthetic_project import build_models, build_questions
+
+CONFIGURATIONS = {
+    "float32": {},
+    "pca256": {"numpy:pca_dimensions": 256},
+    "pca256+int8": {"numpy:pca_dimensions": 256, "numpy:quantization": "int8"},
+    "pca128+int8": {"numpy:pca_dimensions": 128, "numpy:quantization": "int8"},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    models = build_models(args.models)
+    questions = build_questions(models, args.questions)
+
+    backend = HashingEmbeddingBackend()
+    ids = [model.name for model in models]
+    embeddings = backend.embed_many([model.as_prompt_text() for model in models])
+    query_embeddings = backend.embed_many([question for question, _ in questions])
+
+    exact_ids = None
+    for name, metadata in CONFIGURATIONS.items():
+        path = tempfile.mkdtemp()
+        try:
+            collection = NumpyCollection(path, name, metadata)
+
+            start = time.perf_counter()
+            collection.upsert(ids=ids, embeddings=embeddings)
+            load_seconds = time.perf_counter() - start
+
+            latencies, results = [], []
+            for query_embedding in query_embeddings:
+                start = time.perf_counter()
+                results.append(collection.query(query_embeddings=[query_embedding], n_results=args.k)["ids"][0])
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            if exact_ids is None:
+                exact_ids = results
+
+            scanned_file = "codes.npy" if collection.is_compressed() else "embeddings.npy"
+            size_mb = os.path.getsize(os.path.join(path, scanned_file)) / 1024 ** 2
+
+            overlap = statistics.mean(
+                len(set(result) & set(exact)) / len(exact) for result, exact in zip(results, exact_ids)
+            )
+            recall = statistics.mean(
+                model_name in result for result, (_, model_name) in zip(results, questions)
+            )
+
+            latencies.sort()
+            print(
+                f"{name:>12}  load={load_seconds:.1f}s  scanned index={size_mb:.1f}MB  "
+                f"overlap@{args.k}={overlap:.3f}  recall@{args.k}={recall:.3f}  "
+                f"query p50={statistics.median(latencies):.2f}ms p95={latencies[int(len(latencies) * 0.95)]:.2f}ms"
+            )
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Synthetic dbt project used by the benchmarks in this folder.
+
+Every model gets a unique name and a few uniquely named columns, and every question
+mentions either a model name or one of its columns, so the relevant model is known.
+"""
+import random
+
+from dbt_llm_tools import DbtModel
+
+LAYERS = ["stg", "int", "dim", "fct"]
+ENTITIES = [
+    "customers",
+    "orders",
+    "products",
+    "payments",
+    "sessions",
+    "invoices",
+    "shipments",
+    "refunds",
+    "subscriptions",
+    "campaigns",
+]
+MEASURES = ["amount", "count", "status", "created_at", "updated_at", "category"]
+
+
+def build_models(n_models: int = 1000, seed: int = 42) -> list[DbtModel]:
+    rng = random.Random(seed)
+    models = []
+
+    for i in range(n_models):
+        layer = LAYERS[i % len(LAYERS)]
+        entity = ENTITIES[(i // len(LAYERS)) % len(ENTITIES)]
+        name = f"{layer}_{entity}_{i}"
+
+        columns = [{"name": f"{entity}_id", "description": f"Unique identifier of the {entity[:-1]}."}]
+        for measure in rng.sample(MEASURES, 3):
+            columns.append(
+                {
+                    "name": f"{entity}_{i}_{measure}",
+                    "description": f"The {measure.replace('_', ' ')} of the {entity[:-1]}.",
+                }
+            )
+
+        models.append(
+            DbtModel(
+                {
+                    "name": name,
+                    "description": f"One row per {entity[:-1]} in the {layer} layer, variant {i}.",
+                    "columns": columns,
+                    "config": {"tags": [layer, entity]},
+                }
+            )
+        )
+
+    return models
+
+
+def build_questions(
+    models: list[DbtModel], n_questions: int = 200, seed: int = 7
+) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    questions = []
+
+    for model in rng.sample(models, min(n_questions, len(models))):
+        if rng.random() < 0.5:
+            questions.append((f"What does the table {model.name} contain?", model.name))
+        else:
+            column = model.columns[-1]["name"]
+            questions.append((f"Which table has the {column} column?", model.name))
+
+    return questions
@@ -3,8 +3,10 @@ import boto3
 from tinydb import TinyDB, Query
 
 from menu import menu
-from settings import load_session_state_from_db
-from dbt_llm_tools import VectorStore, DbtProject, DbtModel
+from settings import get_vector_store, load_session_state_from_db
+from dbt_llm_tools import DbtProject, DbtModel
+
+PAGE_SIZE = 100
 
 st.set_page_config(page_title="Configuration", page_icon="🤖", layout="wide")
 
@@ -14,8 +16,8 @@ load_session_state_from_db()
 st.title("Vector Store")
 st.caption(f"Your vector store is located at {st.session_state.get('vector_store_path')}")
 
-vector_store = VectorStore(
-    vector_db_path=st.session_state.get("vector_store_path", ".local_storage/chroma.db"),
+vector_store = get_vector_store(
+    st.session_state.get("vector_store_path", ".local_storage/chroma.db")
 )
 
 setting_tab, view_tab = st.tabs(["Settings", "View Vector Store"])
@@ -70,7 +72,7 @@ with setting_tab:
         st.write("Folders to exclude:")
         st.write(convert_text_input_to_list(folders_to_exclude))
 
-        col1, col2, col3 = st.columns([1, 1, 1])
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
 
         with col1:
             if st.button(
@@ -94,7 +96,7 @@ with setting_tab:
                 )
 
                 models_to_store = [
-                    DbtModel(model["documentation"])
+                    DbtModel.from_directory_entry(model)
                     for model in models
                     if "documentation" in model
                 ]
@@ -104,6 +106,29 @@ with setting_tab:
                 st.toast("Models loaded into the vector store!", icon="✅")
 
         with col3:
+            if st.button(
+                    "Rebuild Vector Store",
+                    help="Rebuild the vector store in the background. The chatbot keeps answering from the "
+                    "current models until the rebuild is complete.",
+            ):
+                models = dbt_project.get_models(
+                    models=convert_text_input_to_list(models_to_include),
+                    included_folders=convert_text_input_to_list(folders_to_include),
+                    excluded_folders=convert_text_input_to_list(folders_to_exclude),
+                )
+
+                vector_store.reindex(
+                    [
+                        DbtModel.from_directory_entry(model)
+                        for model in models
+                        if "documentation" in model
+                    ],
+                    background=True,
+                )
+
+                st.toast("Rebuilding the vector store in the background!", icon="🔄")
+
+        with col4:
             if st.button(
                     "Clear Vector Store",
                     help="Delete all models from the vector store.",
@@ -152,18 +177,20 @@ with setting_tab:
 with view_tab:
     st.subheader("Explore Vector Store")
 
-    stored_models = vector_store.get_models()
+    model_count = vector_store.count_models()
+    page_count = max((model_count + PAGE_SIZE - 1) // PAGE_SIZE, 1)
 
-    if stored_models:
-        st.dataframe([model["id"] for model in stored_models], use_container_width=True)
+    st.write(f"The vector store contains {model_count} models.")
 
-    if searched_model_name := st.selectbox(
-            "Select Model", [model["id"] for model in stored_models]
-    ):
-        searched_model = next(
-            (x for x in stored_models if x["id"] == searched_model_name), None
-        )
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    model_ids = vector_store.list_model_ids(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+
+    if model_ids:
+        st.dataframe(model_ids, use_container_width=True)
+
+    if searched_model_name := st.selectbox("Select Model", model_ids):
+        searched_models = vector_store.get_models(model_ids=[searched_model_name])
 
-        if searched_model is not None:
-            st.markdown(searched_model["document"])
+        if searched_models:
+            st.markdown(searched_models[0]["document"])
             st.divider()
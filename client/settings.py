@@ -1,6 +1,16 @@
 import streamlit as st
 from tinydb import TinyDB, Query
 
+from dbt_llm_tools import VectorStore
+
+
+@st.cache_resource
+def get_vector_store(vector_db_path):
+    # Shared across reruns and pages so that the query caches survive and are
+    # invalidated when models are loaded from the vector store page.
+    return VectorStore(vector_db_path=vector_db_path)
+
+
 def load_session_state_from_db():
     if "local_db_path" not in st.session_state:
         st.session_state["local_db_path"] = ".local_storage/db.json"
@@ -1,15 +1,48 @@
+from dbt_llm_tools.bedrock import (
+    BedrockClientFactory,
+    configure_bedrock_client,
+    get_bedrock_client,
+    set_bedrock_client,
+)
+from dbt_llm_tools.bedrock_stub import LocalBedrockClient
 from dbt_llm_tools.chatbot import Chatbot
+from dbt_llm_tools.concurrency import ConcurrencyLimiter
+from dbt_llm_tools.conversation_memory import ConversationMemory
 from dbt_llm_tools.dbt_model import DbtModel
 from dbt_llm_tools.dbt_project import DbtProject
 from dbt_llm_tools.documentation_generator import DocumentationGenerator
+from dbt_llm_tools.embeddings import (
+    BedrockEmbeddingBackend,
+    EmbeddingBackend,
+    HashingEmbeddingBackend,
+    SentenceTransformerEmbeddingBackend,
+)
 from dbt_llm_tools.instructions import (
     ANSWER_QUESTION_INSTRUCTIONS,
     INTERPRET_MODEL_INSTRUCTIONS,
 )
+from dbt_llm_tools.rate_limit import (
+    BedrockCallLedger,
+    BedrockRateLimiter,
+    RateLimitedBedrockClient,
+    TokenBucket,
+)
 from dbt_llm_tools.types import (
+    AnswerTrace,
+    BatchSummary,
+    BedrockCallRecord,
+    BedrockUsageSummary,
+    CacheStats,
     DbtModelDict,
     DbtModelDirectoryEntry,
+    DocumentationProgress,
+    DocumentationRunReport,
     ParsedSearchResult,
     PromptMessage,
+    PromptPackingReport,
+    RateLimit,
+    RetrievalExample,
+    RetrievalReport,
+    StoredModel,
 )
 from dbt_llm_tools.vector_store import VectorStore
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Iterator
+
+from dbt_llm_tools.chatbot import Chatbot
+from dbt_llm_tools.types import BatchSummary
+from dbt_llm_tools.vector_store import SEARCH_MODES
+
+
+def read_questions(input_path: str) -> Iterator[dict]:
+    """
+    Read questions from a JSONL file one line at a time.
+
+    Each line holds a JSON object with a "question" and, optionally, an "id", a "search_mode" and a
+    "where" filter, or just the question as a JSON string. Lines that are not valid JSON are yielded
+    without a question, so that they are reported as failed instead of stopping the batch.
+
+    Args:
+        input_path (str): The path of the JSONL file.
+
+    Yields:
+        dict: The next question record, with its line number as id when it has none.
+    """
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = {}
+
+            if isinstance(record, str):
+                record = {"question": record}
+            elif not isinstance(record, dict):
+                record = {}
+
+            record.setdefault("id", line_number)
+            yield record
+
+
+async def answer_record(chatbot: Chatbot, record: dict, search_mode: str = "vector") -> dict:
+    """
+    Answer one question record, capturing any error instead of raising it.
+
+    Args:
+        chatbot (Chatbot): The chatbot answering the question.
+        record (dict): The question record, see read_questions.
+        search_mode (str, optional): The search mode used when the record does not set one.
+
+    Returns:
+        dict: The id and question of the record, with either an "error" or the fields of an AnswerTrace.
+    """
+    result = {"id": record.get("id"), "question": record.get("question")}
+
+    try:
+        if not isinstance(result["question"], str) or result["question"].strip() == "":
+            raise Exception('Please provide a question as a JSON object with a "question" key.')
+
+        result.update(
+            await chatbot.aask_question_traced(
+                result["question"],
+                search_mode=record.get("search_mode", search_mode),
+                where=record.get("where"),
+            )
+        )
+    except Exception as e:  # pylint: disable=broad-except
+        result["error"] = str(e)
+
+    return result
+
+
+async def arun_batch(
+        chatbot: Chatbot,
+        input_path: str,
+        output_path: str,
+        concurrency: int = 16,
+        search_mode: str = "vector",
+) -> BatchSummary:
+    """
+    Answer every question of a JSONL file, writing one JSON line per answer as soon as it is ready.
+
+    Questions are read lazily and at most concurrency of them are in flight at once, so memory use
+    does not grow with the size of the file. Answers are written in the order they complete, each
+    with the id of its question.
+
+    Args:
+        chatbot (Chatbot): The chatbot answering the questions.
+        input_path (str): The JSONL file to read the questions from, see read_questions.
+        output_path (str): The JSONL file to write the answers to, see answer_record.
+        concurrency (int, optional): The maximum number of questions answered at the same time.
+        search_mode (str, optional): The search mode used when a question does not set one.
+
+    Returns:
+        BatchSummary: The number of questions, how many failed and the overall throughput.
+    """
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise Exception("Please provide a positive concurrency.")
+
+    start = time.perf_counter()
+    questions = 0
+    failed = 0
+    pending = set()
+
+    with open(output_path, "w", encoding="utf-8") as output:
+
+        def write(done: set) -> None:
+            nonlocal failed
+
+            for task in done:
+                result = task.result()
+                failed += "error" in result
+                output.write(json.dumps(result) + "\n")
+
+            output.flush()
+
+        for record in read_questions(input_path):
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                write(done)
+
+            pending.add(asyncio.create_task(answer_record(chatbot, record, search_mode)))
+            questions += 1
+
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            write(done)
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "questions": questions,
+        "failed": failed,
+        "seconds": seconds,
+        "questions_per_second": questions / seconds if seconds > 0 else 0.0,
+    }
+
+
+def run_batch(
+        chatbot: Chatbot,
+        input_path: str,
+        output_path: str,
+        concurrency: int = 16,
+        search_mode: str = "vector",
+) -> BatchSummary:
+    """
+    Answer every question of a JSONL file from synchronous code, see arun_batch.
+
+    Args:
+        chatbot (Chatbot): The chatbot answering the questions.
+        input_path (str): The JSONL file to read the questions from.
+        output_path (str): The JSONL file to write the answers to.
+        concurrency (int, optional): The maximum number of questions answered at the same time.
+        search_mode (str, optional): The search mode used when a question does not set one.
+
+    Returns:
+        BatchSummary: The number of questions, how many failed and the overall throughput.
+    """
+    return asyncio.run(arun_batch(chatbot, input_path, output_path, concurrency, search_mode))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Answer the questions of a JSONL file with the dbt-llm-tools chatbot.")
+    parser.add_argument("--project-root", required=True, help="The root folder of the dbt project.")
+    parser.add_argument("--input", required=True, help="The JSONL file to read the questions from.")
+    parser.add_argument("--output", required=True, help="The JSONL file to write the answers to.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--search-mode", default="vector", choices=SEARCH_MODES)
+    parser.add_argument("--database-path", default=".local_storage/db.json")
+    parser.add_argument("--vector-db-path", default=".local_storage/chroma.db")
+    parser.add_argument("--bedrock-model-id", default="anthropic.claude-v2")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Generate every answer, even repeated ones.")
+    args = parser.parse_args()
+
+    chatbot = Chatbot(
+        args.project_root,
+        bedrock_model_id=args.bedrock_model_id,
+        database_path=args.database_path,
+        vector_db_path=args.vector_db_path,
+        max_concurrency=args.concurrency,
+        answer_cache_size=0 if args.no_answer_cache else 256,
+    )
+
+    print(json.dumps(run_batch(chatbot, args.input, args.output, args.concurrency, args.search_mode)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+from dbt_llm_tools.rate_limit import BedrockCallLedger, BedrockRateLimiter, RateLimitedBedrockClient
+from dbt_llm_tools.types import RateLimit
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_ATTEMPTS = 8
+RETRY_MODES = ("adaptive", "standard", "legacy")
+CLIENT_SETTINGS = (
+    "max_pool_connections", "connect_timeout", "read_timeout", "max_attempts", "retry_mode", "region_name"
+)
+RATE_LIMIT_SETTINGS = ("rate_limits", "default_rate_limit", "ledger_path")
+
+
+class BedrockClientFactory:  # pylint: disable=too-many-instance-attributes
+    """
+    Creates one pooled "bedrock-runtime" client and shares it between every part of the library.
+
+    boto3 clients are thread safe, so a single client with a large enough connection pool serves
+    the chatbot, the vector store and the documentation generator at once, and keeps its TCP and
+    TLS connections warm between requests.
+
+    When rate limits or a ledger path are set, the shared client is wrapped in a RateLimitedBedrockClient,
+    so every call of the process waits for the quota of its model id and is recorded in the ledger.
+
+    Attributes:
+        max_pool_connections (int): The maximum number of connections kept open to Bedrock.
+        connect_timeout (float): Number of seconds to wait for a connection to open.
+        read_timeout (float): Number of seconds to wait for a response, completions can be slow.
+        max_attempts (int): The maximum number of attempts made for each request, retries included.
+        retry_mode (str): The botocore retry mode, "adaptive" also rate limits the client when throttled.
+        region_name (str, optional): The AWS region, defaults to the one configured for boto3.
+        rate_limits (dict[str, RateLimit], optional): The requests and tokens per minute of each model id.
+        default_rate_limit (RateLimit, optional): The quota of the model ids without their own.
+        ledger_path (str, optional): The SQLite database every call is recorded in.
+    """
+
+    def __init__(
+            self,
+            max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+            retry_mode: str = "adaptive",
+            region_name: str = None,
+            rate_limits: dict[str, RateLimit] = None,
+            default_rate_limit: RateLimit = None,
+            ledger_path: str = None,
+    ) -> None:
+        """
+        Initializes a Bedrock client factory.
+
+        Args:
+            max_pool_connections (int, optional): The maximum number of connections kept open to Bedrock.
+            connect_timeout (float, optional): Number of seconds to wait for a connection to open.
+            read_timeout (float, optional): Number of seconds to wait for a response.
+            max_attempts (int, optional): The maximum number of attempts made for each request.
+            retry_mode (str, optional): One of "adaptive", "standard" or "legacy".
+            region_name (str, optional): The AWS region, defaults to the one configured for boto3.
+            rate_limits (dict[str, RateLimit], optional): The requests and tokens per minute of each model id.
+            default_rate_limit (RateLimit, optional): The quota of the model ids without their own.
+            ledger_path (str, optional): The SQLite database every call is recorded in.
+        """
+        self.__validate(
+            {"max_pool_connections": max_pool_connections, "max_attempts": max_attempts, "retry_mode": retry_mode}
+        )
+
+        self.max_pool_connections = max_pool_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.retry_mode = retry_mode
+        self.region_name = region_name
+        self.rate_limits = rate_limits
+        self.default_rate_limit = default_rate_limit
+        self.ledger_path = ledger_path
+
+        self.__lock = threading.Lock()
+        self.__client = None
+        self.__limited_client = None
+        self.__injected = False
+        self.__limiter: BedrockRateLimiter = self.__build_limiter(rate_limits, default_rate_limit)
+        self.__ledger: BedrockCallLedger = BedrockCallLedger(ledger_path) if ledger_path is not None else None
+
+    @staticmethod
+    def __validate(settings: dict) -> None:
+        for name, value in settings.items():
+            if name not in CLIENT_SETTINGS + RATE_LIMIT_SETTINGS:
+                raise Exception(f"Please provide a valid Bedrock client setting, {name} is not one.")
+
+            if name == "retry_mode" and value not in RETRY_MODES:
+                raise Exception(f"Please provide a valid retry mode, one of: {', '.join(RETRY_MODES)}.")
+
+            if name in ("max_pool_connections", "max_attempts") and (not isinstance(value, int) or value < 1):
+                raise Exception(f"Please provide a positive {name.replace('_', ' ')}.")
+
+    @staticmethod
+    def __build_limiter(rate_limits: dict[str, RateLimit], default_rate_limit: RateLimit) -> BedrockRateLimiter:
+        return BedrockRateLimiter(rate_limits, default_rate_limit) if rate_limits or default_rate_limit else None
+
+    def configure(self, **settings) -> None:
+        """
+        Change the settings of the client. The shared client is created again the next time it is used,
+        unless a client was injected with set_client. Changing the rate limits starts with full quotas.
+
+        Objects that already got the client, such as a Chatbot, VectorStore or DocumentationGenerator,
+        keep using the client they got. Configure the factory before creating them.
+
+        Args:
+            **settings: Any of the attributes accepted by the constructor.
+        """
+        self.__validate(settings)
+
+        # Built before anything changes, so that invalid limits leave the factory as it was.
+        limiter = self.__build_limiter(
+            settings.get("rate_limits", self.rate_limits), settings.get("default_rate_limit", self.default_rate_limit)
+        )
+
+        with self.__lock:
+            self.max_pool_connections = settings.get("max_pool_connections", self.max_pool_connections)
+            self.connect_timeout = settings.get("connect_timeout", self.connect_timeout)
+            self.read_timeout = settings.get("read_timeout", self.read_timeout)
+            self.max_attempts = settings.get("max_attempts", self.max_attempts)
+            self.retry_mode = settings.get("retry_mode", self.retry_mode)
+            self.region_name = settings.get("region_name", self.region_name)
+            self.rate_limits = settings.get("rate_limits", self.rate_limits)
+            self.default_rate_limit = settings.get("default_rate_limit", self.default_rate_limit)
+            self.ledger_path = settings.get("ledger_path", self.ledger_path)
+
+            if any(name in RATE_LIMIT_SETTINGS for name in settings):
+                self.__limiter = limiter
+
+                if self.__ledger is not None and self.__ledger.ledger_path != self.ledger_path:
+                    self.__ledger.close()
+                    self.__ledger = None
+
+                if self.__ledger is None and self.ledger_path is not None:
+                    self.__ledger = BedrockCallLedger(self.ledger_path)
+
+            self.__limited_client = None
+
+            if not self.__injected and any(name in CLIENT_SETTINGS for name in settings):
+                self.__client = None
+
+    def get_config(self) -> Config:
+        """
+        Build the botocore configuration of the client.
+
+        Returns:
+            Config: The connection pool, timeout and retry settings.
+        """
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            retries={"mode": self.retry_mode, "max_attempts": self.max_attempts},
+        )
+
+    def create_client(self):
+        """
+        Create a new, unshared "bedrock-runtime" client with the factory's settings.
+
+        Returns:
+            The new client.
+        """
+        return boto3.client(
+            service_name="bedrock-runtime", region_name=self.region_name, config=self.get_config()
+        )
+
+    def get_client(self, min_pool_connections: int = None):
+        """
+        Get the shared client, creating it the first time it is needed.
+
+        Args:
+            min_pool_connections (int, optional): The number of requests the caller makes at the same time.
+                The pool is grown to fit them, so concurrent requests do not wait for a free connection.
+
+        Returns:
+            The shared client, or the client injected with set_client, wrapped in a RateLimitedBedrockClient
+                when rate limits or a ledger are configured.
+        """
+        with self.__lock:
+            if not self.__injected and min_pool_connections is not None:
+                if min_pool_connections > self.max_pool_connections:
+                    self.max_pool_connections = min_pool_connections
+                    self.__client = None
+                    self.__limited_client = None
+
+            if self.__client is None:
+                self.__client = self.create_client()
+
+            if self.__limiter is None and self.__ledger is None:
+                return self.__client
+
+            if self.__limited_client is None:
+                self.__limited_client = RateLimitedBedrockClient(self.__client, self.__limiter, self.__ledger)
+
+            return self.__limited_client
+
+    def get_ledger(self) -> BedrockCallLedger:
+        """
+        Get the ledger the calls of the shared client are recorded in.
+
+        Returns:
+            BedrockCallLedger: The ledger, or None when no ledger path is configured.
+        """
+        return self.__ledger
+
+    def set_client(self, client) -> None:
+        """
+        Replace the shared client, for instance with a stub in tests. Objects that already got the
+        client keep using it.
+
+        Args:
+            client: Any object with the methods of a "bedrock-runtime" client,
+                or None to go back to creating a real client.
+        """
+        with self.__lock:
+            self.__client = client
+            self.__limited_client = None
+            self.__injected = client is not None
+
+
+_default_factory = BedrockClientFactory()
+
+
+def get_bedrock_client_factory() -> BedrockClientFactory:
+    """
+    Get the factory that holds the shared Bedrock client.
+
+    Returns:
+        BedrockClientFactory: The factory used by the whole library.
+    """
+    return _default_factory
+
+
+def get_bedrock_client(min_pool_connections: int = None):
+    """
+    Get the shared "bedrock-runtime" client.
+
+    Args:
+        min_pool_connections (int, optional): The number of requests the caller makes at the same time.
+
+    Returns:
+        The shared client.
+    """
+    return _default_factory.get_client(min_pool_connections)
+
+
+def set_bedrock_client(client) -> None:
+    """
+    Replace the shared "bedrock-runtime" client, for instance with a stub.
+
+    Chatbot, VectorStore and DocumentationGenerator get the client when they are created, so only
+    the objects created afterwards use the new client.
+
+    Args:
+        client: The client to use, or None to go back to creating a real client.
+    """
+    _default_factory.set_client(client)
+
+
+def configure_bedrock_client(**settings) -> None:
+    """
+    Change the connection pool, timeout, retry, region, rate limit or ledger settings of the shared client.
+
+    Args:
+        **settings: Any of the settings accepted by BedrockClientFactory.
+    """
+    _default_factory.configure(**settings)
@@ -0,0 +1,246 @@
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Callable, Iterator, Union
+
+from botocore.exceptions import ClientError
+
+from dbt_llm_tools.embeddings import HashingEmbeddingBackend
+from dbt_llm_tools.types import PromptMessage
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+INTERPRETED_MODEL_EXPRESSION = r"The model you are interpreting is called (\S+)"
+
+
+def template_completion(prompt: list[PromptMessage]) -> str:
+    """
+    Build a deterministic completion for a prompt.
+
+    Prompts from DocumentationGenerator.interpret_model are answered with a JSON interpretation of
+    the model, any other prompt with a sentence repeating the last question.
+
+    Args:
+        prompt (list[PromptMessage]): The messages sent to the model.
+
+    Returns:
+        str: The completion.
+    """
+    for message in prompt:
+        if match := re.search(INTERPRETED_MODEL_EXPRESSION, message["content"]):
+            name = match.group(1)
+            return json.dumps({"name": name, "description": f"Stub interpretation of {name}.", "columns": []})
+
+    question = next((message["content"] for message in reversed(prompt) if message["role"] == "user"), "")
+    return f"This is a stub answer to: {question}"
+
+
+class LocalBedrockClient:  # pylint: disable=too-many-instance-attributes
+    """
+    An in-process stand-in for a "bedrock-runtime" client, for load tests and offline benchmarks.
+
+    It answers invoke_model and invoke_model_with_response_stream with deterministic embeddings and
+    templated completions, after a simulated latency, and fails a configurable share of requests
+    with the same ClientError codes as Bedrock. Install it with set_bedrock_client before creating
+    the objects that use it.
+
+    Attributes:
+        embedding_latency_ms (float): The median latency of an embedding request.
+        completion_latency_ms (float): The median latency of a whole completion, spread over its chunks
+            when streamed.
+        latency_distribution (str): One of "constant", "uniform" or "lognormal".
+        latency_spread (float): The relative half-width of the uniform distribution, or the sigma of
+            the lognormal distribution.
+        error_rate (float): The share of requests failing with an InternalServerException.
+        throttle_rate (float): The share of requests failing with a ThrottlingException.
+        max_requests_per_second (float, optional): Requests above this rate fail with a ThrottlingException.
+    """
+
+    def __init__(
+            self,
+            embedding_latency_ms: float = 0.0,
+            completion_latency_ms: float = 0.0,
+            latency_distribution: str = "constant",
+            latency_spread: float = 0.5,
+            error_rate: float = 0.0,
+            throttle_rate: float = 0.0,
+            max_requests_per_second: float = None,
+            completion: Union[str, Callable[[list[PromptMessage]], str]] = template_completion,
+            embedding_dimensions: int = 256,
+            seed: int = 0,
+    ) -> None:
+        """
+        Initializes a local Bedrock client.
+
+        Args:
+            embedding_latency_ms (float, optional): The median latency of an embedding request.
+            completion_latency_ms (float, optional): The median latency of a whole completion.
+            latency_distribution (str, optional): One of "constant", "uniform" or "lognormal".
+            latency_spread (float, optional): The spread of the uniform or lognormal distribution.
+            error_rate (float, optional): The share of requests failing with an InternalServerException.
+            throttle_rate (float, optional): The share of requests failing with a ThrottlingException.
+            max_requests_per_second (float, optional): Requests above this rate are throttled.
+            completion (Union[str, Callable], optional): A canned completion, formatted with {question}
+                and {model_id}, or a function building the completion from the prompt.
+            embedding_dimensions (int, optional): The length of the embedding vectors.
+            seed (int, optional): The seed of the latency and failure draws.
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise Exception(
+                f"Please provide a valid latency distribution, one of: {', '.join(LATENCY_DISTRIBUTIONS)}."
+            )
+
+        if not 0 <= error_rate <= 1 or not 0 <= throttle_rate <= 1:
+            raise Exception("Please provide error and throttle rates between 0 and 1.")
+
+        self.embedding_latency_ms = embedding_latency_ms
+        self.completion_latency_ms = completion_latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_requests_per_second = max_requests_per_second
+
+        self.__completion = completion
+        self.__embedder = HashingEmbeddingBackend(dimensions=embedding_dimensions)
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__tokens = max_requests_per_second or 0.0
+        self.__refilled_at = time.monotonic()
+        self.__requests = 0
+        self.__throttled = 0
+        self.__errors = 0
+        self.__running = 0
+        self.__peak = 0
+
+    def __draw_latency(self, median_ms: float) -> float:
+        if median_ms <= 0:
+            return 0.0
+
+        with self.__lock:
+            if self.latency_distribution == "uniform":
+                latency_ms = median_ms * self.__random.uniform(1 - self.latency_spread, 1 + self.latency_spread)
+            elif self.latency_distribution == "lognormal":
+                latency_ms = median_ms * math.exp(self.__random.gauss(0, self.latency_spread))
+            else:
+                latency_ms = median_ms
+
+        return max(latency_ms, 0.0) / 1000
+
+    def __admit(self, operation: str) -> None:
+        with self.__lock:
+            self.__requests += 1
+
+            if self.max_requests_per_second is not None:
+                now = time.monotonic()
+                self.__tokens = min(
+                    self.max_requests_per_second,
+                    self.__tokens + (now - self.__refilled_at) * self.max_requests_per_second,
+                )
+                self.__refilled_at = now
+
+            if (self.max_requests_per_second is not None and self.__tokens < 1) or (
+                self.__random.random() < self.throttle_rate
+            ):
+                self.__throttled += 1
+                code = "ThrottlingException"
+            elif self.__random.random() < self.error_rate:
+                self.__errors += 1
+                code = "InternalServerException"
+            else:
+                self.__tokens -= 1
+                return
+
+        raise ClientError({"Error": {"Code": code, "Message": f"Simulated {code}."}}, operation)
+
+    def __enter(self) -> None:
+        with self.__lock:
+            self.__running += 1
+            self.__peak = max(self.__peak, self.__running)
+
+    def __exit(self) -> None:
+        with self.__lock:
+            self.__running -= 1
+
+    def __complete(self, model_id: str, prompt: list[PromptMessage]) -> str:
+        if callable(self.__completion):
+            return self.__completion(prompt)
+
+        question = next((message["content"] for message in reversed(prompt) if message["role"] == "user"), "")
+        return self.__completion.format(question=question, model_id=model_id)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:  # pylint: disable=invalid-name,unused-argument
+        """
+        Answer a request like the InvokeModel operation of Bedrock.
+
+        Args:
+            modelId (str): The model to invoke.
+            body (str): A JSON body with an "inputText" to embed or an "input" prompt to complete.
+
+        Returns:
+            dict: The response, with the JSON result in a readable "body".
+        """
+        request = json.loads(body)
+        self.__admit("InvokeModel")
+        self.__enter()
+
+        try:
+            if "inputText" in request:
+                time.sleep(self.__draw_latency(self.embedding_latency_ms))
+                result = {"embedding": self.__embedder.embed(request["inputText"])}
+            else:
+                time.sleep(self.__draw_latency(self.completion_latency_ms))
+                result = {"completion": self.__complete(modelId, request["input"])}
+        finally:
+            self.__exit()
+
+        return {"body": io.BytesIO(json.dumps(result).encode("utf-8")), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(
+            self, modelId: str, body: str, **kwargs  # pylint: disable=invalid-name,unused-argument
+    ) -> dict:
+        """
+        Answer a request like the InvokeModelWithResponseStream operation of Bedrock, one word per chunk.
+
+        Args:
+            modelId (str): The model to invoke.
+            body (str): A JSON body with an "input" prompt to complete.
+
+        Returns:
+            dict: The response, with the chunk events in an iterable "body".
+        """
+        prompt = json.loads(body)["input"]
+        self.__admit("InvokeModelWithResponseStream")
+
+        return {"body": self.__stream(re.findall(r"\S+\s*", self.__complete(modelId, prompt)))}
+
+    def __stream(self, chunks: list[str]) -> Iterator[dict]:
+        self.__enter()
+
+        try:
+            total_latency = self.__draw_latency(self.completion_latency_ms)
+
+            for chunk in chunks:
+                time.sleep(total_latency / len(chunks))
+                yield {"chunk": {"bytes": json.dumps({"completion": chunk}).encode("utf-8")}}
+        finally:
+            self.__exit()
+
+    def stats(self) -> dict:
+        """
+        Get the request counters.
+
+        Returns:
+            dict: The number of "requests", of "throttled" requests, of requests failed with other "errors",
+                and the "peak_concurrency" of the requests being answered.
+        """
+        with self.__lock:
+            return {
+                "requests": self.__requests,
+                "throttled": self.__throttled,
+                "errors": self.__errors,
+                "peak_concurrency": self.__peak,
+            }
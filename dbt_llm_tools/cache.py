@@ -0,0 +1,261 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import numpy as np
+
+from dbt_llm_tools.types import CacheStats
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache with an optional time to live.
+
+    Attributes:
+        max_size (int): The maximum number of entries kept in the cache.
+        ttl (float, optional): Number of seconds after which an entry expires. Entries never expire if None.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = None) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int, optional): The maximum number of entries kept in the cache.
+                A size of 0 disables the cache.
+            ttl (float, optional): Number of seconds after which an entry expires.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get an entry from the cache and mark it as recently used.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Any, optional): The value returned when the key is missing or expired.
+
+        Returns:
+            Any: The cached value, or the default.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+
+            if entry is not _MISSING and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self.__entries[key]
+                entry = _MISSING
+
+            if entry is _MISSING:
+                self.__misses += 1
+                return default
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace an entry, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+        """
+        if self.max_size <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = (value, time.monotonic())
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache. Hit and miss counters are kept.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        Get the hit and miss counters of the cache.
+
+        Returns:
+            CacheStats: The counters, the current size and the hit rate of the cache.
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+                "max_size": self.max_size,
+                "hit_rate": self.__hits / lookups if lookups else 0.0,
+            }
+
+
+class SemanticAnswerCache:
+    """
+    A thread-safe cache of answers keyed by the meaning of the question and the context it was answered from.
+
+    A question is a hit when it was answered before from the same retrieved models, with the same
+    documents, and its embedding is within the similarity threshold of the cached question.
+
+    Attributes:
+        similarity_threshold (float): The minimum cosine similarity between a question and a cached one.
+        max_size (int): The maximum number of answers kept in the cache.
+        ttl (float, optional): Number of seconds after which an answer expires. Answers never expire if None.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, max_size: int = 256, ttl: float = None) -> None:
+        """
+        Initializes an empty answer cache.
+
+        Args:
+            similarity_threshold (float, optional): The minimum cosine similarity between a question
+                and a cached one, between 0 and 1.
+            max_size (int, optional): The maximum number of answers kept in the cache.
+                A size of 0 disables the cache.
+            ttl (float, optional): Number of seconds after which an answer expires.
+        """
+        if not 0 <= similarity_threshold <= 1:
+            raise Exception("Please provide a similarity threshold between 0 and 1.")
+
+        self.similarity_threshold = similarity_threshold
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.__entries: OrderedDict = OrderedDict()
+        self.__by_context: dict[tuple, set[int]] = {}
+        self.__next_id = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def __normalize(embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def __remove(self, entry_id: int) -> None:
+        _, _, context, _ = self.__entries.pop(entry_id)
+        self.__by_context[context].discard(entry_id)
+
+        if not self.__by_context[context]:
+            del self.__by_context[context]
+
+    def get(self, embedding: list[float], context: tuple[tuple[str, str], ...]) -> Any:
+        """
+        Find the answer to a similar question asked with the same context.
+
+        Args:
+            embedding (list[float]): The embedding of the question.
+            context (tuple[tuple[str, str], ...]): The id and document hash of each retrieved model.
+
+        Returns:
+            Any: The cached answer of the most similar question, or None.
+        """
+        vector = self.__normalize(embedding)
+
+        with self.__lock:
+            best_id, best_similarity = None, self.similarity_threshold
+
+            for entry_id in list(self.__by_context.get(context, ())):
+                cached_vector, _, _, created_at = self.__entries[entry_id]
+
+                if self.ttl is not None and time.monotonic() - created_at > self.ttl:
+                    self.__remove(entry_id)
+                    continue
+
+                similarity = float(cached_vector @ vector)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(best_id)
+            self.__hits += 1
+            return self.__entries[best_id][1]
+
+    def set(self, embedding: list[float], context: tuple[tuple[str, str], ...], answer: Any) -> None:
+        """
+        Cache the answer to a question, evicting the least recently used answer if the cache is full.
+
+        Args:
+            embedding (list[float]): The embedding of the question.
+            context (tuple[tuple[str, str], ...]): The id and document hash of each retrieved model.
+            answer (Any): The answer to cache.
+        """
+        if self.max_size <= 0:
+            return
+
+        vector = self.__normalize(embedding)
+
+        with self.__lock:
+            self.__entries[self.__next_id] = (vector, answer, context, time.monotonic())
+            self.__by_context.setdefault(context, set()).add(self.__next_id)
+            self.__next_id += 1
+
+            while len(self.__entries) > self.max_size:
+                self.__remove(next(iter(self.__entries)))
+
+    def invalidate(self, model_ids: list[str]) -> None:
+        """
+        Remove every answer whose context includes one of the models.
+
+        Args:
+            model_ids (list[str]): The ids of the models that changed.
+        """
+        model_ids = set(model_ids)
+
+        with self.__lock:
+            for context in [c for c in self.__by_context if any(model_id in model_ids for model_id, _ in c)]:
+                for entry_id in list(self.__by_context[context]):
+                    self.__remove(entry_id)
+
+    def clear(self) -> None:
+        """
+        Remove every answer from the cache. Hit and miss counters are kept.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__by_context.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        Get the hit and miss counters of the cache.
+
+        Returns:
+            CacheStats: The counters, the current size and the hit rate of the cache.
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+                "max_size": self.max_size,
+                "hit_rate": self.__hits / lookups if lookups else 0.0,
+            }
@@ -1,58 +1,232 @@
+import hashlib
 import json
 import os
+import time
+from typing import Iterator
 
-import yaml
-import boto3
-
+from dbt_llm_tools.bedrock import get_bedrock_client
+from dbt_llm_tools.cache import SemanticAnswerCache
+from dbt_llm_tools.concurrency import ConcurrencyLimiter
+from dbt_llm_tools.conversation_memory import ConversationMemory
+from dbt_llm_tools.dbt_model import DbtModel
 from dbt_llm_tools.dbt_project import DbtProject
-from dbt_llm_tools.instructions import ANSWER_QUESTION_INSTRUCTIONS
-from dbt_llm_tools.types import ParsedSearchResult, PromptMessage
+from dbt_llm_tools.instructions import (
+    ANSWER_QUESTION_INSTRUCTIONS,
+    SUMMARIZE_CONVERSATION_INSTRUCTIONS,
+)
+from dbt_llm_tools.prompt_packer import estimate_tokens, pack_context
+from dbt_llm_tools.types import (
+    AnswerTrace,
+    CacheStats,
+    ParsedSearchResult,
+    PromptMessage,
+    PromptPackingReport,
+)
 from dbt_llm_tools.vector_store import VectorStore
+# MyDumper moved to yaml_writer, it stays importable from here.
+from dbt_llm_tools.yaml_writer import MyDumper  # noqa: F401  # pylint: disable=unused-import
+
+
+def stream_completion(bedrock_client, model_id: str, prompt: list[PromptMessage]) -> Iterator[str]:
+    """
+    Stream a completion from Bedrock, yielding the text of each chunk as soon as it arrives.
+
+    Args:
+        bedrock_client: A "bedrock-runtime" client.
+        model_id (str): The Bedrock model to invoke.
+        prompt (list[PromptMessage]): The messages to send to the model.
+
+    Yields:
+        str: The completion text of each chunk.
+    """
+    response = bedrock_client.invoke_model_with_response_stream(
+        modelId=model_id,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps({"input": prompt}),
+    )
+
+    for event in response["body"]:
+        if "chunk" not in event:
+            raise Exception(f"The response stream failed with: {', '.join(event)}.")
 
+        completion = json.loads(event["chunk"]["bytes"]).get("completion")
 
-class MyDumper(yaml.Dumper):
-    def increase_indent(self, flow=False, indentless=False):
-        return super().increase_indent(flow, False)
+        if completion:
+            yield completion
 
 
-class Chatbot:
+class Chatbot:  # pylint: disable=too-many-instance-attributes
     def __init__(
             self,
             dbt_project_root: str,
             bedrock_model_id: str = "anthropic.claude-v2",
             database_path: str = ".local_storage/db.json",
             vector_db_path: str = ".local_storage/chroma.db",
+            max_concurrency: int = 16,
+            answer_cache_size: int = 256,
+            answer_cache_threshold: float = 0.95,
+            prompt_token_budget: int = 4000,
+            bedrock_client=None,
     ) -> None:
         self.__bedrock_model_id: str = bedrock_model_id
+        self.__prompt_token_budget = prompt_token_budget
+        self.__limiter = ConcurrencyLimiter(max_concurrency)
+        self.__answer_cache = SemanticAnswerCache(
+            similarity_threshold=answer_cache_threshold, max_size=answer_cache_size
+        )
 
         self.project: DbtProject = DbtProject(
             dbt_project_root=dbt_project_root, database_path=database_path
         )
 
-        self.store: VectorStore = VectorStore(vector_db_path=vector_db_path)
-        self.__bedrock_client = boto3.client(service_name="bedrock-runtime")
+        # The shared client's pool is grown to max_concurrency so queued questions never wait for a connection.
+        self.__bedrock_client = (
+            bedrock_client if bedrock_client is not None else get_bedrock_client(max_concurrency)
+        )
+        self.store: VectorStore = VectorStore(
+            vector_db_path=vector_db_path, limiter=self.__limiter, bedrock_client=self.__bedrock_client
+        )
         self.__instructions: list[str] = [ANSWER_QUESTION_INSTRUCTIONS]
 
     def __prepare_prompt(
-            self, closest_models: list[ParsedSearchResult], query: str
-    ) -> list[PromptMessage]:
-        prompt: list[PromptMessage] = []
+            self, closest_models: list[ParsedSearchResult], query: str, memory: ConversationMemory = None
+    ) -> tuple[list[PromptMessage], PromptPackingReport]:
+        report: PromptPackingReport = None
+
+        if memory is not None:
+            memory.add_context(closest_models)
+            context = memory.get_context()
+
+            # The documents kept from earlier questions are packed after the new ones, most recent first.
+            ranked = sorted(
+                (model for model in closest_models if model["id"] in context), key=lambda x: x.get("distance", 0.0)
+            )
+            retrieved = {model["id"] for model in ranked}
+            ranked += [
+                {"id": doc_id, "document": document}
+                for doc_id, document in reversed(context.items())
+                if doc_id not in retrieved
+            ]
+            closest_models = [
+                {**model, "document": context[model["id"]], "distance": float(rank)}
+                for rank, model in enumerate(ranked)
+            ]
+            fixed_messages = memory.get_messages(query, documents=[])
+        else:
+            fixed_messages = [{"role": "system", "content": instruction} for instruction in self.__instructions]
+            fixed_messages.append({"role": "user", "content": query})
+
+        if self.__prompt_token_budget is not None:
+            # The instructions, the conversation and the question are always sent, the documents get what is left.
+            context_budget = self.__prompt_token_budget - sum(
+                estimate_tokens(message["content"]) for message in fixed_messages
+            )
+            closest_models, report = pack_context(closest_models, query, max(context_budget, 0))
+
+        documents = [model["document"] for model in closest_models]
+
+        if memory is not None:
+            return memory.get_messages(query, documents=documents), report
+
+        return (
+            fixed_messages[:-1]
+            + [{"role": "system", "content": document} for document in documents]
+            + fixed_messages[-1:]
+        ), report
+
+    def __summarize_conversation(self, summary: str, messages: list[PromptMessage]) -> str:
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+
+        return self.__invoke(
+            [
+                {"role": "system", "content": SUMMARIZE_CONVERSATION_INSTRUCTIONS},
+                {"role": "user", "content": f"Current summary:\n{summary}\n\nMessages:\n{transcript}"},
+            ]
+        )
+
+    def __invoke(self, prompt: list[PromptMessage]) -> str:
+        response = self.__bedrock_client.invoke_model(
+            modelId=self.__bedrock_model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps({"input": prompt}),
+        )
 
-        for instruction in self.__instructions:
-            prompt.append({"role": "system", "content": instruction})
+        return json.loads(response["body"].read())["completion"]
 
-        for model in closest_models:
-            prompt.append({"role": "system", "content": model["document"]})
+    @staticmethod
+    def __get_context(closest_models: list[ParsedSearchResult]) -> tuple[tuple[str, str], ...]:
+        return tuple(
+            sorted(
+                (model["id"], hashlib.sha256(model["document"].encode("utf-8")).hexdigest())
+                for model in closest_models
+            )
+        )
 
-        prompt.append({"role": "user", "content": query})
+    def __use_answer_cache(self, search_mode: str, memory: ConversationMemory) -> bool:
+        # Within a conversation the answer also depends on the earlier turns. The cache is keyed on the
+        # question embedding, so lexical searches skip it to stay free of embedding requests.
+        return search_mode != "lexical" and memory is None and self.__answer_cache.max_size > 0
 
-        return prompt
+    def __remember(
+            self,
+            query: str,
+            completion: str,
+            embedding: list[float],
+            context: tuple[tuple[str, str], ...],
+            memory: ConversationMemory,
+    ) -> None:
+        if embedding is not None:
+            self.__answer_cache.set(embedding, context, completion)
+
+        if memory is not None:
+            memory.add_turn(query, completion)
 
     def get_instructions(self) -> list[str]:
         return self.__instructions
 
     def set_instructions(self, instructions: list[str]) -> None:
         self.__instructions = instructions
+        self.__answer_cache.clear()
+
+    def new_conversation(
+            self,
+            max_turns: int = 6,
+            max_tokens: int = 2000,
+            max_context_models: int = 8,
+            summarize_with_model: bool = False,
+    ) -> ConversationMemory:
+        """
+        Start a conversation, to pass as memory to ask_question and its variants.
+
+        Args:
+            max_turns (int, optional): The number of recent question and answer pairs sent as is.
+            max_tokens (int, optional): The estimated size of the recent turns above which older turns
+                are summarized.
+            max_context_models (int, optional): The number of model documents kept in the conversation.
+            summarize_with_model (bool, optional): Summarize older turns with the Bedrock model instead
+                of the local extractive summary.
+
+        Returns:
+            ConversationMemory: An empty conversation pinning the current instructions.
+        """
+        return ConversationMemory(
+            self.__instructions,
+            max_turns=max_turns,
+            max_tokens=max_tokens,
+            max_context_models=max_context_models,
+            summarizer=self.__summarize_conversation if summarize_with_model else None,
+        )
+
+    def get_cache_stats(self) -> dict[str, CacheStats]:
+        """
+        Get the hit and miss counters of the answer cache and of the vector store caches.
+
+        Returns:
+            dict[str, CacheStats]: The counters of the "answers", "embeddings" and "results" caches.
+        """
+        return {"answers": self.__answer_cache.stats(), **self.store.get_cache_stats()}
 
     def load_models(
             self,
@@ -61,35 +235,201 @@ class Chatbot:
             excluded_folders: list[str] = None,
     ) -> None:
         models = self.project.get_models(models, included_folders, excluded_folders)
-        self.store.upsert_models(models)
+        models_to_store = [DbtModel.from_directory_entry(model) for model in models if "documentation" in model]
+
+        self.store.upsert_models(models_to_store)
+        self.__answer_cache.invalidate([model.name for model in models_to_store])
+
+    def reindex_models(
+            self,
+            models: list[str] = None,
+            included_folders: list[str] = None,
+            excluded_folders: list[str] = None,
+            background: bool = False,
+    ):
+        models = self.project.get_models(models, included_folders, excluded_folders)
+        self.__answer_cache.clear()
+
+        return self.store.reindex(
+            [DbtModel.from_directory_entry(model) for model in models if "documentation" in model],
+            background=background,
+        )
 
     def reset_model_db(self) -> None:
         self.store.reset_collection()
+        self.__answer_cache.clear()
 
-    def ask_question(self, query: str, get_model_names_only: bool = False) -> str:
+    def ask_question(
+            self,
+            query: str,
+            get_model_names_only: bool = False,
+            search_mode: str = "vector",
+            where: dict = None,
+            memory: ConversationMemory = None,
+    ) -> str:
         print("Asking question: ", query)
 
         print("\nLooking for closest models to the query...")
-        closest_models = self.store.query_collection(query)
+        closest_models = self.store.query_collection(query, mode=search_mode, where=where)
         model_names = ", ".join(map(lambda x: x["id"], closest_models))
 
         if get_model_names_only:
             return model_names
 
         print("Closest models found:", model_names)
+
+        context = self.__get_context(closest_models)
+        embedding = self.store.embed_query(query) if self.__use_answer_cache(search_mode, memory) else None
+
+        if embedding is not None and (completion := self.__answer_cache.get(embedding, context)) is not None:
+            print("\nCached response found: \n")
+            print(completion)
+            return completion
+
         print("\nPreparing prompt...")
-        prompt = self.__prepare_prompt(closest_models, query)
+        prompt, report = self.__prepare_prompt(closest_models, query, memory)
 
-        print("\nCalculating response...")
-        response = self.__bedrock_client.invoke_model(
-            modelId=self.__bedrock_model_id,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({"input": prompt}),
-        )
+        if report is not None:
+            print(f"Context packed into ~{report['estimated_tokens']} of {report['token_budget']} tokens.")
 
-        response_body = json.loads(response["body"].read())
+            if report["dropped_models"] or report["truncated_models"] or report["dropped_columns"]:
+                print("Dropped models:", ", ".join(report["dropped_models"]) or "none")
+                print("Truncated models:", ", ".join(report["truncated_models"]) or "none")
+                print("Dropped columns:", sum(len(columns) for columns in report["dropped_columns"].values()))
+
+        print("\nCalculating response...")
+        completion = self.__invoke(prompt)
         print("\nResponse received: \n")
-        print(response_body["completion"])
+        print(completion)
+
+        self.__remember(query, completion, embedding, context, memory)
+
+        return completion
+
+    async def aask_question(
+            self,
+            query: str,
+            get_model_names_only: bool = False,
+            search_mode: str = "vector",
+            where: dict = None,
+            memory: ConversationMemory = None,
+    ) -> str:
+        """
+        Answer a question about the dbt project without blocking the event loop.
+
+        Bedrock requests share a limiter of max_concurrency requests, so any number of questions
+        can be awaited concurrently on one event loop. Answers are cached like in ask_question.
+
+        Args:
+            query (str): The question to answer.
+            get_model_names_only (bool, optional): Only return the names of the closest models.
+            search_mode (str, optional): The search mode used to find the closest models,
+                see VectorStore.query_collection.
+            where (dict, optional): A metadata filter applied to the models, see VectorStore.query_collection.
+            memory (ConversationMemory, optional): The conversation the question belongs to, see new_conversation.
+                Answers within a conversation or found with the lexical search mode are not cached.
+
+        Returns:
+            str: The answer, or the comma separated names of the closest models.
+        """
+        if get_model_names_only:
+            closest_models = await self.store.aquery_collection(query, mode=search_mode, where=where)
+            return ", ".join(map(lambda x: x["id"], closest_models))
+
+        return (await self.aask_question_traced(query, search_mode, where, memory))["answer"]
+
+    async def aask_question_traced(
+            self,
+            query: str,
+            search_mode: str = "vector",
+            where: dict = None,
+            memory: ConversationMemory = None,
+    ) -> AnswerTrace:
+        """
+        Answer a question like aask_question, also returning the models the answer is based on
+        and the number of seconds spent in each stage.
+
+        Args:
+            query (str): The question to answer.
+            search_mode (str, optional): The search mode used to find the closest models,
+                see VectorStore.query_collection.
+            where (dict, optional): A metadata filter applied to the models, see VectorStore.query_collection.
+            memory (ConversationMemory, optional): The conversation the question belongs to, see new_conversation.
+
+        Returns:
+            AnswerTrace: The answer, the ids of the closest models, whether the answer came from the cache,
+                the "retrieval", "cache", "generation" and "total" latencies, and what was left out of the
+                prompt to fit it into the prompt token budget.
+        """
+        start = time.perf_counter()
+        closest_models = await self.store.aquery_collection(query, mode=search_mode, where=where)
+        latencies = {"retrieval": time.perf_counter() - start, "cache": 0.0, "generation": 0.0}
+        trace: AnswerTrace = {
+            "answer": None,
+            "model_ids": [model["id"] for model in closest_models],
+            "cached": False,
+            "latencies": latencies,
+            "prompt_report": None,
+        }
+
+        stage_start = time.perf_counter()
+        context = self.__get_context(closest_models)
+        embedding = await self.store.aembed_query(query) if self.__use_answer_cache(search_mode, memory) else None
+        completion = self.__answer_cache.get(embedding, context) if embedding is not None else None
+        latencies["cache"] = time.perf_counter() - stage_start
+
+        if completion is not None:
+            trace["cached"] = True
+        else:
+            def generate() -> str:
+                prompt, trace["prompt_report"] = self.__prepare_prompt(closest_models, query, memory)
+                return self.__invoke(prompt)
+
+            stage_start = time.perf_counter()
+            # The conversation memory may call Bedrock to summarize older turns, so the prompt and the
+            # memory are handled on the limiter's threads too.
+            completion = await self.__limiter.run(generate)
+            latencies["generation"] = time.perf_counter() - stage_start
+            await self.__limiter.run(self.__remember, query, completion, embedding, context, memory)
+
+        trace["answer"] = completion
+        latencies["total"] = time.perf_counter() - start
+
+        return trace
+
+    def ask_question_stream(
+            self,
+            query: str,
+            search_mode: str = "vector",
+            where: dict = None,
+            memory: ConversationMemory = None,
+    ) -> Iterator[str]:
+        """
+        Answer a question about the dbt project, yielding the answer as it is generated.
+
+        Args:
+            query (str): The question to answer.
+            search_mode (str, optional): The search mode used to find the closest models,
+                see VectorStore.query_collection.
+            where (dict, optional): A metadata filter applied to the models, see VectorStore.query_collection.
+            memory (ConversationMemory, optional): The conversation the question belongs to, see new_conversation.
+
+        Yields:
+            str: The next piece of the answer.
+        """
+        closest_models = self.store.query_collection(query, mode=search_mode, where=where)
+        context = self.__get_context(closest_models)
+        embedding = self.store.embed_query(query) if self.__use_answer_cache(search_mode, memory) else None
+
+        if embedding is not None and (completion := self.__answer_cache.get(embedding, context)) is not None:
+            yield completion
+            return
+
+        prompt, _ = self.__prepare_prompt(closest_models, query, memory)
+
+        chunks = []
+        for chunk in stream_completion(self.__bedrock_client, self.__bedrock_model_id, prompt):
+            chunks.append(chunk)
+            yield chunk
 
-        return response_body["completion"]
+        self.__remember(query, "".join(chunks), embedding, context, memory)
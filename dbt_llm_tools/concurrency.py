@@ -0,0 +1,52 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ConcurrencyLimiter:
+    """
+    Runs blocking calls, such as Bedrock requests, from coroutines without blocking the event loop.
+
+    Calls are executed on a dedicated thread pool, so at most max_concurrency of them are in flight
+    at once while any number of coroutines wait for their turn.
+
+    Attributes:
+        max_concurrency (int): The maximum number of calls running at the same time.
+    """
+
+    def __init__(self, max_concurrency: int = 16) -> None:
+        """
+        Initializes a concurrency limiter.
+
+        Args:
+            max_concurrency (int, optional): The maximum number of calls running at the same time.
+        """
+        if not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise Exception("Please provide a positive maximum concurrency.")
+
+        self.max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="dbt-llm-tools"
+        )
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function once a slot is free and wait for its result.
+
+        Args:
+            function (Callable): The function to run.
+            *args: Positional arguments passed to the function.
+            **kwargs: Keyword arguments passed to the function.
+
+        Returns:
+            Any: The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(function, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """
+        Stop the thread pool once the calls already submitted are done.
+        """
+        self.__executor.shutdown(wait=True)
@@ -0,0 +1,214 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from dbt_llm_tools.prompt_packer import estimate_tokens
+from dbt_llm_tools.types import ParsedSearchResult, PromptMessage
+
+Summarizer = Callable[[str, list[PromptMessage]], str]
+
+SUMMARY_LINE_CHARACTERS = 200
+
+
+def extractive_summary(summary: str, messages: list[PromptMessage], max_tokens: int = 500) -> str:
+    """
+    Fold older conversation turns into a summary without calling a model.
+
+    Each question is kept with the first sentence of its answer, both shortened. The oldest
+    lines are dropped once the summary grows beyond max_tokens.
+
+    Args:
+        summary (str): The summary of the turns folded so far.
+        messages (list[PromptMessage]): The user and assistant messages to fold in, oldest first.
+        max_tokens (int, optional): The maximum estimated size of the summary.
+
+    Returns:
+        str: The new summary.
+    """
+    lines = summary.split("\n") if summary else []
+
+    for message in messages:
+        text = " ".join(message["content"].split())
+
+        if message["role"] == "assistant":
+            text = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+
+        if len(text) > SUMMARY_LINE_CHARACTERS:
+            text = text[:SUMMARY_LINE_CHARACTERS - 3] + "..."
+
+        lines.append(f"- {'The user asked' if message['role'] == 'user' else 'You answered'}: {text}")
+
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    The bounded state of a conversation with the chatbot.
+
+    System instructions are pinned at the top of every prompt. Model documents retrieved during the
+    conversation are kept once per model, the most recently retrieved ones last. Only a window of
+    recent turns is sent as is. Older turns, and turns pushing the conversation over its token
+    threshold, are folded into a summary.
+
+    Attributes:
+        max_turns (int): The number of recent question and answer pairs sent as is.
+        max_tokens (int): The estimated size of the recent turns above which older turns are summarized.
+        max_context_models (int): The number of model documents kept.
+    """
+
+    def __init__(
+            self,
+            instructions: list[str] = None,
+            max_turns: int = 6,
+            max_tokens: int = 2000,
+            max_context_models: int = 8,
+            summarizer: Summarizer = None,
+    ) -> None:
+        """
+        Initializes an empty conversation.
+
+        Args:
+            instructions (list[str], optional): The system instructions pinned at the top of every prompt.
+            max_turns (int, optional): The number of recent question and answer pairs sent as is.
+            max_tokens (int, optional): The estimated size of the recent turns above which older turns
+                are summarized. The latest turn is always kept.
+            max_context_models (int, optional): The number of model documents kept.
+            summarizer (Summarizer, optional): A function taking the current summary and the messages
+                to fold in, and returning the new summary. Defaults to extractive_summary.
+        """
+        if max_turns < 1 or max_context_models < 0:
+            raise Exception("Please provide a positive number of turns and a non-negative number of models.")
+
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_context_models = max_context_models
+
+        self.__instructions = list(instructions or [])
+        self.__summarizer = summarizer or extractive_summary
+        self.__context: OrderedDict[str, str] = OrderedDict()
+        self.__turns: list[tuple[str, str]] = []
+        self.__summary = ""
+        self.__lock = threading.Lock()
+
+    def get_instructions(self) -> list[str]:
+        return list(self.__instructions)
+
+    def get_summary(self) -> str:
+        return self.__summary
+
+    def get_context_model_ids(self) -> list[str]:
+        return list(self.__context)
+
+    def get_context(self) -> dict[str, str]:
+        """
+        Get the model documents kept in the conversation.
+
+        Returns:
+            dict[str, str]: The document of each model id, from the least to the most recently retrieved.
+        """
+        with self.__lock:
+            return dict(self.__context)
+
+    def add_context(self, closest_models: list[ParsedSearchResult]) -> None:
+        """
+        Add retrieved model documents, replacing earlier versions of the same models.
+
+        Args:
+            closest_models (list[ParsedSearchResult]): The models retrieved for the latest question.
+        """
+        with self.__lock:
+            for model in closest_models:
+                self.__context.pop(model["id"], None)
+                self.__context[model["id"]] = model["document"]
+
+            while len(self.__context) > self.max_context_models:
+                self.__context.popitem(last=False)
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """
+        Record a question and its answer, summarizing older turns if the window is full.
+
+        Args:
+            question (str): The question asked by the user.
+            answer (str): The answer of the chatbot.
+        """
+        with self.__lock:
+            self.__turns.append((question, answer))
+            folded = []
+
+            while len(self.__turns) > self.max_turns or (
+                len(self.__turns) > 1 and self.__estimate_turn_tokens() > self.max_tokens
+            ):
+                folded.append(self.__turns.pop(0))
+
+            if folded:
+                self.__summary = self.__summarizer(self.__summary, self.__as_messages(folded))
+
+    def get_messages(self, query: str = None, documents: list[str] = None) -> list[PromptMessage]:
+        """
+        Build the prompt for the next question.
+
+        Args:
+            query (str, optional): The next question, appended as the last user message.
+            documents (list[str], optional): The model documents to send instead of the ones kept in
+                the conversation, e.g. after packing them into a token budget.
+
+        Returns:
+            list[PromptMessage]: The pinned instructions, the summary, the model documents,
+                the recent turns and the question.
+        """
+        with self.__lock:
+            messages: list[PromptMessage] = [
+                {"role": "system", "content": instruction} for instruction in self.__instructions
+            ]
+
+            if self.__summary:
+                messages.append(
+                    {"role": "system", "content": f"Summary of the earlier conversation:\n{self.__summary}"}
+                )
+
+            if documents is None:
+                documents = list(self.__context.values())
+
+            messages += [{"role": "system", "content": document} for document in documents]
+            messages += self.__as_messages(self.__turns)
+
+        if query is not None:
+            messages.append({"role": "user", "content": query})
+
+        return messages
+
+    def estimate_tokens(self) -> int:
+        """
+        Estimate the size of the prompt built by get_messages, without a question.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        return sum(estimate_tokens(message["content"]) for message in self.get_messages())
+
+    def clear(self) -> None:
+        """
+        Forget the turns, the summary and the model documents. The instructions stay pinned.
+        """
+        with self.__lock:
+            self.__context.clear()
+            self.__turns = []
+            self.__summary = ""
+
+    def __estimate_turn_tokens(self) -> int:
+        return sum(estimate_tokens(question) + estimate_tokens(answer) for question, answer in self.__turns)
+
+    @staticmethod
+    def __as_messages(turns: list[tuple[str, str]]) -> list[PromptMessage]:
+        messages: list[PromptMessage] = []
+
+        for question, answer in turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+
+        return messages
@@ -0,0 +1,105 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
+
+
+def upstream_closure(targets: list[str], get_refs: Callable[[str], Optional[list[str]]]) -> dict[str, list[str]]:
+    """
+    Collect the targets and everything upstream of them into a dependency graph.
+
+    Args:
+        targets (list[str]): The nodes to start from.
+        get_refs (Callable): Returns the direct upstream nodes of a node, or None when the node is unknown.
+            Unknown nodes are left out of the graph.
+
+    Returns:
+        dict[str, list[str]]: The direct upstream nodes of every node of the closure.
+    """
+    graph = {}
+    stack = list(targets)
+
+    while stack:
+        name = stack.pop()
+
+        if name in graph:
+            continue
+
+        refs = get_refs(name)
+
+        if refs is None:
+            continue
+
+        graph[name] = list(dict.fromkeys(refs))
+        stack.extend(graph[name])
+
+    return {name: [ref for ref in refs if ref in graph and ref != name] for name, refs in graph.items()}
+
+
+def run_dag(
+        graph: dict[str, list[str]],
+        task: Callable[[str], Any],
+        max_concurrency: int = 8,
+        on_complete: Callable[[str, Any, Optional[BaseException]], None] = None,
+) -> dict[str, str]:
+    """
+    Run a task for every node of a dependency graph, each as soon as all of its upstream nodes are done.
+
+    Tasks run on a thread pool. on_complete is called on the calling thread as each task finishes,
+    so it can safely write results that are not thread safe, such as the TinyDB directory. When a task
+    fails, only the nodes downstream of it are skipped.
+
+    Args:
+        graph (dict[str, list[str]]): The direct upstream nodes of every node, see upstream_closure.
+        task (Callable): Runs a node and returns its result.
+        max_concurrency (int, optional): The maximum number of tasks running at the same time.
+        on_complete (Callable, optional): Called with the node, its result and the exception it raised, if any.
+
+    Returns:
+        dict[str, str]: The status of every node, "done", "failed" or "blocked" when it was not run because
+            an upstream node failed or is part of a cycle.
+    """
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        raise Exception("Please provide a positive maximum concurrency.")
+
+    children: dict[str, list[str]] = {name: [] for name in graph}
+    waiting_on = {name: len(refs) for name, refs in graph.items()}
+    statuses: dict[str, str] = {}
+
+    for name, refs in graph.items():
+        for ref in refs:
+            children[ref].append(name)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="dbt-llm-tools-dag") as executor:
+        running = {executor.submit(task, name): name for name, count in waiting_on.items() if count == 0}
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+
+                if on_complete is not None:
+                    on_complete(name, None if error else future.result(), error)
+
+                if error is not None:
+                    statuses[name] = "failed"
+                    blocked = list(children[name])
+
+                    while blocked:
+                        child = blocked.pop()
+
+                        if child not in statuses:
+                            statuses[child] = "blocked"
+                            blocked.extend(children[child])
+
+                    continue
+
+                statuses[name] = "done"
+
+                for child in children[name]:
+                    waiting_on[child] -= 1
+
+                    if waiting_on[child] == 0 and child not in statuses:
+                        running[executor.submit(task, child)] = child
+
+    return {name: statuses.get(name, "blocked") for name in graph}
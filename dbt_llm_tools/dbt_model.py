@@ -1,6 +1,8 @@
+import json
+import os
 from typing import Callable
 
-from dbt_llm_tools.types import DbtModelDict
+from dbt_llm_tools.types import DbtModelDict, DbtModelDirectoryEntry
 
 
 class DbtModel:
@@ -12,14 +14,25 @@ class DbtModel:
         description (str, optional): The description of the model.
         columns (list[DbtModelColumn], optional):
             A list of columns contained in the model. May or may not be exhaustive.
+        tags (list[str]): The tags set in the model config.
+        materialization (str, optional): The materialization set in the model config.
+        path (str, optional): The path of the model relative to the project root.
+        has_interpretation (bool): Whether an LLM interpretation exists for the model.
     """
 
-    def __init__(self, documentation: DbtModelDict) -> None:
+    def __init__(
+        self,
+        documentation: DbtModelDict,
+        path: str = None,
+        has_interpretation: bool = False,
+    ) -> None:
         """
         Initializes a dbt model object.
 
         Args:
             model_dict (dict): A dictionary containing the model name, description and columns.
+            path (str, optional): The path of the model relative to the project root.
+            has_interpretation (bool, optional): Whether an LLM interpretation exists for the model.
         """
         self.name = documentation.get("name")
 
@@ -28,6 +41,9 @@ class DbtModel:
 
         config = documentation.get("config", {})
         self.tags = config.get("tags", [])
+        self.materialization = config.get("materialized")
+        self.path = path
+        self.has_interpretation = has_interpretation
 
         self.description = documentation.get("description", "")
 
@@ -69,6 +85,57 @@ class DbtModel:
 
         return model_text
 
+    @classmethod
+    def from_directory_entry(cls, entry: DbtModelDirectoryEntry) -> "DbtModel":
+        """
+        Creates a dbt model object from an entry of the parsed project directory.
+
+        Args:
+            entry (DbtModelDirectoryEntry): The directory entry, which must contain documentation.
+
+        Returns:
+            DbtModel: The dbt model, including its path and whether it has an interpretation.
+        """
+        if "documentation" not in entry:
+            raise Exception(f"The model {entry.get('name')} does not have any documentation.")
+
+        return cls(
+            entry["documentation"],
+            path=entry.get("relative_path"),
+            has_interpretation=entry.get("interpretation") is not None,
+        )
+
+    def as_metadata(self) -> dict:
+        """
+        Returns flat, filterable metadata for the model, suitable for a vector store.
+
+        Tags become boolean "tag:<tag>" keys and every folder containing the model becomes a
+        boolean "folder:<folder>" key, so that they can be filtered with equality conditions.
+
+        Returns:
+            dict: A dictionary of string, number and boolean values.
+        """
+        metadata = {
+            "tags": json.dumps(self.tags),
+            "has_interpretation": self.has_interpretation,
+        }
+
+        for tag in self.tags:
+            metadata[f"tag:{tag}"] = True
+
+        if self.materialization is not None:
+            metadata["materialization"] = self.materialization
+
+        if self.path:
+            path = self.path.replace(os.sep, "/").strip("/")
+            metadata["path"] = path
+
+            folders = path.split("/")[:-1]
+            for i in range(len(folders)):
+                metadata[f"folder:{'/'.join(folders[:i + 1])}"] = True
+
+        return metadata
+
     def as_dict(self) -> DbtModelDict:
         """
         Returns the dbt model as a dictionary.
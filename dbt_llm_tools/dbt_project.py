@@ -1,5 +1,4 @@
 import glob
-import json
 import os
 import re
 from typing import Union
@@ -177,16 +176,6 @@ class DbtProject:
 
         return models, sources
 
-    def __get_directory(self):
-        """
-        Get the parsed directory from the directory file.
-
-        Returns:
-            dict: The parsed directory.
-        """
-        with open(self.__database_path, encoding="utf-8") as f:
-            return json.load(f)
-
     def __save_directory(self, directory):
         """
         Save the parsed directory to a file.
@@ -257,7 +246,6 @@ class DbtProject:
         if model_name is None:
             raise Exception("No model name provided")
 
-        # directory = self.__get_directory()
         db = TinyDB(self.__database_path)
         Model = Query()  # pylint: disable=invalid-name
 
@@ -316,9 +304,7 @@ class DbtProject:
         Args:
             model (dict): The model to update.
         """
-        directory = self.__get_directory()
-
-        if model["name"] in directory["models"]:
-            directory["models"][model["name"]] = model
+        db = TinyDB(self.__database_path, sort_keys=True, indent=4)
+        Model = Query()  # pylint: disable=invalid-name
 
-        self.__save_directory(directory)
+        db.update(model, Model.name == model["name"])
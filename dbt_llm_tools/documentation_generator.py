@@ -1,17 +1,39 @@
+import hashlib
 import json
 import os
+import time
+from typing import Callable
 
-import yaml
-import boto3
-
+from dbt_llm_tools.bedrock import get_bedrock_client
+from dbt_llm_tools.dag import run_dag, upstream_closure
 from dbt_llm_tools.dbt_project import DbtProject
 from dbt_llm_tools.instructions import INTERPRET_MODEL_INSTRUCTIONS
-from dbt_llm_tools.types import DbtModelDict, DbtModelDirectoryEntry, PromptMessage
+from dbt_llm_tools.prompt_packer import dump_compact, minimize_ref_interpretations
+from dbt_llm_tools.types import (
+    DbtModelDict,
+    DbtModelDirectoryEntry,
+    DocumentationProgress,
+    DocumentationRunReport,
+    PromptMessage,
+)
+from dbt_llm_tools.yaml_writer import write_models_to_yaml
+
+
+INTERPRETATION_KEY_FIELD = "interpretation_key"
 
 
-class MyDumper(yaml.Dumper):
-    def increase_indent(self, flow=False, indentless=False):
-        return super().increase_indent(flow, False)
+def print_progress(progress: DocumentationProgress) -> None:
+    """
+    Print the progress of a documentation run on one line.
+
+    Args:
+        progress (DocumentationProgress): The progress after the last finished model.
+    """
+    eta = "unknown" if progress["eta_seconds"] is None else f"{progress['eta_seconds']:.0f}s"
+    print(
+        f"[{progress['finished']}/{progress['total']}] {progress['model']} {progress['status']}, "
+        f"{progress['models_per_second']:.2f} models/s, ETA {eta}"
+    )
 
 
 class DocumentationGenerator:
@@ -20,12 +42,16 @@ class DocumentationGenerator:
             dbt_project_root: str,
             bedrock_model_id: str = "anthropic.claude-v2",
             database_path: str = "./directory.json",
+            ref_token_budget: int = 2000,
+            bedrock_client=None,
     ) -> None:
         self.dbt_project = DbtProject(
             dbt_project_root=dbt_project_root, database_path=database_path
         )
 
-        self.__bedrock_client = boto3.client(service_name="bedrock-runtime")
+        self.__ref_token_budget = ref_token_budget
+
+        self.__bedrock_client = bedrock_client if bedrock_client is not None else get_bedrock_client()
         self.__bedrock_model_id = bedrock_model_id
 
     def __get_system_prompt(self, message: str) -> PromptMessage:
@@ -34,50 +60,39 @@ class DocumentationGenerator:
             "content": message,
         }
 
-    def __save_interpretation_to_yaml(
-            self, model: DbtModelDict, overwrite_existing: bool = False
-    ) -> None:
-        yaml_path = model.get("yaml_path")
+    def __get_ref_context(
+            self, model: DbtModelDirectoryEntry, ref_interpretations: dict[str, DbtModelDict] = None
+    ) -> dict[str, DbtModelDict]:
+        if ref_interpretations is None:
+            ref_interpretations = {
+                ref: (self.dbt_project.get_single_model(ref) or {}).get("interpretation")
+                for ref in model.get("refs", [])
+            }
 
-        if yaml_path is not None:
-            if not overwrite_existing:
-                raise Exception(
-                    f"Model already has documentation at {model['yaml_path']}"
-                )
+        context, _ = minimize_ref_interpretations(
+            model.get("sql_contents") or "",
+            {ref: ref_interpretations.get(ref) for ref in model.get("refs", [])},
+            self.__ref_token_budget,
+        )
+        return context
 
-            with open(model["yaml_path"], "r", encoding="utf-8") as infile:
-                existing_yaml = yaml.load(infile, Loader=yaml.FullLoader)
-                existing_models = existing_yaml.get("models", [])
-
-                search_idx = -1
-                for idx, m in enumerate(existing_models):
-                    if m["name"] == model["name"]:
-                        search_idx = idx
-
-                if search_idx != -1:
-                    existing_models[search_idx] = model["interpretation"]
-                else:
-                    existing_models.append(model["interpretation"])
-
-                existing_yaml["models"] = existing_models
-                yaml_content = existing_yaml
-        else:
-            model_path = model["absolute_path"]
-            head, tail = os.path.split(model_path)
-            yaml_path = os.path.join(head, "_" + tail.replace(".sql", ".yml"))
-
-            yaml_content = {"version": 2, "models": [model["interpretation"]]}
-
-        with open(yaml_path, "w", encoding="utf-8") as outfile:
-            yaml.dump(
-                yaml_content,
-                outfile,
-                Dumper=MyDumper,
-                default_flow_style=False,
-                sort_keys=False,
-            )
+    def interpret_model(
+            self, model: DbtModelDirectoryEntry, ref_interpretations: dict[str, DbtModelDict] = None
+    ) -> DbtModelDict:
+        """
+        Ask the LLM to interpret a model from its SQL and the interpretations of the models it references.
 
-    def interpret_model(self, model: DbtModelDirectoryEntry) -> DbtModelDict:
+        The interpretations of the referenced models are minimized first: only the columns the SQL
+        uses are kept, in compact JSON, within the ref_token_budget of the generator.
+
+        Args:
+            model (DbtModelDirectoryEntry): The model to interpret.
+            ref_interpretations (dict[str, DbtModelDict], optional): The interpretations of the referenced
+                models. They are read from the project directory when not given.
+
+        Returns:
+            DbtModelDict: The interpretation of the model.
+        """
         print(f"Interpreting model: {model['name']}")
 
         prompt = []
@@ -98,18 +113,18 @@ class DocumentationGenerator:
                 self.__get_system_prompt(
                     f"""
                     The model {model["name"]} references the following models: {", ".join(refs)}.
-                    The interpretation for each of these models is as follows:
+                    The interpretation for each of these models is as follows, listing only the columns
+                    used by {model["name"]}:
                     """
                 )
             )
 
-            for ref in refs:
-                ref_model = self.dbt_project.get_single_model(ref)
+            for ref, ref_interpretation in self.__get_ref_context(model, ref_interpretations).items():
                 prompt.append(
                     self.__get_system_prompt(
                         f"""
                         The model {ref} is interpreted as follows:
-                        {json.dumps(ref_model.get("interpretation"), indent=4)}
+                        {dump_compact(ref_interpretation)}
                         """
                     )
                 )
@@ -123,22 +138,317 @@ class DocumentationGenerator:
         response_body = json.loads(response["body"].read())
         return json.loads(response_body["completion"])
 
+    def get_interpretation_key(
+            self, model: DbtModelDirectoryEntry, ref_interpretations: dict[str, DbtModelDict]
+    ) -> str:
+        """
+        Hash everything an interpretation depends on: the SQL of the model, the parts of the interpretations
+        of the models it references that go into the prompt, the LLM and the instructions. A change to an
+        upstream column the model does not use leaves the key as it is.
+
+        Args:
+            model (DbtModelDirectoryEntry): The model to interpret.
+            ref_interpretations (dict[str, DbtModelDict]): The interpretations of the referenced models.
+
+        Returns:
+            str: The key, which changes whenever the interpretation may change.
+        """
+        payload = {
+            "sql": model.get("sql_contents"),
+            "refs": self.__get_ref_context(model, ref_interpretations),
+            "model_id": self.__bedrock_model_id,
+            "instructions": INTERPRET_MODEL_INSTRUCTIONS,
+        }
+
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def write_interpretations_to_yaml(
+            self, model_names: list[str], overwrite_existing: bool = False
+    ) -> dict[str, str]:
+        """
+        Write the interpretations of several models to their YAML files, writing each file once.
+
+        A model documented in a schema file is written back to that file, any other model to a new
+        "_<model>.yml" file next to its SQL. Interpretations sharing a file are merged in memory, and the
+        file is replaced atomically, changing only the entries of those models.
+
+        Args:
+            model_names (list[str]): The models to write, which must have an interpretation.
+            overwrite_existing (bool, optional): Replace the documentation of models that already have a YAML file.
+
+        Returns:
+            dict[str, str]: The error of every model that could not be written.
+        """
+        errors: dict[str, str] = {}
+        files: dict[str, list[DbtModelDirectoryEntry]] = {}
+
+        for name in model_names:
+            model = self.dbt_project.get_single_model(name)
+
+            if model is None or model.get("interpretation") is None:
+                errors[name] = f"Model {name} has no interpretation to write"
+            elif model.get("yaml_path") is not None and not overwrite_existing:
+                errors[name] = f"Model already has documentation at {model['yaml_path']}"
+            elif model.get("yaml_path") is not None:
+                files.setdefault(model["yaml_path"], []).append(model)
+            else:
+                head, tail = os.path.split(model["absolute_path"])
+                files.setdefault(os.path.join(head, "_" + tail.replace(".sql", ".yml")), []).append(model)
+
+        for yaml_path, models in files.items():
+            entries = [
+                {"name": model["name"], **{k: v for k, v in model["interpretation"].items() if k != "name"}}
+                for model in models
+            ]
+
+            try:
+                write_models_to_yaml(yaml_path, entries)
+            except Exception as e:  # pylint: disable=broad-except
+                errors.update({model["name"]: str(e) for model in models})
+
+        return errors
+
     def generate_documentation(
             self, model_name: str, write_documentation_to_yaml: bool = False
     ) -> DbtModelDict:
-        model = self.dbt_project.get_single_model(model_name)
+        """
+        Generate documentation for a model and the models upstream of it, one at a time.
+
+        Models whose SQL, upstream interpretations, LLM and instructions did not change since they
+        were last interpreted are skipped, see get_interpretation_key.
+
+        Args:
+            model_name (str): The model to document.
+            write_documentation_to_yaml (bool, optional): Write the interpretation to a YAML file,
+                even when it was reused.
+
+        Returns:
+            DbtModelDict: The interpretation of the model.
+        """
+        report = self.__run_documentation(
+            [model_name], 1, lambda name, entry, key: entry.get(INTERPRETATION_KEY_FIELD) == key
+        )
+
+        # Reused interpretations are written too, only the LLM call is skipped for them.
+        if write_documentation_to_yaml and model_name in report["interpreted"] + report["reused"]:
+            report["failed"].update(self.write_interpretations_to_yaml([model_name]))
+
+        if report["failed"]:
+            name, error = next(iter(report["failed"].items()))
+            raise Exception(f"The model {name} could not be documented: {error}")
+
+        return self.dbt_project.get_single_model(model_name)["interpretation"]
+
+    def __run_documentation(
+            self,
+            model_names: list[str],
+            max_concurrency: int,
+            is_current: Callable[[str, DbtModelDirectoryEntry, str], bool],
+            on_model_complete: Callable[[str, str], None] = None,
+    ) -> DocumentationRunReport:
+        entries: dict[str, DbtModelDirectoryEntry] = {}
+
+        def get_refs(name: str):
+            if name not in entries:
+                entry = self.dbt_project.get_single_model(name)
+
+                if entry is None:
+                    return None
+
+                entries[name] = entry
+
+            return entries[name].get("refs", [])
 
-        for dep in model.get("deps", []):
-            dep_model = self.dbt_project.get_single_model(dep)
-            if dep_model.get("interpretation") is None:
-                dep_model["interpretation"] = self.interpret_model(dep_model)
-                self.dbt_project.update_model_directory(dep_model)
+        missing = [name for name in model_names if get_refs(name) is None]
 
-        interpretation = self.interpret_model(model)
-        model["interpretation"] = interpretation
+        if missing:
+            raise Exception(f"Please provide models that exist in the project, not found: {', '.join(missing)}.")
+
+        graph = upstream_closure(model_names, get_refs)
+        # Written on the calling thread only, before the tasks that read them are submitted.
+        interpretations: dict[str, DbtModelDict] = {}
+        report: DocumentationRunReport = {"interpreted": [], "reused": [], "failed": {}, "blocked": []}
+
+        def interpret(name: str) -> tuple[DbtModelDict, bool, str]:
+            entry = entries[name]
+            refs = {ref: interpretations[ref] for ref in entry.get("refs", []) if ref in interpretations}
+            key = self.get_interpretation_key(entry, refs)
+
+            if entry.get("interpretation") is not None and is_current(name, entry, key):
+                return entry["interpretation"], False, key
+
+            return self.interpret_model(entry, refs), True, key
+
+        def on_complete(name: str, result: tuple[DbtModelDict, bool, str], error: BaseException) -> None:
+            if error is not None:
+                report["failed"][name] = str(error)
+            elif not result[1]:
+                interpretations[name] = result[0]
+                report["reused"].append(name)
+            else:
+                entry = entries[name]
+                entry["interpretation"] = interpretations[name] = result[0]
+                entry[INTERPRETATION_KEY_FIELD] = result[2]
+                self.dbt_project.update_model_directory(entry)
+                report["interpreted"].append(name)
+
+            if on_model_complete is not None:
+                status = "failed" if name in report["failed"] else "interpreted" if result[1] else "reused"
+                on_model_complete(name, status)
+
+        statuses = run_dag(graph, interpret, max_concurrency, on_complete)
+        report["blocked"] = [name for name, status in statuses.items() if status == "blocked"]
+
+        if on_model_complete is not None:
+            for name in report["blocked"]:
+                on_model_complete(name, "blocked")
+
+        return report
+
+    def generate_documentation_for_models(
+            self,
+            model_names: list[str],
+            max_concurrency: int = 8,
+            write_documentation_to_yaml: bool = False,
+            overwrite_existing: bool = False,
+            force: bool = False,
+    ) -> DocumentationRunReport:
+        """
+        Generate documentation for several models and everything upstream of them, interpreting
+        independent models concurrently.
+
+        A model is interpreted as soon as all the models it references are, so each layer of the DAG
+        runs in parallel. Models whose interpretation key did not change are reused, see
+        get_interpretation_key. When a model fails, only the models downstream of it are skipped.
+        Interpretations are saved to the project directory as each model finishes, and written to the
+        YAML files in one batch at the end, see write_interpretations_to_yaml.
+
+        Args:
+            model_names (list[str]): The models to document.
+            max_concurrency (int, optional): The maximum number of models interpreted at the same time.
+            write_documentation_to_yaml (bool, optional): Write the interpretations of the given models
+                to their YAML files.
+            overwrite_existing (bool, optional): Replace the documentation of models that already have a YAML file.
+            force (bool, optional): Interpret the given models again even when their key did not change.
+
+        Returns:
+            DocumentationRunReport: The models that were interpreted, reused, failed or blocked.
+        """
+        targets = set(model_names)
+        report = self.__run_documentation(
+            model_names,
+            max_concurrency,
+            lambda name, entry, key: not (force and name in targets) and entry.get(INTERPRETATION_KEY_FIELD) == key,
+        )
 
         if write_documentation_to_yaml:
-            self.__save_interpretation_to_yaml(model)
+            report["failed"].update(
+                self.write_interpretations_to_yaml(
+                    [name for name in report["interpreted"] + report["reused"] if name in targets],
+                    overwrite_existing,
+                )
+            )
+
+        return report
+
+    def generate_project_documentation(
+            self,
+            checkpoint_path: str = ".local_storage/documentation_checkpoint.json",
+            max_concurrency: int = 8,
+            reinterpret_existing: bool = False,
+            write_documentation_to_yaml: bool = False,
+            overwrite_existing: bool = False,
+            on_progress: Callable[[DocumentationProgress], None] = None,
+    ) -> DocumentationRunReport:
+        """
+        Generate documentation for every model of the project, in a run that can be resumed.
+
+        A checkpoint of the finished models is written after each model, and the interpretation itself
+        is saved to the project directory, so a run that crashes or is interrupted picks up where it
+        stopped when it is started again. The checkpoint is removed once every model is documented.
+        Interpretations are written to the YAML files in one batch at the end, the checkpoint keeps
+        track of the ones still to write.
+
+        Args:
+            checkpoint_path (str, optional): The JSON file the progress of the run is saved to.
+            max_concurrency (int, optional): The maximum number of models interpreted at the same time.
+            reinterpret_existing (bool, optional): Interpret every model again, instead of only the models
+                whose interpretation key changed, see get_interpretation_key.
+            write_documentation_to_yaml (bool, optional): Write the interpretations to the YAML files.
+            overwrite_existing (bool, optional): Replace the documentation of models that already have a YAML file.
+            on_progress (Callable, optional): Called with the progress of the run after each model, and
+                once for each model blocked by a failure upstream. Defaults to printing the progress.
+
+        Returns:
+            DocumentationRunReport: The models interpreted, reused, failed or blocked in this run.
+        """
+        checkpoint = {"completed": []}
+
+        if os.path.isfile(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+
+        completed = set(checkpoint["completed"])
+        unwritten = set(checkpoint.get("unwritten", []))
+        model_names = [model["name"] for model in self.dbt_project.get_models()]
+        start = time.monotonic()
+        counts = {"interpreted": 0, "reused": 0, "failed": 0, "blocked": 0}
+
+        def save_checkpoint() -> None:
+            os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+            tmp_path = f"{checkpoint_path}.tmp"
+
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"completed": sorted(completed), "unwritten": sorted(unwritten)}, f)
+
+            os.replace(tmp_path, checkpoint_path)
+
+        def on_model_complete(name: str, status: str) -> None:
+            counts[status] += 1
+
+            if status in ("interpreted", "reused"):
+                completed.add(name)
+
+                if write_documentation_to_yaml:
+                    unwritten.add(name)
+
+                save_checkpoint()
+
+            elapsed = time.monotonic() - start
+            finished = sum(counts.values())
+            rate = (counts["interpreted"] + counts["reused"]) / elapsed if elapsed > 0 else 0.0
+            remaining = len(model_names) - finished
+
+            (on_progress or print_progress)(
+                {
+                    "model": name,
+                    "status": status,
+                    "finished": finished,
+                    "total": len(model_names),
+                    "failed": counts["failed"],
+                    "blocked": counts["blocked"],
+                    "elapsed_seconds": elapsed,
+                    "models_per_second": rate,
+                    "eta_seconds": remaining / rate if rate > 0 else None,
+                }
+            )
+
+        report = self.__run_documentation(
+            model_names,
+            max_concurrency,
+            lambda name, entry, key: name in completed or (
+                not reinterpret_existing and entry.get(INTERPRETATION_KEY_FIELD) == key
+            ),
+            on_model_complete,
+        )
+
+        if unwritten:
+            errors = self.write_interpretations_to_yaml(sorted(unwritten), overwrite_existing)
+            report["failed"].update(errors)
+            unwritten.intersection_update(errors)
+            save_checkpoint()
+
+        if not report["failed"] and not report["blocked"] and os.path.isfile(checkpoint_path):
+            os.remove(checkpoint_path)
 
-        self.dbt_project.update_model_directory(model)
-        return interpretation
+        return report
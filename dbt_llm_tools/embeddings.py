@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import math
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from dbt_llm_tools.bedrock import get_bedrock_client
+from dbt_llm_tools.concurrency import ConcurrencyLimiter
+from dbt_llm_tools.lexical_index import tokenize
+
+
+class EmbeddingBackend(ABC):
+    """
+    Base class for the backends that turn texts into embedding vectors. Subclasses implement embed_many.
+
+    Attributes:
+        model_id (str): Identifier of the embedding model. Vectors from different model ids
+            should never be mixed in the same collection.
+    """
+
+    model_id: str = ""
+
+    def embed(self, text: str) -> list[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            list[float]: The embedding vector.
+        """
+        return self.embed_many([text])[0]
+
+    @abstractmethod
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed several texts at once.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding vector per text, in the order of the texts.
+        """
+
+    async def aembed_many(
+        self, texts: list[str], limiter: ConcurrencyLimiter = None
+    ) -> list[list[float]]:
+        """
+        Embed several texts without blocking the event loop, one request per text.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            limiter (ConcurrencyLimiter, optional): Bounds the number of requests in flight.
+                Requests run on the default executor when no limiter is given.
+
+        Returns:
+            list[list[float]]: One embedding vector per text, in the order of the texts.
+        """
+        if limiter is None:
+            return list(await asyncio.gather(*(asyncio.to_thread(self.embed, text) for text in texts)))
+
+        return list(await asyncio.gather(*(limiter.run(self.embed, text) for text in texts)))
+
+
+class BedrockEmbeddingBackend(EmbeddingBackend):
+    """
+    Embeds texts with an AWS Bedrock embedding model such as Amazon Titan.
+    """
+
+    def __init__(
+        self, model_id: str = "amazon.titan-embed-text-v1", max_workers: int = 8, client=None
+    ) -> None:
+        """
+        Initializes a Bedrock embedding backend.
+
+        Args:
+            model_id (str, optional): The Bedrock model id.
+            max_workers (int, optional): Number of concurrent requests made by embed_many.
+            client (optional): The "bedrock-runtime" client to use, defaults to the shared client.
+        """
+        self.model_id = model_id
+        self.max_workers = max_workers
+        self.__client = client if client is not None else get_bedrock_client(max_workers)
+
+    def embed(self, text: str) -> list[float]:
+        response = self.__client.invoke_model(
+            modelId=self.model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps({"inputText": text}),
+        )
+        response_body = json.loads(response["body"].read())
+        return response_body["embedding"]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        if len(texts) <= 1 or self.max_workers <= 1:
+            return [self.embed(text) for text in texts]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(texts))) as executor:
+            return list(executor.map(self.embed, texts))
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    A deterministic, offline embedder based on feature hashing.
+
+    Words and character trigrams are hashed into a fixed number of signed buckets, which
+    amounts to a sparse random projection of a bag-of-words vector. Texts sharing vocabulary
+    end up close to each other, so searches behave like a real (if weaker) embedding model
+    without any network access.
+    """
+
+    def __init__(self, dimensions: int = 1536, ngram_weight: float = 0.5) -> None:
+        """
+        Initializes a hashing embedding backend.
+
+        Args:
+            dimensions (int, optional): The length of the embedding vectors.
+            ngram_weight (float, optional): Weight of character trigrams relative to whole words.
+        """
+        self.dimensions = dimensions
+        self.ngram_weight = ngram_weight
+        self.model_id = f"hashing-{dimensions}"
+
+    def __add_feature(self, vector: list[float], feature: str, weight: float) -> None:
+        hashed = _hash_feature(feature)
+        vector[hashed % self.dimensions] += weight if (hashed >> 63) & 1 else -weight
+
+    def embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+
+        for term in tokenize(text):
+            self.__add_feature(vector, term, 1.0)
+
+            padded = f"#{term}#"
+            for i in range(len(padded) - 2):
+                self.__add_feature(vector, padded[i:i + 3], self.ngram_weight)
+
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm > 0 else vector
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed(text) for text in texts]
+
+    async def aembed_many(
+        self, texts: list[str], limiter: ConcurrencyLimiter = None  # pylint: disable=unused-argument
+    ) -> list[list[float]]:
+        # Local CPU work, so the limiter guarding remote requests is not used.
+        return await asyncio.to_thread(self.embed_many, texts)
+
+
+class SentenceTransformerEmbeddingBackend(EmbeddingBackend):
+    """
+    Embeds texts on the local CPU with a sentence-transformers model.
+
+    Requires the optional ``sentence-transformers`` package.
+    """
+
+    def __init__(
+        self, model_id: str = "sentence-transformers/all-MiniLM-L6-v2", batch_size: int = 32
+    ) -> None:
+        """
+        Initializes a local sentence-transformers embedding backend.
+
+        Args:
+            model_id (str, optional): The name or path of the sentence-transformers model.
+            batch_size (int, optional): Number of texts encoded per batch.
+        """
+        try:
+            from sentence_transformers import (  # pylint: disable=import-outside-toplevel
+                SentenceTransformer,
+            )
+        except ImportError as e:
+            raise Exception(
+                "Please install sentence-transformers to use a local embedding model."
+            ) from e
+
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.__model = SentenceTransformer(model_id, device="cpu")
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return self.__model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True
+        ).tolist()
+
+    async def aembed_many(
+        self, texts: list[str], limiter: ConcurrencyLimiter = None  # pylint: disable=unused-argument
+    ) -> list[list[float]]:
+        # The model batches the texts itself, so they are encoded in a single worker thread.
+        return await asyncio.to_thread(self.embed_many, texts)
@@ -0,0 +1,176 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from dbt_llm_tools.dbt_model import DbtModel
+from dbt_llm_tools.dbt_project import DbtProject
+from dbt_llm_tools.types import RetrievalExample, RetrievalReport
+from dbt_llm_tools.vector_store import ENGINES, SEARCH_MODES, VectorStore
+
+
+def read_examples(examples_path: str) -> list[RetrievalExample]:
+    """
+    Read labelled questions from a JSONL file.
+
+    Each line holds a JSON object with a "question", the list of "relevant" model ids and,
+    optionally, a "where" filter.
+
+    Args:
+        examples_path (str): The path of the JSONL file.
+
+    Returns:
+        list[RetrievalExample]: The labelled questions, in the order of the file.
+    """
+    examples = []
+
+    with open(examples_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            example = json.loads(line)
+
+            if not isinstance(example.get("question"), str) or not isinstance(example.get("relevant"), list):
+                raise Exception(
+                    f'Please provide a "question" and a list of "relevant" models on line {line_number}.'
+                )
+
+            examples.append(example)
+
+    return examples
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Get a percentile of a list of values with the nearest-rank method.
+
+    Args:
+        values (list[float]): The values, in any order.
+        fraction (float): The percentile as a fraction, e.g. 0.95 for p95.
+
+    Returns:
+        float: The smallest value that is greater than or equal to the given fraction of the values.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def evaluate_retrieval(
+        store: VectorStore,
+        examples: list[RetrievalExample],
+        k: int = 3,
+        mode: str = "vector",
+) -> RetrievalReport:
+    """
+    Run labelled questions through VectorStore.query_collection and score the models it returns.
+
+    Recall@k is the share of the relevant models found in the top k results, averaged over the
+    questions. MRR is the mean of the reciprocal rank of the first relevant model, 0 when none is
+    found. Latencies are measured around each query, so the store should be created with a
+    cache_size of 0 when questions repeat.
+
+    Args:
+        store (VectorStore): The store to evaluate, with the models already upserted.
+        examples (list[RetrievalExample]): The labelled questions.
+        k (int, optional): The number of results requested per question.
+        mode (str, optional): The search mode, see VectorStore.query_collection.
+
+    Returns:
+        RetrievalReport: The retrieval quality and latency over all the questions.
+    """
+    if not examples:
+        raise Exception("Please provide at least one labelled question.")
+
+    if not isinstance(k, int) or k < 1:
+        raise Exception("Please provide a positive k.")
+
+    recalls = []
+    reciprocal_ranks = []
+    latencies = []
+    missed = []
+
+    for example in examples:
+        start = time.perf_counter()
+        results = store.query_collection(example["question"], n_results=k, mode=mode, where=example.get("where"))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        result_ids = [result["id"] for result in results]
+        relevant = set(example["relevant"])
+        found = relevant.intersection(result_ids)
+
+        recalls.append(len(found) / len(relevant) if relevant else 1.0)
+        reciprocal_ranks.append(
+            next((1 / rank for rank, model_id in enumerate(result_ids, start=1) if model_id in relevant), 0.0)
+        )
+
+        if relevant and not found:
+            missed.append(example["question"])
+
+    return {
+        "examples": len(examples),
+        "k": k,
+        "mode": mode,
+        "recall_at_k": sum(recalls) / len(recalls),
+        "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "missed": missed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the retrieval of the dbt-llm-tools vector store.")
+    parser.add_argument("--project-root", required=True, help="The root folder of the dbt project.")
+    parser.add_argument("--examples", required=True, help="The JSONL file of labelled questions.")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--mode", default="vector", choices=SEARCH_MODES)
+    parser.add_argument("--engine", default="chroma", choices=ENGINES)
+    parser.add_argument("--distance-fn", default="l2", choices=("l2", "cosine", "ip"))
+    parser.add_argument("--bedrock", action="store_true", help="Embed with Bedrock instead of offline hashing.")
+    parser.add_argument("--min-recall", type=float, help="Exit with an error below this recall@k.")
+    parser.add_argument("--min-mrr", type=float, help="Exit with an error below this MRR.")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        directory = DbtProject(args.project_root, database_path=os.path.join(folder, "db.json")).parse()
+
+        store = VectorStore(
+            vector_db_path=os.path.join(folder, "vectors"),
+            test_mode=not args.bedrock,
+            cache_size=0,
+            engine=args.engine,
+            distance_fn=args.distance_fn,
+        )
+        store.upsert_models(
+            [
+                DbtModel.from_directory_entry(model)
+                for model in directory["models"].values()
+                if "documentation" in model
+            ]
+        )
+
+        report = evaluate_retrieval(store, read_examples(args.examples), k=args.k, mode=args.mode)
+    finally:
+        shutil.rmtree(folder)
+
+    print(json.dumps(report, indent=2))
+
+    if (args.min_recall is not None and report["recall_at_k"] < args.min_recall) or (
+        args.min_mrr is not None and report["mrr"] < args.min_mrr
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
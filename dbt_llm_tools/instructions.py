@@ -18,6 +18,17 @@ the following keys: name, description.
 Your response should only contain an unformatted JSON string described above and nothing else.
 """
 
+SUMMARIZE_CONVERSATION_INSTRUCTIONS = r"""You are summarizing a conversation between a user and a data analyst
+about the tables of a data warehouse, so that the conversation can continue without its earlier messages.
+
+You will be given the current summary, which may be empty, followed by the messages to add to it.
+
+Keep the questions of the user, the tables and columns that were mentioned, and any conclusion or SQL query
+that was agreed on. Leave out greetings and anything that is not needed to follow up on the conversation.
+
+Your response should only contain the new summary, as a short list of bullet points, and nothing else.
+"""
+
 ANSWER_QUESTION_INSTRUCTIONS = r"""You are a data analyst working with a data warehouse.
 You should provide the user with the information they need to answer their question.
 
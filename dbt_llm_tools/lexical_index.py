@@ -0,0 +1,241 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+TOKEN_SEARCH_EXPRESSION = r"[a-z0-9_]+"
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split a text into lowercase search terms.
+
+    Identifiers such as ``dim_customers`` are kept whole so that exact matches score highly,
+    and are also split on underscores so that ``customers`` still matches them.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The list of terms found in the text.
+    """
+    terms = []
+
+    for token in re.findall(TOKEN_SEARCH_EXPRESSION, text.lower()):
+        terms.append(token)
+
+        if "_" in token:
+            terms.extend(part for part in token.split("_") if part)
+
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """
+    Fuse several ranked lists of ids into a single ranking.
+
+    Args:
+        rankings (list[list[str]]): Lists of ids, each ordered from best to worst.
+        k (int, optional): Damping constant, higher values flatten the contribution of top ranks.
+
+    Returns:
+        list[tuple[str, float]]: Pairs of id and fused score, ordered from best to worst.
+    """
+    scores = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+class LexicalIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    A BM25 index over model documents that lives next to the vector store.
+
+    Attributes:
+        index_path (str, optional): Path of the JSON file the index is persisted to.
+            The index is kept in memory only when no path is given.
+    """
+
+    def __init__(self, index_path: str = None, k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Initializes a lexical index, loading it from disk if it was persisted before.
+
+        Args:
+            index_path (str, optional): Path of the JSON file the index is persisted to.
+            k1 (float, optional): BM25 term frequency saturation parameter.
+            b (float, optional): BM25 document length normalization parameter.
+        """
+        self.index_path = index_path
+        self.__k1 = k1
+        self.__b = b
+
+        self.__lock = threading.RLock()
+        self.__file_version = None
+        self.__term_frequencies: dict[str, dict[str, int]] = {}
+        self.__postings: dict[str, dict[str, int]] = {}
+        self.__lengths: dict[str, int] = {}
+        self.__total_length = 0
+
+        self.reload_if_changed()
+
+    def __get_file_version(self) -> tuple:
+        if self.index_path is None:
+            return None
+
+        try:
+            # Saves replace the file, so a new inode means a new version even with a coarse modification time.
+            stat = os.stat(self.index_path)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the index again when its file was changed by another index on the same path, for instance
+        a vector store in another process.
+
+        Returns:
+            bool: Whether the index was loaded again.
+        """
+        file_version = self.__get_file_version()
+
+        if file_version == self.__file_version:
+            return False
+
+        with self.__lock:
+            persisted = {}
+
+            if file_version is not None:
+                with open(self.index_path, encoding="utf-8") as f:
+                    persisted = json.load(f)
+
+            self.__term_frequencies = {}
+            self.__postings = {}
+            self.__lengths = {}
+            self.__total_length = 0
+
+            for doc_id, frequencies in persisted.get("documents", {}).items():
+                self.__add(doc_id, frequencies)
+
+            self.__file_version = file_version
+            return True
+
+    def __len__(self) -> int:
+        return len(self.__term_frequencies)
+
+    def __add(self, doc_id: str, frequencies: dict[str, int]) -> None:
+        self.__term_frequencies[doc_id] = frequencies
+        self.__lengths[doc_id] = sum(frequencies.values())
+        self.__total_length += self.__lengths[doc_id]
+
+        for term, frequency in frequencies.items():
+            self.__postings.setdefault(term, {})[doc_id] = frequency
+
+    def __remove(self, doc_id: str) -> None:
+        frequencies = self.__term_frequencies.pop(doc_id, None)
+
+        if frequencies is None:
+            return
+
+        self.__total_length -= self.__lengths.pop(doc_id)
+
+        for term in frequencies:
+            posting = self.__postings.get(term, {})
+            posting.pop(doc_id, None)
+
+            if not posting:
+                self.__postings.pop(term, None)
+
+    def save(self) -> None:
+        """
+        Persist the index to its JSON file, if it has one.
+        """
+        if self.index_path is None:
+            return
+
+        with self.__lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"documents": self.__term_frequencies}, f)
+
+            os.replace(tmp_path, self.index_path)
+            self.__file_version = self.__get_file_version()
+
+    def upsert(self, ids: list[str], documents: list[str], persist: bool = True) -> None:
+        """
+        Add or replace documents in the index. The documents added by other indexes on the same path
+        are loaded first, so that they are kept.
+
+        Args:
+            ids (list[str]): The ids of the documents.
+            documents (list[str]): The text of the documents.
+            persist (bool, optional): Whether to write the index to disk afterwards.
+        """
+        with self.__lock:
+            self.reload_if_changed()
+
+            for doc_id, document in zip(ids, documents):
+                self.__remove(doc_id)
+                self.__add(doc_id, dict(Counter(tokenize(document))))
+
+            if persist:
+                self.save()
+
+    def reset(self) -> None:
+        """
+        Remove every document from the index.
+        """
+        with self.__lock:
+            self.__term_frequencies = {}
+            self.__postings = {}
+            self.__lengths = {}
+            self.__total_length = 0
+            self.save()
+
+    def search(
+        self, query: str, n_results: int = 3, candidate_ids: list[str] = None
+    ) -> list[tuple[str, float]]:
+        """
+        Score documents against a query with BM25.
+
+        Args:
+            query (str): The query to search for.
+            n_results (int, optional): The maximum number of results to return.
+            candidate_ids (list[str], optional): Restrict the search to these documents.
+
+        Returns:
+            list[tuple[str, float]]: Pairs of document id and score, ordered from best to worst.
+        """
+        with self.__lock:
+            doc_count = len(self.__term_frequencies)
+
+            if doc_count == 0:
+                return []
+
+            average_length = self.__total_length / doc_count
+            candidates = set(candidate_ids) if candidate_ids is not None else None
+            scores: dict[str, float] = {}
+
+            for term in set(tokenize(query)):
+                posting = self.__postings.get(term)
+
+                if not posting:
+                    continue
+
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+
+                for doc_id, frequency in posting.items():
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+
+                    norm = self.__k1 * (1 - self.__b + self.__b * self.__lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.__k1 + 1) / (
+                        frequency + norm
+                    )
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:n_results]
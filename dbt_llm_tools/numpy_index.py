@@ -0,0 +1,594 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+DISTANCE_FUNCTIONS = ("l2", "cosine", "ip")
+QUANTIZATIONS = ("int8",)
+
+# Number of candidates per requested result that are re-scored at full precision when the
+# collection is searched through a compressed index.
+RESCORE_OVERSAMPLING = 10
+SCAN_CHUNK_SIZE = 4096
+PCA_SAMPLE_SIZE = 20000
+
+WHERE_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def matches_where(metadata: dict, where: dict) -> bool:
+    """
+    Check a metadata dictionary against a Chroma-style where filter.
+
+    Args:
+        metadata (dict): The metadata of a record.
+        where (dict): The filter, e.g. {"tag:finance": True} or {"$and": [...]}.
+
+    Returns:
+        bool: Whether the metadata matches the filter. Keys missing from the metadata never match.
+    """
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == "$and":
+            matched = all(matches_where(metadata, sub_where) for sub_where in condition)
+        elif key == "$or":
+            matched = any(matches_where(metadata, sub_where) for sub_where in condition)
+        elif key not in metadata:
+            matched = False
+        elif isinstance(condition, dict):
+            matched = all(
+                WHERE_OPERATORS[operator](metadata[key], operand) for operator, operand in condition.items()
+            )
+        else:
+            matched = metadata[key] == condition
+
+        if not matched:
+            return False
+
+    return True
+
+
+class NumpyCollection:  # pylint: disable=too-many-instance-attributes
+    """
+    An exact, brute-force vector collection stored as a memory-mapped NumPy array.
+
+    Embeddings are normalized to unit length and kept as float32 in ``embeddings.npy``,
+    while ids, documents and metadatas live in the ``records.json`` sidecar file.
+    The collection mirrors the subset of the Chroma collection API used by VectorStore.
+
+    A compressed scan index can be enabled through the collection metadata. Vectors are then
+    projected onto their principal components ("numpy:pca_dimensions"), optionally scalar quantized
+    to int8 with one scale per row ("numpy:quantization"), and stored in ``codes.npy``.
+    Queries scan the compressed index and re-score the best candidates against the float32
+    embeddings, which are only read for those rows.
+
+    The files are loaded again whenever another client on the same path saved the collection,
+    so several vector stores can share one folder.
+
+    Attributes:
+        name (str): The name of the collection.
+        metadata (dict): The collection metadata, "hnsw:space" selects the distance function.
+    """
+
+    def __init__(self, path: str, name: str, metadata: dict = None) -> None:
+        """
+        Initializes a collection, loading it from disk if it was persisted before.
+
+        Args:
+            path (str): The folder the collection is stored in.
+            name (str): The name of the collection.
+            metadata (dict, optional): The collection metadata, used when the collection is created.
+        """
+        self.name = name
+        self.__path = path
+        self.__records_path = os.path.join(path, "records.json")
+        self.__embeddings_path = os.path.join(path, "embeddings.npy")
+        self.__codes_path = os.path.join(path, "codes.npy")
+        self.__index_params_path = os.path.join(path, "index_params.npz")
+        self.__lock = threading.Lock()
+        self.__write_lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.isfile(self.__records_path):
+            with open(self.__records_path, encoding="utf-8") as f:
+                records = json.load(f)
+        else:
+            records = {"metadata": metadata or {}, "ids": [], "documents": [], "metadatas": []}
+
+        self.metadata = records["metadata"]
+        self.__space = self.metadata.get("hnsw:space", "l2")
+
+        if self.__space not in DISTANCE_FUNCTIONS:
+            raise Exception(
+                f"Please provide a valid distance function, one of: {', '.join(DISTANCE_FUNCTIONS)}."
+            )
+
+        self.__quantization = self.metadata.get("numpy:quantization")
+        self.__pca_dimensions = self.metadata.get("numpy:pca_dimensions")
+
+        if self.__quantization is not None and self.__quantization not in QUANTIZATIONS:
+            raise Exception(f"Please provide a valid quantization, one of: {', '.join(QUANTIZATIONS)}.")
+
+        if self.__pca_dimensions is not None and (
+            not isinstance(self.__pca_dimensions, int) or self.__pca_dimensions <= 0
+        ):
+            raise Exception("Please provide a positive number of PCA dimensions.")
+
+        # NumPy has no int8 matrix product, so the codes are cast to float32 while they are scanned. At the
+        # full embedding dimension that is slower than scanning the float32 embeddings directly.
+        if self.__quantization is not None and self.__pca_dimensions is None:
+            raise Exception("Please provide a number of PCA dimensions to quantize the embeddings.")
+
+        self.__ids: list[str] = records["ids"]
+        self.__documents: list[str] = records["documents"]
+        self.__metadatas: list[dict] = records["metadatas"]
+        self.__positions = {doc_id: i for i, doc_id in enumerate(self.__ids)}
+        self.__records_version = self.__get_records_version()
+
+        self.__embeddings = None
+        if os.path.isfile(self.__embeddings_path):
+            self.__embeddings = np.load(self.__embeddings_path, mmap_mode="r")
+
+        self.__index = None
+        if self.is_compressed() and os.path.isfile(self.__codes_path):
+            self.__index = self.__load_index()
+
+    def is_compressed(self) -> bool:
+        return self.__quantization is not None or self.__pca_dimensions is not None
+
+    def __get_records_version(self) -> tuple:
+        try:
+            # The records file is replaced last on every save, so a new version means the whole save is done.
+            stat = os.stat(self.__records_path)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def __reload_if_changed(self) -> None:
+        """
+        Load the records, embeddings and index again when another client on the same path saved the collection.
+        """
+        records_version = self.__get_records_version()
+
+        if records_version == self.__records_version:
+            return
+
+        if records_version is None:
+            # The collection was deleted by the other client.
+            records, embeddings, index = {"ids": [], "documents": [], "metadatas": []}, None, None
+        else:
+            with open(self.__records_path, encoding="utf-8") as f:
+                records = json.load(f)
+
+            embeddings = (
+                np.load(self.__embeddings_path, mmap_mode="r") if os.path.isfile(self.__embeddings_path) else None
+            )
+            index = self.__load_index() if self.is_compressed() and os.path.isfile(self.__codes_path) else None
+
+        # A save that started after the records were read may already have replaced the embeddings,
+        # the next call picks up the finished save instead.
+        if len(records["ids"]) != (0 if embeddings is None else len(embeddings)):
+            return
+
+        with self.__lock:
+            self.__ids, self.__documents, self.__metadatas = records["ids"], records["documents"], records["metadatas"]
+            self.__positions = {doc_id: i for i, doc_id in enumerate(self.__ids)}
+            self.__embeddings = embeddings
+            self.__index = index
+            self.__records_version = records_version
+
+    def __snapshot(self) -> tuple:
+        self.__reload_if_changed()
+
+        with self.__lock:
+            return (
+                self.__ids,
+                self.__documents,
+                self.__metadatas,
+                self.__positions,
+                self.__embeddings,
+                self.__index,
+            )
+
+    def __load_index(self) -> dict:
+        with np.load(self.__index_params_path) as params:
+            index = {key: params[key] for key in params.files}
+
+        index["codes"] = np.load(self.__codes_path, mmap_mode="r")
+        index["fitted_count"] = int(index["fitted_count"])
+        return index
+
+    def __save(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        embeddings: np.ndarray,
+        index: dict = None,
+    ) -> None:
+        tmp_path = os.path.join(self.__path, "embeddings.tmp.npy")
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, self.__embeddings_path)
+
+        if index is not None:
+            tmp_path = os.path.join(self.__path, "codes.tmp.npy")
+            np.save(tmp_path, index["codes"])
+            os.replace(tmp_path, self.__codes_path)
+
+            tmp_path = os.path.join(self.__path, "index_params.tmp.npz")
+            np.savez(tmp_path, **{key: value for key, value in index.items() if key != "codes"})
+            os.replace(tmp_path, self.__index_params_path)
+
+        tmp_path = f"{self.__records_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"metadata": self.metadata, "ids": ids, "documents": documents, "metadatas": metadatas},
+                f,
+            )
+        os.replace(tmp_path, self.__records_path)
+
+    @staticmethod
+    def __normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def __to_distances(self, similarities: np.ndarray) -> np.ndarray:
+        if self.__space == "l2":
+            return np.maximum(2.0 - 2.0 * similarities, 0.0)
+
+        return 1.0 - similarities
+
+    def __fit_index(self, embeddings: np.ndarray) -> dict:
+        """
+        Fit the PCA projection of the compressed index on the stored embeddings.
+        """
+        index = {
+            "fitted_count": len(embeddings),
+            "mean": np.zeros(embeddings.shape[1], dtype=np.float32),
+            "components": np.empty((0, embeddings.shape[1]), dtype=np.float32),
+        }
+
+        if self.__pca_dimensions is not None and len(embeddings) > 0:
+            sample = embeddings
+            if len(sample) > PCA_SAMPLE_SIZE:
+                rows = np.random.default_rng(0).choice(len(sample), PCA_SAMPLE_SIZE, replace=False)
+                sample = sample[np.sort(rows)]
+
+            mean = sample.mean(axis=0)
+            centered = (sample - mean).astype(np.float64)
+
+            if len(centered) <= centered.shape[1]:
+                _, _, components = np.linalg.svd(centered, full_matrices=False)
+            else:
+                _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+                components = eigenvectors[:, ::-1].T
+
+            index["mean"] = mean.astype(np.float32)
+            index["components"] = np.ascontiguousarray(components[: self.__pca_dimensions], dtype=np.float32)
+
+        return index
+
+    def __encode(self, vectors: np.ndarray, index: dict) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compress vectors with a fitted index, returning the codes and the scale of each row.
+        """
+        if self.__pca_dimensions is not None:
+            vectors = (vectors - index["mean"]) @ index["components"].T
+
+        if self.__quantization != "int8":
+            return vectors.astype(np.float32), np.ones(len(vectors), dtype=np.float32)
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def __update_index(self, embeddings: np.ndarray, changed: list[int]) -> dict:
+        """
+        Encode the changed rows, refitting the whole index once the collection has doubled in size
+        since the PCA projection was last fitted.
+        """
+        index = self.__index
+
+        if (
+            index is None
+            or (self.__pca_dimensions is not None and len(embeddings) >= 2 * index["fitted_count"])
+        ):
+            index = self.__fit_index(embeddings)
+            index["codes"], index["scales"] = self.__encode(embeddings, index)
+            return index
+
+        codes, scales = np.array(index["codes"]), np.array(index["scales"])
+        new_codes, new_scales = self.__encode(embeddings[changed], index)
+
+        existing = [i for i, position in enumerate(changed) if position < len(codes)]
+        codes[[changed[i] for i in existing]] = new_codes[existing]
+        scales[[changed[i] for i in existing]] = new_scales[existing]
+
+        appended = [i for i, position in enumerate(changed) if position >= len(codes)]
+        index = dict(index)
+        index["codes"] = np.concatenate([codes, new_codes[appended]])
+        index["scales"] = np.concatenate([scales, new_scales[appended]])
+        return index
+
+    def __scan(
+        self, queries: np.ndarray, embeddings: np.ndarray, index: dict, rows: np.ndarray, n_results: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Score the rows with the compressed index, then re-score the best candidates at full precision.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: The positions of the candidates and their distances,
+                per query and ordered from nearest to furthest.
+        """
+        codes, scales = index["codes"], index["scales"]
+        if rows is not None:
+            codes, scales = codes[rows], scales[rows]
+
+        projected = queries @ index["components"].T if self.__pca_dimensions is not None else queries
+        approximate = np.empty((len(codes), len(queries)), dtype=np.float32)
+
+        # Casting the codes in chunks keeps the scan on BLAS without a full float32 copy of the index.
+        for start in range(0, len(codes), SCAN_CHUNK_SIZE):
+            chunk = codes[start:start + SCAN_CHUNK_SIZE].astype(np.float32)
+            approximate[start:start + SCAN_CHUNK_SIZE] = chunk @ projected.T
+
+        approximate *= scales[:, None]
+        n_candidates = min(n_results * RESCORE_OVERSAMPLING, len(codes))
+
+        results = []
+        for row, query in enumerate(queries):
+            if n_candidates < len(codes):
+                candidates = np.argpartition(-approximate[:, row], n_candidates - 1)[:n_candidates]
+            else:
+                candidates = np.arange(len(codes))
+
+            positions = np.sort(candidates if rows is None else rows[candidates])
+            distances = self.__to_distances(embeddings[positions] @ query)
+
+            order = np.argsort(distances, kind="stable")[:n_results]
+            results.append((positions[order], distances[order]))
+
+        return results
+
+    def __nearest(
+        self, queries: np.ndarray, embeddings: np.ndarray, index: dict, rows: np.ndarray, n_results: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        if index is not None:
+            return self.__scan(queries, embeddings, index, rows, n_results)
+
+        candidates_matrix = embeddings if rows is None else embeddings[rows]
+        distances = self.__to_distances(queries @ candidates_matrix.T)
+
+        if n_results < distances.shape[1]:
+            top = np.argpartition(distances, n_results - 1, axis=1)[:, :n_results]
+        else:
+            top = np.tile(np.arange(distances.shape[1]), (distances.shape[0], 1))
+
+        results = []
+        for row, candidates in enumerate(top):
+            candidates = candidates[np.argsort(distances[row, candidates], kind="stable")]
+            results.append((candidates if rows is None else rows[candidates], distances[row, candidates]))
+
+        return results
+
+    def count(self) -> int:
+        return len(self.__snapshot()[0])
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        documents: list[str] = None,
+        metadatas: list[dict] = None,
+    ) -> None:
+        """
+        Add or replace records in the collection.
+
+        Args:
+            ids (list[str]): The ids of the records.
+            embeddings (list[list[float]]): The embedding of each record.
+            documents (list[str], optional): The document of each record.
+            metadatas (list[dict], optional): The metadata of each record.
+        """
+        if len(ids) == 0:
+            return
+
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        vectors = self.__normalize(embeddings)
+
+        with self.__write_lock:
+            self.__reload_if_changed()
+
+            if self.__embeddings is None:
+                stored = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            else:
+                stored = np.array(self.__embeddings)
+
+            if stored.shape[1] != vectors.shape[1]:
+                raise Exception(
+                    f"Embedding dimension {vectors.shape[1]} does not match the collection "
+                    f"dimension {stored.shape[1]}."
+                )
+
+            all_ids, all_documents = list(self.__ids), list(self.__documents)
+            all_metadatas, positions = list(self.__metadatas), dict(self.__positions)
+
+            new_rows, changed = [], []
+            for i, doc_id in enumerate(ids):
+                position = positions.get(doc_id)
+
+                if position is None:
+                    position = positions[doc_id] = len(all_ids)
+                    all_ids.append(doc_id)
+                    all_documents.append(documents[i])
+                    all_metadatas.append(metadatas[i])
+                    new_rows.append(vectors[i])
+                else:
+                    all_documents[position] = documents[i]
+                    all_metadatas[position] = metadatas[i]
+                    stored[position] = vectors[i]
+
+                changed.append(position)
+
+            if new_rows:
+                stored = np.vstack([stored, np.stack(new_rows)])
+
+            index = self.__update_index(stored, sorted(set(changed))) if self.is_compressed() else None
+
+            # Swap in the new state before rewriting the files, so that no reader holds a map of
+            # the file being replaced.
+            with self.__lock:
+                self.__ids, self.__documents, self.__metadatas = all_ids, all_documents, all_metadatas
+                self.__positions = positions
+                self.__embeddings = stored
+                self.__index = index
+
+            self.__save(all_ids, all_documents, all_metadatas, stored, index)
+
+            with self.__lock:
+                self.__records_version = self.__get_records_version()
+                self.__embeddings = np.load(self.__embeddings_path, mmap_mode="r")
+                if index is not None:
+                    self.__index = self.__load_index()
+
+    def get(
+        self,
+        ids: list[str] = None,
+        where: dict = None,
+        limit: int = None,
+        offset: int = None,
+        include: list[str] = None,
+    ) -> dict:
+        """
+        Get records from the collection, in insertion order.
+
+        Args:
+            ids (list[str], optional): The ids of the records to get. All records are returned if None.
+            where (dict, optional): A metadata filter, see matches_where.
+            limit (int, optional): The maximum number of records to return.
+            offset (int, optional): The number of matching records to skip.
+            include (list[str], optional): Any of "documents", "metadatas" and "embeddings".
+
+        Returns:
+            dict: The ids and the included fields of the records, as lists.
+        """
+        include = ["documents", "metadatas"] if include is None else include
+        all_ids, documents, metadatas, all_positions, embeddings, _ = self.__snapshot()
+
+        if ids is None:
+            positions = list(range(len(all_ids)))
+        else:
+            positions = [all_positions[doc_id] for doc_id in ids if doc_id in all_positions]
+
+        if where:
+            positions = [p for p in positions if matches_where(metadatas[p], where)]
+
+        offset = offset or 0
+        positions = positions[offset:] if limit is None else positions[offset:offset + limit]
+
+        return {
+            "ids": [all_ids[p] for p in positions],
+            "documents": [documents[p] for p in positions] if "documents" in include else None,
+            "metadatas": [metadatas[p] for p in positions] if "metadatas" in include else None,
+            "embeddings": [embeddings[p].tolist() for p in positions] if "embeddings" in include else None,
+        }
+
+    def query(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 10,
+        where: dict = None,
+        include: list[str] = None,
+    ) -> dict:
+        """
+        Find the exact nearest records to each query embedding.
+
+        Args:
+            query_embeddings (list[list[float]]): The query embeddings.
+            n_results (int, optional): The number of records to return per query.
+            where (dict, optional): A metadata filter applied before scoring, see matches_where.
+            include (list[str], optional): Any of "documents", "metadatas" and "distances".
+
+        Returns:
+            dict: The ids and the included fields of the nearest records, as one list per query.
+        """
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        ids, documents, metadatas, _, embeddings, index = self.__snapshot()
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        if where:
+            rows = np.array([p for p in range(len(ids)) if matches_where(metadatas[p], where)], dtype=np.int64)
+        else:
+            rows = None
+
+        n_results = min(n_results, len(ids) if rows is None else len(rows))
+        if n_results == 0 or len(query_embeddings) == 0:
+            for key in results:
+                results[key] = [[] for _ in query_embeddings]
+        else:
+            nearest = self.__nearest(self.__normalize(query_embeddings), embeddings, index, rows, n_results)
+
+            for order, distances in nearest:
+                results["ids"].append([ids[p] for p in order])
+                results["documents"].append([documents[p] for p in order])
+                results["metadatas"].append([metadatas[p] for p in order])
+                results["distances"].append(distances.tolist())
+
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                results[key] = None
+
+        return results
+
+
+class NumpyClient:
+    """
+    A minimal stand-in for the Chroma persistent client that manages NumPy collections.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes a client storing one folder per collection.
+
+        Args:
+            path (str): The folder the collections are stored in.
+        """
+        self.__path = path
+        self.__collections: dict[str, NumpyCollection] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def get_or_create_collection(self, name: str, metadata: dict = None) -> NumpyCollection:
+        if name not in self.__collections:
+            self.__collections[name] = NumpyCollection(os.path.join(self.__path, name), name, metadata)
+
+        return self.__collections[name]
+
+    def list_collections(self) -> list[NumpyCollection]:
+        return [
+            self.get_or_create_collection(name)
+            for name in sorted(os.listdir(self.__path))
+            if os.path.isdir(os.path.join(self.__path, name))
+        ]
+
+    def delete_collection(self, name: str) -> None:
+        self.__collections.pop(name, None)
+        shutil.rmtree(os.path.join(self.__path, name), ignore_errors=True)
@@ -0,0 +1,275 @@
+import json
+import math
+import re
+
+from dbt_llm_tools.lexical_index import TOKEN_SEARCH_EXPRESSION, tokenize
+from dbt_llm_tools.types import DbtModelDict, ParsedSearchResult, PromptPackingReport
+
+COLUMNS_HEADER = "\nThis table contains the following columns:\n"
+COLUMN_PREFIX = "\n- "
+
+# Below this many tokens, a truncated description is not worth keeping.
+MIN_TRUNCATED_TOKENS = 32
+
+# A bare or qualified star in a select list, but not count(*).
+SELECT_ALL_EXPRESSION = r"(?:^|[\s,])(?:[\w\"`]+\.)?\*(?=[\s,]|$)"
+INTERPRETATION_HEADER_KEYS = ("name", "model", "description")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without calling a tokenizer.
+
+    Uses the usual approximation of four characters per token, which slightly overestimates
+    the count of plain English and keeps packed prompts on the safe side of the budget.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def split_document(document: str) -> tuple[str, list[str]]:
+    """
+    Split a model document, as written by DbtModel.as_prompt_text, into its description and columns.
+
+    Args:
+        document (str): The model document.
+
+    Returns:
+        tuple[str, list[str]]: The description part and one line per column. Documents in another
+            format are returned whole as the description, without columns.
+    """
+    header, separator, columns = document.partition(COLUMNS_HEADER)
+
+    if not separator:
+        return document, []
+
+    return header, columns.split(COLUMN_PREFIX)[1:]
+
+
+def pack_context(
+        closest_models: list[ParsedSearchResult], query: str, token_budget: int
+) -> tuple[list[ParsedSearchResult], PromptPackingReport]:
+    """
+    Fit the documents of the closest models into a token budget.
+
+    Models are ranked by distance. The description of every model is packed first, then the
+    columns whose name or description share a term with the query, then the remaining columns,
+    each in the order of the models. A description that does not fit is truncated, or the
+    model is dropped when too little of the budget is left.
+
+    Args:
+        closest_models (list[ParsedSearchResult]): The models retrieved for the query.
+        query (str): The question asked.
+        token_budget (int): The maximum estimated number of tokens of the packed documents.
+
+    Returns:
+        tuple[list[ParsedSearchResult], PromptPackingReport]: The kept models with their packed documents,
+            ordered from closest to furthest, and a report of what was dropped or truncated.
+    """
+    ranked = sorted(closest_models, key=lambda model: model.get("distance", 0.0))
+    query_terms = set(tokenize(query))
+    remaining = token_budget
+
+    report: PromptPackingReport = {
+        "token_budget": token_budget,
+        "estimated_tokens": 0,
+        "dropped_models": [],
+        "truncated_models": [],
+        "dropped_columns": {},
+    }
+
+    packed = []
+    for model in ranked:
+        header, columns = split_document(model["document"])
+        header_tokens = estimate_tokens(header)
+
+        if header_tokens > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS:
+                report["dropped_models"].append(model["id"])
+                continue
+
+            header = header[:remaining * 4 - 3] + "..."
+            header_tokens = estimate_tokens(header)
+            report["truncated_models"].append(model["id"])
+
+        remaining -= header_tokens
+        packed.append({"model": model, "header": header, "columns": columns, "kept": set()})
+
+    columns_header_tokens = estimate_tokens(COLUMNS_HEADER)
+
+    def add_column(entry: dict, index: int) -> None:
+        nonlocal remaining
+        cost = estimate_tokens(COLUMN_PREFIX + entry["columns"][index])
+
+        if not entry["kept"]:
+            cost += columns_header_tokens
+
+        if cost <= remaining:
+            entry["kept"].add(index)
+            remaining -= cost
+
+    for entry in packed:
+        for index, column in enumerate(entry["columns"]):
+            if query_terms & set(tokenize(column)):
+                add_column(entry, index)
+
+    for entry in packed:
+        for index in range(len(entry["columns"])):
+            if index not in entry["kept"]:
+                add_column(entry, index)
+
+    packed_models = []
+    for entry in packed:
+        document = entry["header"]
+
+        if entry["kept"]:
+            document += COLUMNS_HEADER + "".join(
+                COLUMN_PREFIX + column for index, column in enumerate(entry["columns"]) if index in entry["kept"]
+            )
+
+        dropped = [column.split(":")[0] for index, column in enumerate(entry["columns"]) if index not in entry["kept"]]
+        if dropped:
+            report["dropped_columns"][entry["model"]["id"]] = dropped
+
+        packed_models.append({**entry["model"], "document": document})
+
+    report["estimated_tokens"] = token_budget - remaining
+    return packed_models, report
+
+
+def dump_compact(content) -> str:
+    """
+    Dump JSON without any whitespace, to spend as few prompt tokens as possible on the layout.
+
+    Args:
+        content: The content to dump.
+
+    Returns:
+        str: The JSON text.
+    """
+    return json.dumps(content, separators=(",", ":"))
+
+
+def referenced_columns(sql: str, columns: list[str]) -> list[str]:
+    """
+    Find the columns of an upstream model that a SQL query may use.
+
+    A column is referenced when its name appears as a whole identifier anywhere in the query, matched
+    without case. A query selecting * may use every column.
+
+    Args:
+        sql (str): The SQL of the downstream model.
+        columns (list[str]): The column names of the upstream model.
+
+    Returns:
+        list[str]: The referenced columns, in the order given.
+    """
+    if re.search(SELECT_ALL_EXPRESSION, sql, flags=re.MULTILINE):
+        return list(columns)
+
+    identifiers = set(re.findall(TOKEN_SEARCH_EXPRESSION, sql.lower()))
+    return [column for column in columns if column.lower() in identifiers]
+
+
+def minimize_ref_interpretations(
+        sql: str, ref_interpretations: dict[str, DbtModelDict], token_budget: int = None
+) -> tuple[dict[str, DbtModelDict], PromptPackingReport]:
+    """
+    Keep only the parts of the upstream interpretations that a model needs, within a token budget.
+
+    Each interpretation keeps its name and description, and only the columns the SQL references,
+    see referenced_columns. The budget counts the interpretations dumped with dump_compact. Descriptions
+    are packed first, truncated or dropped like in pack_context, then the referenced columns of each
+    model in turn, without their description when the full column does not fit.
+
+    Args:
+        sql (str): The SQL of the model being interpreted.
+        ref_interpretations (dict[str, DbtModelDict]): The interpretations of the referenced models,
+            None for the ones that are not interpreted.
+        token_budget (int, optional): The maximum estimated number of tokens of all the interpretations.
+            No limit when not given.
+
+    Returns:
+        tuple[dict[str, DbtModelDict], PromptPackingReport]: The minimized interpretations, without the
+            dropped models, and a report of what was dropped or truncated.
+    """
+    # Counted in characters, so that the estimate of the dumped interpretations is exact.
+    remaining = math.inf if token_budget is None else token_budget * 4
+
+    report: PromptPackingReport = {
+        "token_budget": token_budget,
+        "estimated_tokens": 0,
+        "dropped_models": [],
+        "truncated_models": [],
+        "dropped_columns": {},
+    }
+
+    minimized: dict[str, DbtModelDict] = {}
+    wanted: dict[str, list[dict]] = {}
+
+    for ref, interpretation in ref_interpretations.items():
+        if interpretation is None:
+            minimized[ref] = None
+            remaining -= len(dump_compact(None))
+            continue
+
+        header = {key: interpretation[key] for key in INTERPRETATION_HEADER_KEYS if key in interpretation}
+        length = len(dump_compact(header))
+
+        if length > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS * 4 or not header.get("description"):
+                report["dropped_models"].append(ref)
+                continue
+
+            description = header["description"]
+            while length > remaining and description:
+                description = description[: max(len(description) - (length - remaining) - 3, 0)]
+                header["description"] = description + "..."
+                length = len(dump_compact(header))
+
+            if length > remaining:
+                report["dropped_models"].append(ref)
+                continue
+
+            report["truncated_models"].append(ref)
+
+        remaining -= length
+        minimized[ref] = header
+
+        columns = [column for column in interpretation.get("columns", []) if "name" in column]
+        names = set(referenced_columns(sql, [column["name"] for column in columns]))
+        wanted[ref] = [column for column in columns if column["name"] in names]
+        dropped = [column["name"] for column in columns if column["name"] not in names]
+
+        if dropped:
+            report["dropped_columns"][ref] = dropped
+
+    for ref, columns in wanted.items():
+        kept = []
+
+        for column in columns:
+            # The first column also opens the "columns" list, the others add a comma.
+            separator_length = len(',"columns":[]') if not kept else 1
+
+            for candidate in (column, {"name": column["name"]}):
+                length = separator_length + len(dump_compact(candidate))
+
+                if length <= remaining:
+                    kept.append(candidate)
+                    remaining -= length
+                    break
+            else:
+                report["dropped_columns"].setdefault(ref, []).append(column["name"])
+
+        if kept:
+            minimized[ref] = {**minimized[ref], "columns": kept}
+
+    report["estimated_tokens"] = estimate_tokens(
+        "".join(dump_compact(interpretation) for interpretation in minimized.values())
+    )
+    return minimized, report
@@ -0,0 +1,416 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator
+
+from botocore.exceptions import ClientError
+
+from dbt_llm_tools.prompt_packer import estimate_tokens
+from dbt_llm_tools.types import BedrockCallRecord, BedrockUsageSummary, RateLimit
+
+INPUT_TOKENS_HEADER = "x-amzn-bedrock-input-token-count"
+OUTPUT_TOKENS_HEADER = "x-amzn-bedrock-output-token-count"
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket refilled continuously at a rate per minute.
+
+    Attributes:
+        per_minute (float): The number of tokens added per minute, which is also the capacity of the bucket.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        """
+        Initializes a full token bucket.
+
+        Args:
+            per_minute (float): The number of tokens added per minute.
+        """
+        if not isinstance(per_minute, (int, float)) or per_minute <= 0:
+            raise Exception("Please provide a positive rate per minute.")
+
+        self.per_minute = per_minute
+        self.__tokens = float(per_minute)
+        self.__refilled_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.per_minute, self.__tokens + (now - self.__refilled_at) * self.per_minute / 60)
+        self.__refilled_at = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Take tokens from the bucket, waiting until there are enough.
+
+        An amount larger than the capacity only waits for a full bucket, the bucket then goes negative
+        so that the calls after it wait for the difference.
+
+        Args:
+            amount (float, optional): The number of tokens to take.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        waited = 0.0
+
+        while True:
+            with self.__lock:
+                self.__refill()
+                needed = min(amount, self.per_minute)
+
+                if self.__tokens >= needed:
+                    self.__tokens -= amount
+                    return waited
+
+                wait = (needed - self.__tokens) * 60 / self.per_minute
+
+            time.sleep(wait)
+            waited += wait
+
+    def debit(self, amount: float) -> None:
+        """
+        Take tokens from the bucket without waiting, for usage only known once a call is done.
+
+        Args:
+            amount (float): The number of tokens to take, negative to give tokens back.
+        """
+        with self.__lock:
+            self.__refill()
+            self.__tokens = min(self.per_minute, self.__tokens - amount)
+
+
+class BedrockRateLimiter:
+    """
+    Shares the request and token quotas of each Bedrock model id between every caller of the process.
+
+    Attributes:
+        limits (dict[str, RateLimit]): The quota of each model id.
+        default_limit (RateLimit): The quota of the model ids without their own, no limit when None.
+    """
+
+    def __init__(self, limits: dict[str, RateLimit] = None, default_limit: RateLimit = None) -> None:
+        """
+        Initializes a rate limiter.
+
+        Args:
+            limits (dict[str, RateLimit], optional): The quota of each model id.
+            default_limit (RateLimit, optional): The quota of the model ids without their own.
+        """
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.__buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+        self.__lock = threading.Lock()
+
+        for limit in [*self.limits.values(), default_limit or {}]:
+            for name, value in limit.items():
+                if name not in ("requests_per_minute", "tokens_per_minute"):
+                    raise Exception(f"Please provide a valid rate limit, {name} is not one.")
+
+                if not isinstance(value, (int, float)) or value <= 0:
+                    raise Exception(f"Please provide a positive {name.replace('_', ' ')}.")
+
+    def __get_buckets(self, model_id: str) -> tuple[TokenBucket, TokenBucket]:
+        with self.__lock:
+            if model_id not in self.__buckets:
+                limit = self.limits.get(model_id, self.default_limit) or {}
+                self.__buckets[model_id] = (
+                    TokenBucket(limit["requests_per_minute"]) if "requests_per_minute" in limit else None,
+                    TokenBucket(limit["tokens_per_minute"]) if "tokens_per_minute" in limit else None,
+                )
+
+            return self.__buckets[model_id]
+
+    def acquire(self, model_id: str, tokens: int = 0) -> float:
+        """
+        Wait until a request of a model id fits into its quota.
+
+        Args:
+            model_id (str): The model id the request is sent to.
+            tokens (int, optional): The number of tokens known before the request is sent.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        requests, token_bucket = self.__get_buckets(model_id)
+        waited = 0.0
+
+        if requests is not None:
+            waited += requests.acquire(1)
+
+        if token_bucket is not None and tokens > 0:
+            waited += token_bucket.acquire(tokens)
+
+        return waited
+
+    def record_tokens(self, model_id: str, tokens: int) -> None:
+        """
+        Count tokens only known once a request is done, such as the tokens of the completion.
+
+        Args:
+            model_id (str): The model id the request was sent to.
+            tokens (int): The number of tokens, negative when acquire was given too many.
+        """
+        _, token_bucket = self.__get_buckets(model_id)
+
+        if token_bucket is not None and tokens != 0:
+            token_bucket.debit(tokens)
+
+
+class BedrockCallLedger:
+    """
+    Records every Bedrock call in a local SQLite database, to attribute cost and find hot paths.
+
+    Attributes:
+        ledger_path (str): The path of the SQLite database.
+    """
+
+    def __init__(self, ledger_path: str = ".local_storage/bedrock_ledger.db") -> None:
+        """
+        Initializes a call ledger, creating the database if needed.
+
+        Args:
+            ledger_path (str, optional): The path of the SQLite database.
+        """
+        self.ledger_path = ledger_path
+
+        if os.path.dirname(ledger_path):
+            os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(ledger_path, check_same_thread=False)
+
+        with self.__lock, self.__connection:
+            # WAL keeps each insert cheap, and lets other processes read the ledger while it is written.
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bedrock_calls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started_at REAL NOT NULL,
+                    model_id TEXT NOT NULL,
+                    operation TEXT NOT NULL,
+                    input_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    wait_ms REAL NOT NULL,
+                    retries INTEGER NOT NULL,
+                    error TEXT
+                )
+                """
+            )
+
+    def record(self, call: BedrockCallRecord) -> None:
+        """
+        Add a call to the ledger.
+
+        Args:
+            call (BedrockCallRecord): The call to add.
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                """
+                INSERT INTO bedrock_calls (
+                    started_at, model_id, operation, input_tokens, output_tokens, latency_ms, wait_ms, retries, error
+                ) VALUES (
+                    :started_at, :model_id, :operation, :input_tokens, :output_tokens, :latency_ms, :wait_ms, :retries,
+                    :error
+                )
+                """,
+                call,
+            )
+
+    def get_calls(self, since: float = None) -> list[BedrockCallRecord]:
+        """
+        Get the calls of the ledger, oldest first.
+
+        Args:
+            since (float, optional): Only get the calls started at or after this Unix time.
+
+        Returns:
+            list[BedrockCallRecord]: The calls.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                """
+                SELECT started_at, model_id, operation, input_tokens, output_tokens, latency_ms, wait_ms, retries, error
+                FROM bedrock_calls WHERE started_at >= ? ORDER BY id
+                """,
+                (since or 0,),
+            ).fetchall()
+
+        return [dict(zip(BedrockCallRecord.__annotations__, row)) for row in rows]
+
+    def summarize(self, since: float = None) -> list[BedrockUsageSummary]:
+        """
+        Sum up the calls of the ledger per model id and operation.
+
+        Args:
+            since (float, optional): Only count the calls started at or after this Unix time.
+
+        Returns:
+            list[BedrockUsageSummary]: One summary per model id and operation, the most used tokens first.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                """
+                SELECT model_id, operation, COUNT(*), COUNT(error), SUM(retries), SUM(input_tokens),
+                    SUM(output_tokens), AVG(latency_ms), MAX(latency_ms), SUM(wait_ms)
+                FROM bedrock_calls WHERE started_at >= ?
+                GROUP BY model_id, operation
+                ORDER BY SUM(input_tokens) + SUM(output_tokens) DESC
+                """,
+                (since or 0,),
+            ).fetchall()
+
+        return [dict(zip(BedrockUsageSummary.__annotations__, row)) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the connection to the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+class RateLimitedBedrockClient:
+    """
+    Wraps a "bedrock-runtime" client so that its calls wait for the quota of their model id and are
+    recorded in a ledger.
+
+    Input tokens are taken from the quota before a call, estimated from the request body, and the
+    output tokens once the response is read, using the token counts Bedrock returns when it does.
+    Retries are the ones botocore made for the call. Other methods are passed through to the client.
+    """
+
+    def __init__(self, client, limiter: BedrockRateLimiter = None, ledger: BedrockCallLedger = None) -> None:
+        """
+        Initializes a rate limited client.
+
+        Args:
+            client: The "bedrock-runtime" client to wrap.
+            limiter (BedrockRateLimiter, optional): The quotas to wait for, no limit when not given.
+            ledger (BedrockCallLedger, optional): The ledger to record the calls in.
+        """
+        self.client = client
+        self.limiter = limiter
+        self.ledger = ledger
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def __start(self, model_id: str, operation: str, body: str) -> dict:
+        input_tokens = estimate_tokens(body if isinstance(body, str) else body.decode("utf-8"))
+        waited = self.limiter.acquire(model_id, input_tokens) if self.limiter is not None else 0.0
+
+        return {
+            "model_id": model_id,
+            "operation": operation,
+            "input_tokens": input_tokens,
+            "waited": waited,
+            "started_at": time.time(),
+            "start": time.perf_counter(),
+        }
+
+    def __finish(self, call: dict, response: dict, completion: str = "", error: str = None) -> None:
+        metadata = (response or {}).get("ResponseMetadata", {})
+        headers = metadata.get("HTTPHeaders", {})
+        input_tokens = int(headers.get(INPUT_TOKENS_HEADER, call["input_tokens"]))
+        output_tokens = int(headers.get(OUTPUT_TOKENS_HEADER, estimate_tokens(completion)))
+
+        if self.limiter is not None:
+            # The estimated input tokens were taken before the call, only the difference is left to count.
+            self.limiter.record_tokens(call["model_id"], input_tokens - call["input_tokens"] + output_tokens)
+
+        if self.ledger is not None:
+            self.ledger.record(
+                {
+                    "started_at": call["started_at"],
+                    "model_id": call["model_id"],
+                    "operation": call["operation"],
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "latency_ms": (time.perf_counter() - call["start"]) * 1000,
+                    "wait_ms": call["waited"] * 1000,
+                    "retries": metadata.get("RetryAttempts", 0),
+                    "error": error,
+                }
+            )
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:  # pylint: disable=invalid-name
+        """
+        Call InvokeModel once the quota of the model id allows it.
+
+        Args:
+            modelId (str): The model to invoke.
+            body (str): The JSON body of the request.
+            **kwargs: The other arguments of InvokeModel.
+
+        Returns:
+            dict: The response, with the body already read into a new readable "body".
+        """
+        call = self.__start(modelId, "InvokeModel", body)
+
+        try:
+            response = self.client.invoke_model(modelId=modelId, body=body, **kwargs)
+            content = response["body"].read()
+        except Exception as e:
+            self.__finish(call, e.response if isinstance(e, ClientError) else None, error=str(e))
+            raise
+
+        try:
+            completion = json.loads(content).get("completion") or ""
+        except (ValueError, AttributeError):
+            completion = ""
+
+        self.__finish(call, response, completion)
+        return {**response, "body": io.BytesIO(content)}
+
+    def invoke_model_with_response_stream(
+            self, modelId: str, body: str, **kwargs  # pylint: disable=invalid-name
+    ) -> dict:
+        """
+        Call InvokeModelWithResponseStream once the quota of the model id allows it. The call is recorded
+        when the stream is fully read.
+
+        Args:
+            modelId (str): The model to invoke.
+            body (str): The JSON body of the request.
+            **kwargs: The other arguments of InvokeModelWithResponseStream.
+
+        Returns:
+            dict: The response, with the chunk events in an iterable "body".
+        """
+        call = self.__start(modelId, "InvokeModelWithResponseStream", body)
+
+        try:
+            response = self.client.invoke_model_with_response_stream(modelId=modelId, body=body, **kwargs)
+        except Exception as e:
+            self.__finish(call, e.response if isinstance(e, ClientError) else None, error=str(e))
+            raise
+
+        return {**response, "body": self.__stream(call, response)}
+
+    def __stream(self, call: dict, response: dict) -> Iterator[dict]:
+        chunks = []
+        error = None
+
+        try:
+            for event in response["body"]:
+                if "chunk" in event:
+                    try:
+                        chunks.append(json.loads(event["chunk"]["bytes"]).get("completion") or "")
+                    except (ValueError, AttributeError):
+                        pass
+
+                yield event
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.__finish(call, response, "".join(chunks), error)
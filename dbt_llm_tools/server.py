@@ -0,0 +1,339 @@
+import argparse
+import itertools
+import json
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dbt_llm_tools.chatbot import Chatbot
+
+LATENCY_WINDOW = 1000
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ServerMetrics:
+    """
+    Thread-safe request counters and latency percentiles per endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.__started_at = time.monotonic()
+        self.__lock = threading.Lock()
+        self.__requests: dict[str, int] = {}
+        self.__errors: dict[str, int] = {}
+        self.__latencies: dict[str, deque] = {}
+
+    def record(self, endpoint: str, seconds: float, failed: bool) -> None:
+        """
+        Record a handled request.
+
+        Args:
+            endpoint (str): The path of the endpoint.
+            seconds (float): The time it took to handle the request.
+            failed (bool): Whether the request failed.
+        """
+        with self.__lock:
+            self.__requests[endpoint] = self.__requests.get(endpoint, 0) + 1
+            self.__errors[endpoint] = self.__errors.get(endpoint, 0) + int(failed)
+            self.__latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        """
+        Get the current counters.
+
+        Returns:
+            dict: The uptime and, per endpoint, the number of requests and errors and the p50 and p95
+                latencies in milliseconds over the last requests.
+        """
+        with self.__lock:
+            endpoints = {}
+
+            for endpoint, count in self.__requests.items():
+                latencies = sorted(self.__latencies[endpoint])
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "errors": self.__errors[endpoint],
+                    "p50_ms": statistics.median(latencies),
+                    "p95_ms": latencies[int(len(latencies) * 0.95)],
+                }
+
+            return {"uptime_seconds": time.monotonic() - self.__started_at, "endpoints": endpoints}
+
+
+class DbtLlmServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server sharing one warm Chatbot, and with it one vector store and one set of
+    Bedrock clients, between all requests.
+
+    Attributes:
+        chatbot (Chatbot): The chatbot answering the requests.
+        metrics (ServerMetrics): The request counters reported by the /metrics endpoint.
+        verbose (bool): Whether to log every request to stderr.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, chatbot: Chatbot, host: str = "127.0.0.1", port: int = 8000, verbose: bool = False) -> None:
+        """
+        Initializes the server and binds it to its address.
+
+        Args:
+            chatbot (Chatbot): The chatbot answering the requests.
+            host (str, optional): The host to listen on.
+            port (int, optional): The port to listen on, 0 picks a free port.
+            verbose (bool, optional): Whether to log every request to stderr.
+        """
+        super().__init__((host, port), RequestHandler)
+        self.chatbot = chatbot
+        self.metrics = ServerMetrics()
+        self.verbose = verbose
+        self.__reindex_lock = threading.Lock()
+        self.__reindex_future: Future = None
+
+    def start_reindex(self, body: dict) -> bool:
+        """
+        Start rebuilding the vector store in the background, unless a rebuild is already running.
+
+        Args:
+            body (dict): Optional "models", "included_folders" and "excluded_folders" lists.
+
+        Returns:
+            bool: Whether a new rebuild was started.
+        """
+        with self.__reindex_lock:
+            if self.__reindex_future is not None and not self.__reindex_future.done():
+                return False
+
+            self.__reindex_future = self.chatbot.reindex_models(
+                models=body.get("models"),
+                included_folders=body.get("included_folders"),
+                excluded_folders=body.get("excluded_folders"),
+                background=True,
+            )
+            return True
+
+    def get_reindex_status(self) -> str:
+        with self.__reindex_lock:
+            if self.__reindex_future is None:
+                return "idle"
+
+            if not self.__reindex_future.done():
+                return "running"
+
+            return "failed" if self.__reindex_future.exception() is not None else "done"
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the JSON endpoints of DbtLlmServer.
+
+    GET /health, GET /metrics and GET /models?limit=&offset=&include=&ids= read the state of the
+    server, POST /ask, POST /search and POST /reindex take a JSON body.
+    """
+
+    server: DbtLlmServer
+    protocol_version = "HTTP/1.1"
+    streaming = False
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self.__dispatch({"/health": self.__health, "/metrics": self.__metrics, "/models": self.__models})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        self.__dispatch({"/ask": self.__ask, "/search": self.__search, "/reindex": self.__reindex})
+
+    def log_message(self, format: str, *args) -> None:  # pylint: disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def __dispatch(self, routes: dict) -> None:
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        route = routes.get(url.path)
+        failed = True
+
+        try:
+            if route is None:
+                self.__skip_body()
+                self.__send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {url.path}."})
+                return
+
+            route(parse_qs(url.query))
+            failed = False
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if self.streaming:
+                # The status line is already sent, so the client sees a truncated stream instead.
+                self.close_connection = True
+            elif type(e) is Exception or isinstance(e, (KeyError, ValueError)):  # pylint: disable=unidiomatic-typecheck
+                # Invalid input is reported with a plain Exception across the package.
+                self.__send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            else:
+                self.__send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+        finally:
+            self.server.metrics.record(url.path if route else "unknown", time.perf_counter() - start, failed)
+
+    def __read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+
+        if length > MAX_BODY_BYTES:
+            # The body is left unread, so the connection cannot be used for another request.
+            self.close_connection = True
+            raise Exception("Please provide a request body smaller than 1 MB.")
+
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not isinstance(body, dict):
+            raise Exception("Please provide a JSON object as the request body.")
+
+        return body
+
+    def __skip_body(self) -> None:
+        """
+        Read and discard the body of a request that is not handled, so that the next request on a kept
+        alive connection is not parsed from it.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+        else:
+            self.rfile.read(length)
+
+    def __send_json(self, status: HTTPStatus, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __health(self, _: dict) -> None:
+        self.__send_json(
+            HTTPStatus.OK,
+            {
+                "status": "ok",
+                "models": self.server.chatbot.store.count_models(),
+                "reindex": self.server.get_reindex_status(),
+            },
+        )
+
+    def __metrics(self, _: dict) -> None:
+        self.__send_json(
+            HTTPStatus.OK,
+            {**self.server.metrics.snapshot(), "caches": self.server.chatbot.get_cache_stats()},
+        )
+
+    def __models(self, query: dict) -> None:
+        store = self.server.chatbot.store
+        include = query["include"][0].split(",") if query.get("include", [""])[0] else []
+
+        models = store.get_models(
+            model_ids=query["ids"][0].split(",") if "ids" in query else None,
+            limit=int(query["limit"][0]) if "limit" in query else 100,
+            offset=int(query.get("offset", ["0"])[0]),
+            include=include,
+        )
+
+        self.__send_json(HTTPStatus.OK, {"count": store.count_models(), "models": models})
+
+    def __search(self, _: dict) -> None:
+        body = self.__read_json()
+        queries = body["queries"] if "queries" in body else [body.get("query")]
+
+        results = self.server.chatbot.store.query_collection_many(
+            queries,
+            n_results=body.get("n_results", 3),
+            mode=body.get("mode", "vector"),
+            where=body.get("where"),
+        )
+
+        self.__send_json(HTTPStatus.OK, {"results": results if "queries" in body else results[0]})
+
+    def __ask(self, _: dict) -> None:
+        body = self.__read_json()
+        chatbot = self.server.chatbot
+
+        if not isinstance(body.get("query"), str) or body["query"] == "":
+            raise Exception("Please provide a valid query.")
+
+        if body.get("get_model_names_only"):
+            closest_models = chatbot.store.query_collection(
+                body["query"], mode=body.get("search_mode", "vector"), where=body.get("where")
+            )
+            self.__send_json(HTTPStatus.OK, {"models": [model["id"] for model in closest_models]})
+            return
+
+        chunks = chatbot.ask_question_stream(
+            body["query"], search_mode=body.get("search_mode", "vector"), where=body.get("where")
+        )
+
+        if not body.get("stream"):
+            self.__send_json(HTTPStatus.OK, {"answer": "".join(chunks)})
+            return
+
+        # Retrieval errors are raised before the first chunk, while a JSON error can still be sent.
+        first_chunk = next(chunks, "")
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.streaming = True
+
+        for chunk in itertools.chain([first_chunk], chunks):
+            if chunk:
+                data = chunk.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self.wfile.write(b"0\r\n\r\n")
+        self.streaming = False
+
+    def __reindex(self, _: dict) -> None:
+        if self.server.start_reindex(self.__read_json()):
+            self.__send_json(HTTPStatus.ACCEPTED, {"status": "running"})
+        else:
+            self.__send_json(HTTPStatus.CONFLICT, {"error": "A reindex is already running.", "status": "running"})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the dbt-llm-tools chatbot over HTTP.")
+    parser.add_argument("--project-root", required=True, help="The root folder of the dbt project.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--database-path", default=".local_storage/db.json")
+    parser.add_argument("--vector-db-path", default=".local_storage/chroma.db")
+    parser.add_argument("--bedrock-model-id", default="anthropic.claude-v2")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--verbose", action="store_true", help="Log every request to stderr.")
+    args = parser.parse_args()
+
+    chatbot = Chatbot(
+        args.project_root,
+        bedrock_model_id=args.bedrock_model_id,
+        database_path=args.database_path,
+        vector_db_path=args.vector_db_path,
+        max_concurrency=args.max_concurrency,
+    )
+
+    server = DbtLlmServer(chatbot, host=args.host, port=args.port, verbose=args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
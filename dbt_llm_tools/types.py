@@ -39,6 +39,7 @@ class DbtModelDirectoryEntry(TypedDict):
     sql_contents: str
     documentation: DbtModelDict
     interpretation: DbtModelDict
+    interpretation_key: NotRequired[str]
 
 
 class DbtProjectDirectory(TypedDict):
@@ -68,3 +69,155 @@ class ParsedSearchResult(TypedDict):
     document: str
     metadata: dict
     distance: float
+
+
+class StoredModel(TypedDict):
+    """
+    Type for a dictionary representing a model listed from the vector store
+    """
+
+    id: str
+    document: NotRequired[str]
+    metadata: NotRequired[dict]
+
+
+class CacheStats(TypedDict):
+    """
+    Type for a dictionary representing the hit and miss counters of a cache
+    """
+
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    hit_rate: float
+
+
+class PromptPackingReport(TypedDict):
+    """
+    Type for a dictionary describing what was left out when the context was packed into a prompt
+    """
+
+    token_budget: int
+    estimated_tokens: int
+    dropped_models: list[str]
+    truncated_models: list[str]
+    dropped_columns: dict[str, list[str]]
+
+
+class AnswerTrace(TypedDict):
+    """
+    Type for a dictionary representing an answer along with the models it was based on and the time of each stage
+    """
+
+    answer: str
+    model_ids: list[str]
+    cached: bool
+    latencies: dict[str, float]
+    prompt_report: Union[PromptPackingReport, None]
+
+
+class RetrievalExample(TypedDict):
+    """
+    Type for a dictionary representing a question labelled with the models that answer it
+    """
+
+    question: str
+    relevant: list[str]
+    where: NotRequired[dict]
+
+
+class RetrievalReport(TypedDict):
+    """
+    Type for a dictionary representing the retrieval quality and latency over a set of labelled questions
+    """
+
+    examples: int
+    k: int
+    mode: str
+    recall_at_k: float
+    mrr: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    missed: list[str]
+
+
+class DocumentationRunReport(TypedDict):
+    """
+    Type for a dictionary representing the outcome of generating documentation for several models
+    """
+
+    interpreted: list[str]
+    reused: list[str]
+    failed: dict[str, str]
+    blocked: list[str]
+
+
+class DocumentationProgress(TypedDict):
+    """
+    Type for a dictionary representing the progress of a documentation run after a model finished
+    """
+
+    model: str
+    status: str
+    finished: int
+    total: int
+    failed: int
+    blocked: int
+    elapsed_seconds: float
+    models_per_second: float
+    eta_seconds: Union[float, None]
+
+
+class BatchSummary(TypedDict):
+    """
+    Type for a dictionary summarizing a batch of questions answered from a JSONL file
+    """
+
+    questions: int
+    failed: int
+    seconds: float
+    questions_per_second: float
+
+
+class RateLimit(TypedDict):
+    """
+    Type for a dictionary representing the Bedrock quota of a model id, per minute
+    """
+
+    requests_per_minute: NotRequired[float]
+    tokens_per_minute: NotRequired[float]
+
+
+class BedrockCallRecord(TypedDict):
+    """
+    Type for a dictionary representing one Bedrock call in the call ledger
+    """
+
+    started_at: float
+    model_id: str
+    operation: str
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    wait_ms: float
+    retries: int
+    error: Union[str, None]
+
+
+class BedrockUsageSummary(TypedDict):
+    """
+    Type for a dictionary summarizing the Bedrock calls made for a model id and operation
+    """
+
+    model_id: str
+    operation: str
+    calls: int
+    errors: int
+    retries: int
+    input_tokens: int
+    output_tokens: int
+    avg_latency_ms: float
+    max_latency_ms: float
+    total_wait_ms: float
@@ -1,106 +1,690 @@
+import asyncio
+import contextlib
 import os
 import json
-import boto3
-import chromadb
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Union
 
+from dbt_llm_tools.cache import LRUCache
+from dbt_llm_tools.concurrency import ConcurrencyLimiter
 from dbt_llm_tools.dbt_model import DbtModel
-from dbt_llm_tools.types import ParsedSearchResult
+from dbt_llm_tools.embeddings import (
+    BedrockEmbeddingBackend,
+    EmbeddingBackend,
+    HashingEmbeddingBackend,
+)
+from dbt_llm_tools.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from dbt_llm_tools.numpy_index import NumpyClient, NumpyCollection
+from dbt_llm_tools.types import CacheStats, ParsedSearchResult, StoredModel
 
+if TYPE_CHECKING:
+    import chromadb
 
-class VectorStore:
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+LISTING_FIELDS = ("documents", "metadatas")
+ENGINES = ("chroma", "numpy")
+
+COLLECTION_NAME = "model_documentation"
+POINTER_FILE = "active_collection.json"
+UPSERT_BATCH_SIZE = 500
+
+# Chroma batches its telemetry events in a dict that is not thread safe, and clients opened on the
+# same path share it, so every Chroma call in the process goes through this lock.
+CHROMA_LOCK = threading.RLock()
+
+
+class VectorStore:  # pylint: disable=too-many-instance-attributes
     def __init__(
             self,
             bedrock_model_id: str = "amazon.titan-embed-text-v1",
             vector_db_path: str = ".local_storage/chroma.db",
             test_mode: bool = False,
+            cache_size: int = 256,
+            cache_ttl: float = 3600.0,
+            max_embedding_workers: int = 8,
+            embedding_backend: EmbeddingBackend = None,
+            engine: str = "chroma",
+            distance_fn: str = "l2",
+            quantization: str = None,
+            pca_dimensions: int = None,
+            limiter: ConcurrencyLimiter = None,
+            bedrock_client=None,
     ) -> None:
+        """
+        Initializes a vector store backed by a persistent Chroma database or an exact NumPy index.
+
+        Args:
+            bedrock_model_id (str, optional): The Bedrock embedding model, used when no backend is given.
+            vector_db_path (str, optional): The folder the database is persisted to.
+            test_mode (bool, optional): Embed with the offline HashingEmbeddingBackend instead of Bedrock.
+            cache_size (int, optional): Number of query embeddings and search results kept in memory.
+            cache_ttl (float, optional): Number of seconds cached entries stay valid.
+            max_embedding_workers (int, optional): Number of concurrent Bedrock embedding requests.
+            embedding_backend (EmbeddingBackend, optional): The backend used to embed documents and queries.
+                All documents in a collection must be embedded with the same backend.
+            engine (str, optional): "chroma" for a Chroma HNSW index, or "numpy" for an exact brute-force
+                index kept in a memory-mapped file, which starts faster and suits up to ~50k models.
+            distance_fn (str, optional): One of "l2", "cosine" or "ip", used when the collection is created.
+            quantization (str, optional): "int8" to scan a scalar quantized copy of the PCA reduced embeddings.
+                Requires pca_dimensions. Only supported by the numpy engine, used when the collection is created.
+            pca_dimensions (int, optional): Number of principal components the scanned embeddings are
+                reduced to. Only supported by the numpy engine, used when the collection is created.
+                The best candidates are always re-scored with the full precision embeddings.
+            limiter (ConcurrencyLimiter, optional): Bounds the embedding requests made by the async methods.
+                Defaults to a limiter of max_embedding_workers requests.
+            bedrock_client (optional): The "bedrock-runtime" client used to embed, defaults to the shared client.
+        """
         if not isinstance(vector_db_path, str) or vector_db_path == "":
             raise Exception("Please provide a valid path for the persistent database.")
 
+        if engine not in ENGINES:
+            raise Exception(f"Please provide a valid engine, one of: {', '.join(ENGINES)}.")
+
+        if engine != "numpy" and (quantization is not None or pca_dimensions is not None):
+            raise Exception("Please use the numpy engine to store quantized or PCA reduced embeddings.")
+
         os.makedirs(vector_db_path, exist_ok=True)
-        self.__client = chromadb.PersistentClient(vector_db_path)
-        self.__collection_name = "model_documentation"
-
-        self.__bedrock_client = boto3.client(service_name="bedrock-runtime")
-        self.__bedrock_model_id = bedrock_model_id
-        self.__test_mode = test_mode
-
-        self.__collection = self.__create_collection()
-
-    def __embed_text(self, text: str):
-        if self.__test_mode:
-            return [0.0] * 1536  # Dummy vector for testing
-
-        response = self.__bedrock_client.invoke_model(
-            modelId=self.__bedrock_model_id,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({"inputText": text}),
-        )
-        response_body = json.loads(response["body"].read())
-        return response_body["embedding"]
-
-    def __create_collection(self, distance_fn: str = "l2") -> chromadb.Collection:
-        return self.__client.get_or_create_collection(
-            name=self.__collection_name,
-            metadata={"hnsw:space": distance_fn},
-        )
-
-    def get_client(self) -> chromadb.PersistentClient:
-        return self.__client
 
-    def upsert_models(self, models: list[DbtModel]) -> None:
-        documents = []
-        metadatas = []
-        ids = []
+        if engine == "chroma":
+            import chromadb  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+            self.__client = chromadb.PersistentClient(vector_db_path)
+            self.__collection_lock = CHROMA_LOCK
+        else:
+            self.__client = NumpyClient(os.path.join(vector_db_path, "numpy"))
+            # The NumPy collections lock themselves, and concurrent scans are safe.
+            self.__collection_lock = contextlib.nullcontext()
+
+        self.__vector_db_path = vector_db_path
+        self.__collection_metadata = {"hnsw:space": distance_fn}
+
+        if quantization is not None:
+            self.__collection_metadata["numpy:quantization"] = quantization
+
+        if pca_dimensions is not None:
+            self.__collection_metadata["numpy:pca_dimensions"] = pca_dimensions
+
+        if embedding_backend is None and test_mode:
+            embedding_backend = HashingEmbeddingBackend()
+        elif embedding_backend is None:
+            embedding_backend = BedrockEmbeddingBackend(
+                bedrock_model_id, max_workers=max_embedding_workers, client=bedrock_client
+            )
+
+        self.__embedding_backend = embedding_backend
+        self.__limiter = limiter or ConcurrencyLimiter(max_embedding_workers)
+
+        self.__embedding_cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self.__result_cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+
+        self.__swap_lock = threading.Lock()
+        self.__reindex_lock = threading.Lock()
+        self.__reindex_executor = None
+        self.__pointer_version = None
+        self.__active_state = None
+        self.__get_active()
+
+    def __open_collection(self, name: str) -> tuple:
+        lexical_index = LexicalIndex(os.path.join(self.__vector_db_path, f"{name}.lexical.json"))
+
+        with self.__collection_lock:
+            collection = self.__client.get_or_create_collection(
+                name=name,
+                metadata=self.__collection_metadata,
+            )
+            stored = collection.get(include=["documents"]) if len(lexical_index) == 0 else None
+
+        if stored is not None and stored["ids"]:
+            lexical_index.upsert(stored["ids"], stored["documents"])
+
+        return name, collection, lexical_index
+
+    def __get_active(self) -> tuple:
+        """
+        Get the name, collection and lexical index that readers should use, switching over
+        when another reindex has moved the pointer since the last call, and reloading the lexical
+        index when another store changed it.
+        """
+        pointer_path = os.path.join(self.__vector_db_path, POINTER_FILE)
+
+        try:
+            # The pointer is replaced rather than rewritten, so a new inode means a new swap even
+            # on filesystems with a coarse modification time.
+            stat = os.stat(pointer_path)
+            pointer_version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pointer_version = None
+
+        if self.__active_state is not None and pointer_version == self.__pointer_version:
+            # Another store on the same path may have upserted models since the last call.
+            if self.__active_state[2].reload_if_changed():
+                self.__result_cache.clear()
+
+            return self.__active_state
+
+        with self.__swap_lock:
+            name = COLLECTION_NAME
+            if pointer_version is not None:
+                with open(pointer_path, encoding="utf-8") as f:
+                    name = json.load(f)["collection"]
+
+            if self.__active_state is None or self.__active_state[0] != name:
+                self.__active_state = self.__open_collection(name)
+                self.__result_cache.clear()
+
+            self.__pointer_version = pointer_version
+            return self.__active_state
+
+    def __write_pointer(self, name: str) -> None:
+        pointer_path = os.path.join(self.__vector_db_path, POINTER_FILE)
+        tmp_path = f"{pointer_path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"collection": name}, f)
+
+        os.replace(tmp_path, pointer_path)
+
+    def __list_versions(self) -> list[tuple[int, str]]:
+        versions = []
+
+        with self.__collection_lock:
+            collections = self.__client.list_collections()
+
+        for collection in collections:
+            if collection.name == COLLECTION_NAME:
+                versions.append((0, collection.name))
+            elif match := re.fullmatch(rf"{COLLECTION_NAME}_v(\d+)", collection.name):
+                versions.append((int(match.group(1)), collection.name))
+
+        return sorted(versions)
+
+    def __delete_collection(self, name: str) -> None:
+        with self.__collection_lock:
+            self.__client.delete_collection(name)
 
+        lexical_path = os.path.join(self.__vector_db_path, f"{name}.lexical.json")
+        if os.path.isfile(lexical_path):
+            os.remove(lexical_path)
+
+    def __embed_queries(self, queries: list[str]) -> list[list[float]]:
+        keys = [(self.__embedding_backend.model_id, query) for query in queries]
+        embeddings = [self.__embedding_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            computed = self.__embedding_backend.embed_many([queries[i] for i in missing])
+
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                self.__embedding_cache.set(keys[i], embedding)
+
+        return embeddings
+
+    async def __aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        keys = [(self.__embedding_backend.model_id, query) for query in queries]
+        embeddings = [self.__embedding_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            computed = await self.__embedding_backend.aembed_many(
+                [queries[i] for i in missing], self.__limiter
+            )
+
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                self.__embedding_cache.set(keys[i], embedding)
+
+        return embeddings
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embed a query with the collection's embedding backend, through the query embedding cache.
+
+        Args:
+            query (str): The query to embed.
+
+        Returns:
+            list[float]: The embedding of the query.
+        """
+        return self.__embed_queries([" ".join(query.split())])[0]
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """
+        Embed a query without blocking the event loop, see embed_query.
+
+        Args:
+            query (str): The query to embed.
+
+        Returns:
+            list[float]: The embedding of the query.
+        """
+        return (await self.__aembed_queries([" ".join(query.split())]))[0]
+
+    def get_embedding_backend(self) -> EmbeddingBackend:
+        return self.__embedding_backend
+
+    def get_collection(self) -> Union["chromadb.Collection", NumpyCollection]:
+        return self.__get_active()[1]
+
+    def get_client(self) -> Union["chromadb.ClientAPI", NumpyClient]:
+        return self.__client
+
+    def __write_models(self, collection, lexical_index: LexicalIndex, models: list[DbtModel]) -> None:
         for model in models:
             if not isinstance(model, DbtModel):
                 raise Exception("Please provide a list of valid dbt model objects.")
 
-            model_text = model.as_prompt_text()
-            embedding = self.__embed_text(model_text)
+        # A NumPy collection and the lexical index rewrite their files on every write, so they are written
+        # once with every batch. Chroma collections are written batch by batch.
+        written = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
 
-            documents.append(model_text)
-            metadatas.append({"tags": json.dumps(model.tags), "embedding": embedding})
-            ids.append(model.name)
+        for start in range(0, len(models), UPSERT_BATCH_SIZE):
+            batch = models[start:start + UPSERT_BATCH_SIZE]
 
-        return self.__collection.upsert(documents=documents, metadatas=metadatas, ids=ids)
+            documents = [model.as_prompt_text() for model in batch]
+            metadatas = [model.as_metadata() for model in batch]
+            ids = [model.name for model in batch]
 
-    def get_models(self, model_ids: list[str] = None) -> list[DbtModel]:
-        models = []
-        raw_models = self.__collection.get(ids=model_ids)
+            embeddings = self.__embedding_backend.embed_many(documents)
+            written["ids"].extend(ids)
+            written["documents"].extend(documents)
+
+            if isinstance(collection, NumpyCollection):
+                written["metadatas"].extend(metadatas)
+                written["embeddings"].extend(embeddings)
+            else:
+                with self.__collection_lock:
+                    collection.upsert(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
+
+        if isinstance(collection, NumpyCollection):
+            collection.upsert(**written)
+
+        lexical_index.upsert(written["ids"], written["documents"])
+
+    def upsert_models(self, models: list[DbtModel]) -> None:
+        _, collection, lexical_index = self.__get_active()
+        self.__write_models(collection, lexical_index, models)
+        self.__result_cache.clear()
+
+    def reindex(
+            self, models: list[DbtModel], background: bool = False, keep_versions: int = 1
+    ) -> Union[Future, None]:
+        """
+        Rebuild the collection from scratch without interrupting readers.
+
+        The models are written to a new versioned collection. Once it is complete, a pointer file
+        is swapped atomically and every VectorStore on the same path switches over on its next query.
+        Until then, queries keep being answered from the current collection. Models upserted into the
+        current collection while the reindex runs are not carried over.
+
+        Args:
+            models (list[DbtModel]): The full list of models to index.
+            background (bool, optional): Build the new collection in a background thread.
+            keep_versions (int, optional): Number of previous versions kept for readers that have not
+                switched yet. Older versions are deleted.
+
+        Returns:
+            Future: A future that completes when the swap is done if background is True, otherwise None.
+        """
+        if not isinstance(models, list) or any(not isinstance(model, DbtModel) for model in models):
+            raise Exception("Please provide a list of valid dbt model objects.")
+
+        if not background:
+            self.__build_and_swap(models, keep_versions)
+            return None
+
+        if self.__reindex_executor is None:
+            self.__reindex_executor = ThreadPoolExecutor(max_workers=1)
+
+        return self.__reindex_executor.submit(self.__build_and_swap, models, keep_versions)
+
+    def __build_and_swap(self, models: list[DbtModel], keep_versions: int) -> None:
+        with self.__reindex_lock:
+            versions = self.__list_versions()
+            name = f"{COLLECTION_NAME}_v{versions[-1][0] + 1 if versions else 1}"
+
+            _, collection, lexical_index = self.__open_collection(name)
+            self.__write_models(collection, lexical_index, models)
+
+            self.__write_pointer(name)
+            self.__get_active()
+
+            previous = [version for version in self.__list_versions() if version[1] != name]
+            for _, old_name in previous[:max(len(previous) - keep_versions, 0)]:
+                self.__delete_collection(old_name)
+
+    def get_models(
+            self,
+            model_ids: list[str] = None,
+            limit: int = None,
+            offset: int = 0,
+            include: list[str] = None,
+    ) -> list[StoredModel]:
+        """
+        List the models stored in the collection, in insertion order.
+
+        Embeddings are never fetched. Use limit and offset to page through large collections.
+
+        Args:
+            model_ids (list[str], optional): The ids of the models to get. All models are listed if None.
+            limit (int, optional): The maximum number of models to return.
+            offset (int, optional): The number of models to skip.
+            include (list[str], optional): Any of "documents" and "metadatas". Defaults to ["documents"],
+                an empty list only returns the ids.
+
+        Returns:
+            list[StoredModel]: The id of each model, with its document and metadata when included.
+        """
+        include = ["documents"] if include is None else include
+
+        if any(field not in LISTING_FIELDS for field in include):
+            raise Exception(f"Please provide valid fields to include, any of: {', '.join(LISTING_FIELDS)}.")
 
+        if (limit is not None and limit < 0) or offset < 0:
+            raise Exception("Please provide a non-negative limit and offset.")
+
+        if limit == 0:
+            return []
+
+        collection = self.get_collection()
+
+        with self.__collection_lock:
+            raw_models = collection.get(ids=model_ids, limit=limit, offset=offset or None, include=list(include))
+
+        models = []
         for i in range(len(raw_models["ids"])):
-            models.append({"id": raw_models["ids"][i], "document": raw_models["documents"][i]})
+            model = {"id": raw_models["ids"][i]}
+
+            if "documents" in include:
+                model["document"] = raw_models["documents"][i]
+
+            if "metadatas" in include:
+                model["metadata"] = raw_models["metadatas"][i]
+
+            models.append(model)
 
         return models
 
-    def query_collection(self, query: str, n_results: int = 3) -> list[ParsedSearchResult]:
-        if not isinstance(query, str) or query == "":
-            raise Exception("Please provide a valid query.")
+    def list_model_ids(self, limit: int = None, offset: int = 0) -> list[str]:
+        """
+        List the ids of the models stored in the collection, without fetching their documents.
+
+        Args:
+            limit (int, optional): The maximum number of ids to return.
+            offset (int, optional): The number of ids to skip.
+
+        Returns:
+            list[str]: The model ids, in insertion order.
+        """
+        return [model["id"] for model in self.get_models(limit=limit, offset=offset, include=[])]
+
+    def count_models(self) -> int:
+        """
+        Count the models stored in the collection without fetching them.
+
+        Returns:
+            int: The number of models.
+        """
+        collection = self.get_collection()
 
-        query_embedding = self.__embed_text(query)
+        with self.__collection_lock:
+            return collection.count()
 
-        search_results = self.__collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=["documents", "distances", "metadatas"],
-        )
+    def __vector_search(
+            self,
+            collection,
+            queries: list[str],
+            n_results: int,
+            where: dict = None,
+            embeddings: list[list[float]] = None,
+    ) -> list[list[ParsedSearchResult]]:
+        if embeddings is None:
+            embeddings = self.__embed_queries(queries)
+
+        with self.__collection_lock:
+            search_results = collection.query(
+                query_embeddings=embeddings,
+                n_results=n_results,
+                where=where,
+                include=["documents", "distances", "metadatas"],
+            )
 
         closest_models = []
-        for i in range(len(search_results["ids"][0])):
+        for q in range(len(queries)):
             closest_models.append(
-                {
-                    "id": search_results["ids"][0][i],
-                    "metadata": search_results["metadatas"][0][i],
-                    "document": search_results["documents"][0][i],
-                    "distance": search_results["distances"][0][i],
-                }
+                [
+                    {
+                        "id": search_results["ids"][q][i],
+                        "metadata": search_results["metadatas"][q][i],
+                        "document": search_results["documents"][q][i],
+                        "distance": search_results["distances"][q][i],
+                    }
+                    for i in range(len(search_results["ids"][q]))
+                ]
             )
 
         return closest_models
 
+    def __get_ranked_results(
+            self, collection, rankings: list[list[tuple[str, float]]]
+    ) -> list[list[ParsedSearchResult]]:
+        ids = list({doc_id for ranking in rankings for doc_id, _ in ranking})
+
+        if not ids:
+            return [[] for _ in rankings]
+
+        with self.__collection_lock:
+            stored = collection.get(ids=ids, include=["documents", "metadatas"])
+
+        stored_by_id = {
+            stored["ids"][i]: (stored["documents"][i], stored["metadatas"][i])
+            for i in range(len(stored["ids"]))
+        }
+
+        ranked_models = []
+        for ranking in rankings:
+            ranked_models.append(
+                [
+                    {
+                        "id": doc_id,
+                        "metadata": stored_by_id[doc_id][1],
+                        "document": stored_by_id[doc_id][0],
+                        "distance": 1.0 / (1.0 + score),
+                    }
+                    for doc_id, score in ranking
+                    if doc_id in stored_by_id
+                ]
+            )
+
+        return ranked_models
+
+    def __search(
+            self,
+            queries: list[str],
+            n_results: int,
+            mode: str,
+            where: dict = None,
+            embeddings: list[list[float]] = None,
+    ) -> list[list[ParsedSearchResult]]:
+        _, collection, lexical_index = self.__get_active()
+
+        if mode == "vector":
+            return self.__vector_search(collection, queries, n_results, where, embeddings)
+
+        candidate_ids = None
+        if where:
+            with self.__collection_lock:
+                candidate_ids = collection.get(where=where, include=[])["ids"]
+
+        if mode == "lexical":
+            return self.__get_ranked_results(
+                collection, [lexical_index.search(query, n_results, candidate_ids) for query in queries]
+            )
+
+        n_candidates = max(n_results * 4, 20)
+        vector_rankings = self.__vector_search(collection, queries, n_candidates, where, embeddings)
+
+        fused_rankings = []
+        for query, vector_ranking in zip(queries, vector_rankings):
+            lexical_ranking = lexical_index.search(query, n_candidates, candidate_ids)
+            fused = reciprocal_rank_fusion(
+                [[model["id"] for model in vector_ranking], [doc_id for doc_id, _ in lexical_ranking]]
+            )
+            fused_rankings.append(fused[:n_results])
+
+        return self.__get_ranked_results(collection, fused_rankings)
+
+    def query_collection(
+            self, query: str, n_results: int = 3, mode: str = "vector", where: dict = None
+    ) -> list[ParsedSearchResult]:
+        """
+        Find the models that are closest to a query.
+
+        Query embeddings and results are cached in memory. Cached results are dropped whenever
+        the collection is upserted or reset.
+
+        Args:
+            query (str): The query to search for.
+            n_results (int, optional): The number of models to return.
+            mode (str, optional): One of "vector" (embedding similarity), "lexical" (local BM25 index,
+                no embedding call) or "hybrid" (reciprocal rank fusion of both). For the lexical and
+                hybrid modes the distance is derived from the ranking score, lower is closer.
+            where (dict, optional): A metadata filter pushed down into the vector store query, e.g.
+                {"tag:finance": True}, {"folder:models/marts": True} or {"materialization": "table"}.
+
+        Returns:
+            list[ParsedSearchResult]: The closest models, ordered from closest to furthest.
+        """
+        if not isinstance(query, str) or query == "":
+            raise Exception("Please provide a valid query.")
+
+        return self.query_collection_many([query], n_results=n_results, mode=mode, where=where)[0]
+
+    def query_collection_many(
+            self, queries: list[str], n_results: int = 3, mode: str = "vector", where: dict = None
+    ) -> list[list[ParsedSearchResult]]:
+        """
+        Find the closest models for several queries at once.
+
+        Queries that are not cached are embedded concurrently and searched with a single
+        vector store query.
+
+        Args:
+            queries (list[str]): The queries to search for.
+            n_results (int, optional): The number of models to return per query.
+            mode (str, optional): The search mode, see query_collection.
+            where (dict, optional): A metadata filter, see query_collection.
+
+        Returns:
+            list[list[ParsedSearchResult]]: The closest models for each query, in the order of the queries.
+        """
+        queries, cache_keys, results, missing = self.__get_cached_results(queries, n_results, mode, where)
+
+        if missing:
+            self.__set_cached_results(
+                cache_keys, results, missing, self.__search(missing, n_results, mode, where)
+            )
+
+        return [[dict(model) for model in results[query]] for query in queries]
+
+    async def aquery_collection(
+            self, query: str, n_results: int = 3, mode: str = "vector", where: dict = None
+    ) -> list[ParsedSearchResult]:
+        """
+        Find the models that are closest to a query without blocking the event loop.
+
+        Args:
+            query (str): The query to search for.
+            n_results (int, optional): The number of models to return.
+            mode (str, optional): The search mode, see query_collection.
+            where (dict, optional): A metadata filter, see query_collection.
+
+        Returns:
+            list[ParsedSearchResult]: The closest models, ordered from closest to furthest.
+        """
+        if not isinstance(query, str) or query == "":
+            raise Exception("Please provide a valid query.")
+
+        return (await self.aquery_collection_many([query], n_results=n_results, mode=mode, where=where))[0]
+
+    async def aquery_collection_many(
+            self, queries: list[str], n_results: int = 3, mode: str = "vector", where: dict = None
+    ) -> list[list[ParsedSearchResult]]:
+        """
+        Find the closest models for several queries without blocking the event loop.
+
+        Embedding requests go through the limiter, and the local search runs in a worker thread.
+
+        Args:
+            queries (list[str]): The queries to search for.
+            n_results (int, optional): The number of models to return per query.
+            mode (str, optional): The search mode, see query_collection.
+            where (dict, optional): A metadata filter, see query_collection.
+
+        Returns:
+            list[list[ParsedSearchResult]]: The closest models for each query, in the order of the queries.
+        """
+        queries, cache_keys, results, missing = self.__get_cached_results(queries, n_results, mode, where)
+
+        if missing:
+            embeddings = await self.__aembed_queries(missing) if mode != "lexical" else None
+            closest_models = await asyncio.to_thread(self.__search, missing, n_results, mode, where, embeddings)
+            self.__set_cached_results(cache_keys, results, missing, closest_models)
+
+        return [[dict(model) for model in results[query]] for query in queries]
+
+    def __get_cached_results(
+            self, queries: list[str], n_results: int, mode: str, where: dict
+    ) -> tuple[list[str], dict, dict, list[str]]:
+        if not isinstance(queries, list) or any(not isinstance(q, str) or q == "" for q in queries):
+            raise Exception("Please provide a list of valid queries.")
+
+        if mode not in SEARCH_MODES:
+            raise Exception(f"Please provide a valid search mode, one of: {', '.join(SEARCH_MODES)}.")
+
+        queries = [" ".join(query.split()) for query in queries]
+        name = self.__get_active()[0]
+        where_key = json.dumps(where, sort_keys=True) if where else None
+        cache_keys = {query: (name, query, n_results, mode, where_key) for query in queries}
+        results = {query: self.__result_cache.get(key) for query, key in cache_keys.items()}
+        missing = [query for query, closest_models in results.items() if closest_models is None]
+
+        return queries, cache_keys, results, missing
+
+    def __set_cached_results(
+            self,
+            cache_keys: dict,
+            results: dict,
+            queries: list[str],
+            closest_models: list[list[ParsedSearchResult]],
+    ) -> None:
+        for query, models in zip(queries, closest_models):
+            results[query] = models
+            self.__result_cache.set(cache_keys[query], models)
+
+    def get_cache_stats(self) -> dict[str, CacheStats]:
+        """
+        Get the hit and miss counters of the query embedding and search result caches.
+
+        Returns:
+            dict[str, CacheStats]: The counters of the "embeddings" and "results" caches.
+        """
+        return {
+            "embeddings": self.__embedding_cache.stats(),
+            "results": self.__result_cache.stats(),
+        }
+
     def reset_collection(self) -> None:
-        self.__client.delete_collection(self.__collection_name)
-        self.__collection = self.__create_collection()
\ No newline at end of file
+        # Another store may have swapped in a new version since this one last looked at the pointer.
+        self.__get_active()
+
+        with self.__swap_lock:
+            name, _, lexical_index = self.__active_state
+            with self.__collection_lock:
+                self.__client.delete_collection(name)
+
+            lexical_index.reset()
+            self.__active_state = self.__open_collection(name)
+            self.__result_cache.clear()
@@ -0,0 +1,146 @@
+import os
+import re
+
+import yaml
+
+MODELS_KEY_EXPRESSION = r"^models:\s*(#.*)?$"
+ITEM_NAME_EXPRESSION = r"^\s*(?:-\s+)?name:\s*['\"]?([^'\"\s#]+)"
+
+
+class MyDumper(yaml.Dumper):  # pylint: disable=too-many-ancestors
+    """
+    A YAML dumper that indents list items under their key, as dbt schema files usually do.
+    """
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+def dump_yaml(content) -> str:
+    """
+    Dump YAML in the block style used for dbt schema files.
+
+    Args:
+        content: The content to dump.
+
+    Returns:
+        str: The YAML text.
+    """
+    return yaml.dump(content, Dumper=MyDumper, default_flow_style=False, sort_keys=False)
+
+
+def _replace_models(text: str, models: list[dict]) -> str:
+    lines = text.splitlines(keepends=True)
+    start = next((i for i, line in enumerate(lines) if re.match(MODELS_KEY_EXPRESSION, line.rstrip("\r\n"))), None)
+
+    if start is None:
+        raise ValueError("The file has no block style models list.")
+
+    # The models list goes on until the next top level key.
+    end = start + 1
+    while end < len(lines) and (
+        lines[end].strip() == "" or lines[end].lstrip().startswith("#") or lines[end][0] in " \t-"
+    ):
+        end += 1
+
+    item_starts = [i for i in range(start + 1, end) if re.match(r"^\s*- ", lines[i])]
+
+    if not item_starts:
+        raise ValueError("The models list is empty.")
+
+    indent = min(len(lines[i]) - len(lines[i].lstrip()) for i in item_starts)
+    item_starts = [i for i in item_starts if len(lines[i]) - len(lines[i].lstrip()) == indent]
+    remaining = {model["name"]: model for model in models}
+    newline = "\r\n" if lines[start].endswith("\r\n") else "\n"
+
+    def render(model: dict) -> list[str]:
+        return [" " * indent + line + newline for line in dump_yaml([model]).splitlines()]
+
+    result = lines[: item_starts[0]]
+
+    for position, item_start in enumerate(item_starts):
+        item_end = item_starts[position + 1] if position + 1 < len(item_starts) else end
+        item = lines[item_start:item_end]
+
+        # Blank lines and comments after the item belong to the layout of the file, not to the item.
+        content_end = len(item)
+        while content_end > 1 and (
+            item[content_end - 1].strip() == "" or item[content_end - 1].lstrip().startswith("#")
+        ):
+            content_end -= 1
+
+        name = next(
+            (
+                match.group(1)
+                for offset, line in enumerate(item[:content_end])
+                if (match := re.match(ITEM_NAME_EXPRESSION, line))
+                and (offset == 0 or len(line) - len(line.lstrip()) == indent + 2)
+            ),
+            None,
+        )
+
+        if name in remaining:
+            result.extend(render(remaining.pop(name)))
+        else:
+            result.extend(item[:content_end])
+
+        if position + 1 == len(item_starts):
+            for model in remaining.values():
+                result.extend(render(model))
+
+        result.extend(item[content_end:])
+
+    return "".join(result + lines[end:])
+
+
+def merge_models_into_yaml(text: str, models: list[dict]) -> str:
+    """
+    Replace the entries of some models in the text of a schema file, and append the ones it does not have.
+
+    Only the lines of the replaced models change, so comments, blank lines and the other models are
+    left as they are. Files whose models list cannot be edited line by line are parsed and dumped again.
+
+    Args:
+        text (str): The current text of the schema file.
+        models (list[dict]): The model entries to write, each with a "name".
+
+    Returns:
+        str: The new text of the schema file.
+    """
+    try:
+        merged = _replace_models(text, models)
+        parsed = yaml.safe_load(merged)
+        names = {model.get("name") for model in parsed.get("models", [])}
+
+        if all(model["name"] in names for model in models):
+            return merged
+    except (ValueError, AttributeError, yaml.YAMLError):
+        pass
+
+    content = yaml.safe_load(text) or {"version": 2}
+    existing = content.get("models") or []
+    replaced = {model["name"]: model for model in models}
+    content["models"] = [replaced.pop(model.get("name"), model) for model in existing] + list(replaced.values())
+
+    return dump_yaml(content)
+
+
+def write_models_to_yaml(yaml_path: str, models: list[dict]) -> None:
+    """
+    Write model entries to a schema file in one atomic write, creating the file if needed.
+
+    Args:
+        yaml_path (str): The path of the schema file.
+        models (list[dict]): The model entries to write, each with a "name".
+    """
+    if os.path.isfile(yaml_path):
+        with open(yaml_path, encoding="utf-8", newline="") as f:
+            content = merge_models_into_yaml(f.read(), models)
+    else:
+        content = dump_yaml({"version": 2, "models": models})
+
+    tmp_path = f"{yaml_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+
+    os.replace(tmp_path, yaml_path)
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dbt_llm_tools import Chatbot, DbtModel
+from dbt_llm_tools.batch import read_questions, run_batch
+from tests.test_chatbot import VALID_PROJECT_PATH, StubBedrockClient
+from tests.test_data.model_examples import MODEL_WITH_NAME_AND_DESCRIPTION
+
+
+class BatchTestCase(unittest.TestCase):
+    """
+    Test cases for the batch question answering runner.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+        self.client = StubBedrockClient(["The answer"])
+        self.chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.folder, "db.json"),
+            vector_db_path=self.folder,
+            bedrock_client=self.client,
+            max_concurrency=4,
+            answer_cache_size=0,
+        )
+        self.chatbot.store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+
+        self.input_path = os.path.join(self.folder, "questions.jsonl")
+        self.output_path = os.path.join(self.folder, "answers.jsonl")
+
+    def write_questions(self, lines: list[str]) -> None:
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def read_answers(self) -> dict:
+        with open(self.output_path, encoding="utf-8") as f:
+            return {answer["id"]: answer for answer in map(json.loads, f)}
+
+    def test_questions_answered_concurrently(self):
+        """
+        Test for the case when a file of questions is answered with a bounded concurrency.
+        """
+        self.write_questions([json.dumps({"id": f"q{i}", "question": f"question number {i}"}) for i in range(20)])
+
+        summary = run_batch(self.chatbot, self.input_path, self.output_path, concurrency=4)
+        answers = self.read_answers()
+
+        self.assertEqual(summary["questions"], 20)
+        self.assertEqual(summary["failed"], 0)
+        self.assertEqual(len(answers), 20)
+        self.assertEqual(answers["q3"]["answer"], "The answer")
+        self.assertEqual(answers["q3"]["model_ids"], ["model_with_name_and_description"])
+        self.assertEqual(set(answers["q3"]["latencies"]), {"retrieval", "cache", "generation", "total"})
+        self.assertLessEqual(self.client.peak, 4)
+
+    def test_invalid_lines_reported_as_failed(self):
+        """
+        Test for the case when some lines of the file are not valid questions.
+        """
+        self.write_questions(['"What does the model contain?"', "not json", "", json.dumps({"id": "x"})])
+
+        summary = run_batch(self.chatbot, self.input_path, self.output_path)
+        answers = self.read_answers()
+
+        self.assertEqual(summary["questions"], 3)
+        self.assertEqual(summary["failed"], 2)
+        self.assertEqual(answers[1]["answer"], "The answer")
+        self.assertIn("error", answers[2])
+        self.assertIn("error", answers["x"])
+
+    def test_questions_read_lazily(self):
+        """
+        Test for the case when questions are read from a file one at a time.
+        """
+        self.write_questions(['{"question": "first"}', '{"question": "second"}'])
+
+        questions = read_questions(self.input_path)
+
+        self.assertEqual(next(questions), {"question": "first", "id": 1})
+
+    def test_invalid_concurrency(self):
+        """
+        Test for the case when the concurrency is not a positive integer.
+        """
+        self.write_questions(['{"question": "first"}'])
+
+        with self.assertRaises(Exception):
+            run_batch(self.chatbot, self.input_path, self.output_path, concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
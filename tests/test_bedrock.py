@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from dbt_llm_tools import BedrockClientFactory, DocumentationGenerator, get_bedrock_client, set_bedrock_client
+from tests.test_chatbot import VALID_PROJECT_PATH
+
+
+class BedrockClientFactoryTestCase(unittest.TestCase):
+    """
+    Test cases for the BedrockClientFactory class.
+    """
+
+    def test_client_created_once_and_shared(self):
+        """
+        Test for the case when the client is requested several times.
+        """
+        factory = BedrockClientFactory(max_pool_connections=10, max_attempts=3, region_name="us-east-1")
+
+        with mock.patch("boto3.client", side_effect=mock.Mock) as create:
+            client = factory.get_client()
+
+            self.assertIs(factory.get_client(), client)
+            self.assertEqual(create.call_count, 1)
+
+        config = create.call_args.kwargs["config"]
+        self.assertEqual(create.call_args.kwargs["service_name"], "bedrock-runtime")
+        self.assertEqual(create.call_args.kwargs["region_name"], "us-east-1")
+        self.assertEqual(config.max_pool_connections, 10)
+        self.assertEqual(config.retries, {"mode": "adaptive", "max_attempts": 3})
+
+    def test_pool_grown_for_concurrent_callers(self):
+        """
+        Test for the case when a caller makes more concurrent requests than the pool holds.
+        """
+        factory = BedrockClientFactory(max_pool_connections=10)
+
+        with mock.patch("boto3.client", side_effect=mock.Mock) as create:
+            small = factory.get_client(min_pool_connections=4)
+            large = factory.get_client(min_pool_connections=64)
+
+            self.assertIs(factory.get_client(min_pool_connections=16), large)
+
+        self.assertIsNot(small, large)
+        self.assertEqual(create.call_args.kwargs["config"].max_pool_connections, 64)
+
+    def test_client_injected(self):
+        """
+        Test for the case when a stub client replaces the shared client.
+        """
+        stub = mock.Mock()
+        set_bedrock_client(stub)
+        self.addCleanup(set_bedrock_client, None)
+
+        with mock.patch("boto3.client") as create:
+            self.assertIs(get_bedrock_client(min_pool_connections=500), stub)
+            DocumentationGenerator(VALID_PROJECT_PATH)
+
+        create.assert_not_called()
+
+    def test_invalid_settings(self):
+        """
+        Test for the case when the factory is given invalid settings.
+        """
+        with self.assertRaises(Exception):
+            BedrockClientFactory(retry_mode="never")
+
+        with self.assertRaises(Exception):
+            BedrockClientFactory(max_pool_connections=0)
+
+        with self.assertRaises(Exception):
+            BedrockClientFactory().configure(pool_size=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+from dbt_llm_tools import Chatbot, DbtModel, LocalBedrockClient
+from dbt_llm_tools.chatbot import stream_completion
+from tests.test_chatbot import VALID_PROJECT_PATH
+from tests.test_data.model_examples import MODEL_WITH_NAME_AND_DESCRIPTION
+
+
+def invoke(client: LocalBedrockClient, body: dict) -> dict:
+    response = client.invoke_model(modelId="anthropic.claude-v2", body=json.dumps(body))
+    return json.loads(response["body"].read())
+
+
+class LocalBedrockClientTestCase(unittest.TestCase):
+    """
+    Test cases for the LocalBedrockClient class.
+    """
+
+    def test_deterministic_embeddings(self):
+        """
+        Test for the case when the same text is embedded by two clients.
+        """
+        first = invoke(LocalBedrockClient(), {"inputText": "orders per day"})["embedding"]
+        second = invoke(LocalBedrockClient(), {"inputText": "orders per day"})["embedding"]
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 256)
+
+    def test_templated_completions(self):
+        """
+        Test for the case when completions are built from a template or from the prompt.
+        """
+        client = LocalBedrockClient(completion="{model_id} says: {question}")
+        prompt = [{"role": "system", "content": "Be nice"}, {"role": "user", "content": "Hi?"}]
+        interpret_prompt = [{"role": "system", "content": "The model you are interpreting is called fct_orders"}]
+
+        self.assertEqual(invoke(client, {"input": prompt})["completion"], "anthropic.claude-v2 says: Hi?")
+        self.assertEqual(
+            json.loads(invoke(LocalBedrockClient(), {"input": interpret_prompt})["completion"])["name"], "fct_orders"
+        )
+
+    def test_streamed_completion(self):
+        """
+        Test for the case when a completion is streamed word by word with a latency.
+        """
+        client = LocalBedrockClient(completion="The stub answer", completion_latency_ms=30)
+
+        start = time.perf_counter()
+        chunks = list(stream_completion(client, "anthropic.claude-v2", [{"role": "user", "content": "?"}]))
+
+        self.assertEqual(chunks, ["The ", "stub ", "answer"])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.03)
+
+    def test_errors_and_throttling(self):
+        """
+        Test for the case when requests fail or exceed the allowed request rate.
+        """
+        failing = LocalBedrockClient(error_rate=1.0)
+        throttled = LocalBedrockClient(max_requests_per_second=2)
+
+        with self.assertRaises(ClientError) as raised:
+            invoke(failing, {"inputText": "a"})
+
+        codes = []
+        for _ in range(5):
+            try:
+                invoke(throttled, {"inputText": "a"})
+                codes.append("ok")
+            except ClientError as e:
+                codes.append(e.response["Error"]["Code"])
+
+        self.assertEqual(raised.exception.response["Error"]["Code"], "InternalServerException")
+        self.assertEqual(codes, ["ok", "ok", "ThrottlingException", "ThrottlingException", "ThrottlingException"])
+        self.assertEqual(throttled.stats()["throttled"], 3)
+
+    def test_chatbot_runs_offline(self):
+        """
+        Test for the case when the whole chatbot pipeline runs against the local client.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        client = LocalBedrockClient()
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(vector_db_path, "db.json"),
+            vector_db_path=vector_db_path,
+            bedrock_client=client,
+        )
+        chatbot.store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+
+        self.assertEqual(chatbot.ask_question("What is in it?"), "This is a stub answer to: What is in it?")
+        self.assertEqual(client.stats()["requests"], 3)
+
+    def test_invalid_settings(self):
+        """
+        Test for the case when the client is given invalid settings.
+        """
+        with self.assertRaises(Exception):
+            LocalBedrockClient(latency_distribution="pareto")
+
+        with self.assertRaises(Exception):
+            LocalBedrockClient(error_rate=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
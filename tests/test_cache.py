@@ -0,0 +1,99 @@
+import time
+import unittest
+
+from dbt_llm_tools.cache import LRUCache, SemanticAnswerCache
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """
+    Test cases for the LRUCache class.
+    """
+
+    def test_least_recently_used_entry_evicted(self):
+        """
+        Test for the case when the cache grows beyond its maximum size.
+        """
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expired_entry_is_a_miss(self):
+        """
+        Test for the case when an entry is read after its time to live.
+        """
+        cache = LRUCache(max_size=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_hit_rate_reported(self):
+        """
+        Test for the case when the cache counters are read.
+        """
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_zero_size_disables_cache(self):
+        """
+        Test for the case when the cache is created with a size of 0.
+        """
+        cache = LRUCache(max_size=0)
+        cache.set("a", 1)
+
+        self.assertIsNone(cache.get("a"))
+
+
+class SemanticAnswerCacheTestCase(unittest.TestCase):
+    """
+    Test cases for the SemanticAnswerCache class.
+    """
+
+    def test_similar_question_with_same_context_is_a_hit(self):
+        """
+        Test for the case when a near-duplicate question is asked with the same retrieved models.
+        """
+        cache = SemanticAnswerCache(similarity_threshold=0.9)
+        context = (("dim_customers", "hash_1"),)
+        cache.set([1.0, 0.0], context, "answer")
+
+        self.assertEqual(cache.get([0.99, 0.05], context), "answer")
+        self.assertIsNone(cache.get([0.0, 1.0], context))
+        self.assertIsNone(cache.get([1.0, 0.0], (("dim_customers", "hash_2"),)))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_answers_invalidated_by_model_id(self):
+        """
+        Test for the case when one of the models an answer was based on changes.
+        """
+        cache = SemanticAnswerCache()
+        cache.set([1.0, 0.0], (("dim_customers", "a"), ("fct_orders", "b")), "first")
+        cache.set([1.0, 0.0], (("fct_orders", "b"),), "second")
+
+        cache.invalidate(["dim_customers"])
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get([1.0, 0.0], (("fct_orders", "b"),)), "second")
+
+    def test_invalid_similarity_threshold(self):
+        """
+        Test for the case when the similarity threshold is outside of [0, 1].
+        """
+        with self.assertRaises(Exception):
+            SemanticAnswerCache(similarity_threshold=1.5)
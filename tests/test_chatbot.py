@@ -0,0 +1,276 @@
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from dbt_llm_tools import Chatbot, DbtModel
+from dbt_llm_tools.chatbot import stream_completion
+from dbt_llm_tools.instructions import ANSWER_QUESTION_INSTRUCTIONS
+from dbt_llm_tools.prompt_packer import estimate_tokens
+from tests.test_data.model_examples import (
+    MODEL_WITH_NAME_AND_DESCRIPTION,
+    MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS,
+)
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+VALID_PROJECT_PATH = os.path.join(HERE, "test_data/valid_dbt_project")
+
+
+class StubBedrockClient:  # pylint: disable=too-many-instance-attributes
+    """
+    A Bedrock runtime client that answers from memory.
+    """
+
+    def __init__(self, chunks: list[str], events: list[dict] = None) -> None:
+        self.chunks = chunks
+        self.events = events
+        self.requests = []
+        self.threads = set()
+        self.embedded = 0
+        self.running = 0
+        self.peak = 0
+        self.__lock = threading.Lock()
+
+    def invoke_model(self, body: str, **kwargs):  # pylint: disable=unused-argument
+        with self.__lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.threads.add(threading.get_ident())
+
+        time.sleep(0.005)
+
+        with self.__lock:
+            self.running -= 1
+
+        if "inputText" in json.loads(body):
+            self.embedded += 1
+            return {"body": io.BytesIO(json.dumps({"embedding": [1.0, 0.0, 0.0]}).encode())}
+
+        return {"body": io.BytesIO(json.dumps({"completion": "".join(self.chunks)}).encode())}
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self.requests.append(kwargs)
+        events = self.events or [
+            {"chunk": {"bytes": json.dumps({"completion": chunk}).encode()}} for chunk in self.chunks
+        ]
+        return {"body": iter(events)}
+
+
+class ChatbotTestCase(unittest.TestCase):
+    """
+    Test cases for the Chatbot class.
+    """
+
+    def setUp(self):
+        self.vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.vector_db_path)
+
+    def test_answer_streamed_chunk_by_chunk(self):
+        """
+        Test for the case when the answer to a question is streamed.
+        """
+        client = StubBedrockClient(["The ", "answer", ""])
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+        )
+        stream = chatbot.ask_question_stream("Which model has the orders?")
+
+        self.assertEqual(client.requests, [])
+        self.assertEqual(list(stream), ["The ", "answer"])
+
+        prompt = json.loads(client.requests[0]["body"])["input"]
+        self.assertEqual(prompt[-1], {"role": "user", "content": "Which model has the orders?"})
+        self.assertEqual(client.requests[0]["modelId"], "anthropic.claude-v2")
+
+    def test_questions_answered_concurrently(self):
+        """
+        Test for the case when many questions are awaited at once on one event loop.
+        """
+        client = StubBedrockClient(["The answer"])
+
+        async def ask_all(chatbot):
+            return await asyncio.gather(*(chatbot.aask_question(f"question number {i}") for i in range(30)))
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+            max_concurrency=4,
+        )
+        answers = asyncio.run(ask_all(chatbot))
+
+        self.assertEqual(answers, ["The answer"] * 30)
+        self.assertLessEqual(client.peak, 4)
+        self.assertGreater(client.peak, 1)
+
+    def test_repeated_question_answered_from_cache(self):
+        """
+        Test for the case when a question is asked again before and after its context changes.
+        """
+        client = StubBedrockClient(["The answer"])
+        model = dict(MODEL_WITH_NAME_AND_DESCRIPTION)
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+        )
+        chatbot.store.upsert_models([DbtModel(model)])
+
+        first = chatbot.ask_question("What does the model contain?")
+        second = chatbot.ask_question("what does the model contain")
+
+        model["description"] = "A changed description"
+        chatbot.store.upsert_models([DbtModel(model)])
+        chatbot.ask_question("What does the model contain?")
+
+        stats = chatbot.get_cache_stats()["answers"]
+        self.assertEqual(first, second)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_lexical_question_answered_without_embedding(self):
+        """
+        Test for the case when a question is answered with the lexical search mode.
+        """
+        client = StubBedrockClient(["The answer"])
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+        )
+        chatbot.store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+        embedded = client.embedded
+
+        chatbot.ask_question("What does the model contain?", search_mode="lexical")
+        list(chatbot.ask_question_stream("What does the model contain?", search_mode="lexical"))
+        asyncio.run(chatbot.aask_question("What does the model contain?", search_mode="lexical"))
+
+        self.assertEqual(client.embedded, embedded)
+        self.assertEqual(chatbot.get_cache_stats()["answers"]["misses"], 0)
+
+    def test_prompt_packed_into_token_budget(self):
+        """
+        Test for the case when the retrieved documents do not fit into the prompt token budget.
+        """
+        client = StubBedrockClient(["The answer"])
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+            answer_cache_size=0,
+            prompt_token_budget=0,
+        )
+        chatbot.store.upsert_models([DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS)])
+        list(chatbot.ask_question_stream("Which columns are there?"))
+
+        prompt = json.loads(client.requests[0]["body"])["input"]
+        report = asyncio.run(chatbot.aask_question_traced("Which columns are there?"))["prompt_report"]
+
+        self.assertEqual(len(prompt), len(chatbot.get_instructions()) + 1)
+        self.assertEqual(report["dropped_models"], ["model_with_name_description_and_columns"])
+        self.assertEqual(report["estimated_tokens"], 0)
+
+    def test_conversation_packed_into_token_budget(self):
+        """
+        Test for the case when questions asked within a conversation are packed into the prompt token budget.
+        """
+        client = StubBedrockClient(["The answer to the question is in the model. " * 4])
+        budget = estimate_tokens(ANSWER_QUESTION_INSTRUCTIONS) + 120
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+            prompt_token_budget=budget,
+        )
+        chatbot.store.upsert_models(
+            [DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION), DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS)]
+        )
+        conversation = chatbot.new_conversation()
+
+        list(chatbot.ask_question_stream("What does the model contain?", memory=conversation))
+        list(chatbot.ask_question_stream("Which columns are there?", memory=conversation))
+
+        prompt = json.loads(client.requests[-1]["body"])["input"]
+
+        self.assertLessEqual(sum(estimate_tokens(message["content"]) for message in prompt), budget)
+        self.assertEqual(prompt[-1], {"role": "user", "content": "Which columns are there?"})
+        self.assertEqual(len(conversation.get_context_model_ids()), 2)
+
+    def test_follow_up_question_sent_with_conversation(self):
+        """
+        Test for the case when questions are asked within a conversation.
+        """
+        client = StubBedrockClient(["The answer"])
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+        )
+        chatbot.store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+        conversation = chatbot.new_conversation(max_turns=1)
+
+        list(chatbot.ask_question_stream("What does the model contain?", memory=conversation))
+        list(chatbot.ask_question_stream("What does the model contain?", memory=conversation))
+        list(chatbot.ask_question_stream("And its columns?", memory=conversation))
+
+        prompt = json.loads(client.requests[-1]["body"])["input"]
+        documents = [m for m in prompt if m["content"] == DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION).as_prompt_text()]
+
+        self.assertEqual(len(client.requests), 3)
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(prompt[-3:-1], [
+            {"role": "user", "content": "What does the model contain?"},
+            {"role": "assistant", "content": "The answer"},
+        ])
+        self.assertIn("The user asked: What does the model contain?", conversation.get_summary())
+
+    def test_conversation_summarized_off_the_event_loop(self):
+        """
+        Test for the case when older turns are summarized with the model while questions are awaited.
+        """
+        client = StubBedrockClient(["The answer"])
+
+        async def ask_all(chatbot, conversation):
+            for question in ["What does the model contain?", "And its columns?", "And its owner?"]:
+                await chatbot.aask_question(question, memory=conversation)
+
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(self.vector_db_path, "db.json"),
+            vector_db_path=self.vector_db_path,
+            bedrock_client=client,
+        )
+        conversation = chatbot.new_conversation(max_turns=1, summarize_with_model=True)
+        asyncio.run(ask_all(chatbot, conversation))
+
+        self.assertEqual(conversation.get_summary(), "The answer")
+        self.assertNotIn(threading.get_ident(), client.threads)
+
+    def test_stream_error_event_raised(self):
+        """
+        Test for the case when the response stream reports an error.
+        """
+        client = StubBedrockClient([], events=[{"modelStreamErrorException": {"message": "failed"}}])
+
+        with self.assertRaises(Exception):
+            list(stream_completion(client, "anthropic.claude-v2", []))
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from dbt_llm_tools import ConcurrencyLimiter
+
+
+class ConcurrencyLimiterTestCase(unittest.TestCase):
+    """
+    Test cases for the ConcurrencyLimiter class.
+    """
+
+    def test_calls_bounded_by_max_concurrency(self):
+        """
+        Test for the case when more coroutines wait on the limiter than it allows to run at once.
+        """
+        limiter = ConcurrencyLimiter(max_concurrency=3)
+        self.addCleanup(limiter.shutdown)
+
+        lock = threading.Lock()
+        counters = {"running": 0, "peak": 0}
+
+        def blocking_call(value):
+            with lock:
+                counters["running"] += 1
+                counters["peak"] = max(counters["peak"], counters["running"])
+
+            time.sleep(0.01)
+
+            with lock:
+                counters["running"] -= 1
+
+            return value * 2
+
+        async def run_all():
+            return await asyncio.gather(*(limiter.run(blocking_call, i) for i in range(20)))
+
+        self.assertEqual(asyncio.run(run_all()), [i * 2 for i in range(20)])
+        self.assertEqual(counters["peak"], 3)
+
+    def test_invalid_max_concurrency(self):
+        """
+        Test for the case when the limiter is created without a positive maximum concurrency.
+        """
+        with self.assertRaises(Exception):
+            ConcurrencyLimiter(max_concurrency=0)
@@ -0,0 +1,80 @@
+import unittest
+
+from dbt_llm_tools import ConversationMemory
+from dbt_llm_tools.conversation_memory import extractive_summary
+
+
+def search_result(model_id: str, document: str) -> dict:
+    return {"id": model_id, "document": document, "metadata": {}, "distance": 0.0}
+
+
+class ConversationMemoryTestCase(unittest.TestCase):
+    """
+    Test cases for the ConversationMemory class.
+    """
+
+    def test_instructions_pinned_and_context_deduplicated(self):
+        """
+        Test for the case when the same model is retrieved for several questions.
+        """
+        memory = ConversationMemory(["Be helpful."], max_context_models=2)
+        memory.add_context([search_result("dim_customers", "v1"), search_result("fct_orders", "orders")])
+        memory.add_context([search_result("dim_customers", "v2")])
+        memory.add_context([search_result("dim_products", "products")])
+
+        messages = memory.get_messages("Which customers ordered?")
+
+        self.assertEqual(messages[0], {"role": "system", "content": "Be helpful."})
+        self.assertEqual(memory.get_context_model_ids(), ["dim_customers", "dim_products"])
+        self.assertEqual([m["content"] for m in messages[1:3]], ["v2", "products"])
+        self.assertEqual(messages[-1], {"role": "user", "content": "Which customers ordered?"})
+
+    def test_older_turns_summarized_outside_window(self):
+        """
+        Test for the case when the conversation grows beyond its window of turns.
+        """
+        memory = ConversationMemory(["Be helpful."], max_turns=2)
+
+        for i in range(4):
+            memory.add_turn(f"Question {i}?", f"Answer {i}. With details.")
+
+        messages = memory.get_messages()
+        user_messages = [m["content"] for m in messages if m["role"] == "user"]
+
+        self.assertEqual(user_messages, ["Question 2?", "Question 3?"])
+        self.assertIn("The user asked: Question 0?", memory.get_summary())
+        self.assertIn("You answered: Answer 1.", memory.get_summary())
+        self.assertNotIn("With details", memory.get_summary())
+        self.assertTrue(messages[1]["content"].startswith("Summary of the earlier conversation"))
+
+    def test_turns_summarized_over_token_threshold(self):
+        """
+        Test for the case when the recent turns exceed the token threshold.
+        """
+        summarized = []
+
+        def summarizer(_summary, messages):
+            summarized.extend(messages)
+            return "summary"
+
+        memory = ConversationMemory(max_turns=10, max_tokens=100, summarizer=summarizer)
+        memory.add_turn("First question?", "word " * 100)
+        memory.add_turn("Second question?", "Short answer.")
+
+        self.assertEqual([m["content"] for m in summarized][0], "First question?")
+        self.assertEqual(memory.get_summary(), "summary")
+        self.assertLessEqual(memory.estimate_tokens(), 100)
+
+        memory.clear()
+        self.assertEqual(memory.get_messages(), [])
+
+    def test_extractive_summary_bounded(self):
+        """
+        Test for the case when the extractive summary grows beyond its maximum size.
+        """
+        summary = ""
+        for i in range(100):
+            summary = extractive_summary(summary, [{"role": "user", "content": f"Question number {i}?"}], max_tokens=50)
+
+        self.assertLessEqual(len(summary) / 4, 50)
+        self.assertTrue(summary.endswith("Question number 99?"))
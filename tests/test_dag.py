@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+
+from dbt_llm_tools.dag import run_dag, upstream_closure
+
+GRAPH = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"], "e": ["d"], "f": []}
+
+
+class DagTestCase(unittest.TestCase):
+    """
+    Test cases for the dependency graph scheduler.
+    """
+
+    def test_upstream_closure(self):
+        """
+        Test for the case when the closure of a target includes unknown references.
+        """
+        graph = upstream_closure(["d"], {**GRAPH, "d": ["b", "c", "unknown"]}.get)
+
+        self.assertEqual(graph, {"d": ["b", "c"], "c": ["a"], "b": ["a"], "a": []})
+
+    def test_independent_nodes_run_concurrently(self):
+        """
+        Test for the case when nodes of the same layer run at the same time, after their upstream nodes.
+        """
+        lock = threading.Lock()
+        running = []
+        peak = []
+        finished = []
+
+        def task(name):
+            with lock:
+                running.append(name)
+                peak.append(len(running))
+
+            time.sleep(0.02)
+
+            with lock:
+                running.remove(name)
+                finished.append(name)
+
+            return name.upper()
+
+        results = {}
+        statuses = run_dag(GRAPH, task, 4, lambda name, result, error: results.update({name: result}))
+
+        self.assertEqual(set(statuses.values()), {"done"})
+        self.assertEqual(results["d"], "D")
+        self.assertLess(finished.index("a"), finished.index("b"))
+        self.assertLess(finished.index("c"), finished.index("d"))
+        self.assertGreater(max(peak), 1)
+
+    def test_failure_only_blocks_downstream(self):
+        """
+        Test for the case when a node fails.
+        """
+        def task(name):
+            if name == "b":
+                raise Exception("failed")
+
+        errors = {}
+        statuses = run_dag(GRAPH, task, 2, lambda name, result, error: error and errors.update({name: error}))
+
+        self.assertEqual(
+            statuses, {"a": "done", "b": "failed", "c": "done", "d": "blocked", "e": "blocked", "f": "done"}
+        )
+        self.assertEqual(list(errors), ["b"])
+
+    def test_cycle_blocked(self):
+        """
+        Test for the case when the graph contains a cycle.
+        """
+        statuses = run_dag({"a": ["b"], "b": ["a"], "c": []}, lambda name: None)
+
+        self.assertEqual(statuses, {"a": "blocked", "b": "blocked", "c": "done"})
+
+
+if __name__ == "__main__":
+    unittest.main()
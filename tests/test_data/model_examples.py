@@ -37,3 +37,15 @@ MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS_PROMPT_TEXT = (
     + "\n"
     + "- col_2: col_2_description"
 )
+
+MODEL_DIRECTORY_ENTRY_WITH_TAGS = {
+    "name": "fct_revenue",
+    "relative_path": "/models/marts/finance/fct_revenue.sql",
+    "documentation": {
+        "name": "fct_revenue",
+        "description": "Revenue per day",
+        "config": {"tags": ["finance", "daily"], "materialized": "table"},
+        "columns": [{"name": "revenue", "description": "Revenue in USD"}],
+    },
+    "interpretation": {"model": "fct_revenue", "description": "Revenue", "columns": []},
+}
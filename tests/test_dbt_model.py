@@ -7,6 +7,7 @@ from tests.test_data.model_examples import (
     MODEL_WITH_NAME_AND_DESCRIPTION_PROMPT_TEXT,
     MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS,
     MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS_PROMPT_TEXT,
+    MODEL_DIRECTORY_ENTRY_WITH_TAGS,
     MODEL_WITH_ONLY_NAME,
     MODEL_WITH_ONLY_NAME_PROMPT_TEXT,
 )
@@ -54,3 +55,39 @@ class DbtModelTestCase(unittest.TestCase):
         self.assertEqual(
             model.as_prompt_text(), MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS_PROMPT_TEXT
         )
+
+    def test_model_metadata_is_flat_and_filterable(self):
+        """
+        Test for the case when a model is created from a directory entry and converted to metadata.
+        """
+        model = DbtModel.from_directory_entry(MODEL_DIRECTORY_ENTRY_WITH_TAGS)
+
+        self.assertEqual(
+            model.as_metadata(),
+            {
+                "tags": '["finance", "daily"]',
+                "has_interpretation": True,
+                "tag:finance": True,
+                "tag:daily": True,
+                "materialization": "table",
+                "path": "models/marts/finance/fct_revenue.sql",
+                "folder:models": True,
+                "folder:models/marts": True,
+                "folder:models/marts/finance": True,
+            },
+        )
+
+    def test_model_metadata_without_config_or_path(self):
+        """
+        Test for the case when a model without config or path is converted to metadata.
+        """
+        model = DbtModel(MODEL_WITH_ONLY_NAME)
+
+        self.assertEqual(model.as_metadata(), {"tags": "[]", "has_interpretation": False})
+
+    def test_model_from_directory_entry_without_documentation(self):
+        """
+        Test for the case when a model is created from a directory entry without documentation.
+        """
+        with self.assertRaises(Exception):
+            DbtModel.from_directory_entry({"name": "undocumented"})
@@ -1,11 +1,36 @@
+import json
 import os
+import shutil
+import tempfile
 import unittest
 
-from dbt_llm_tools import DocumentationGenerator
+from dbt_llm_tools import DbtProject, DocumentationGenerator, LocalBedrockClient
+from dbt_llm_tools.bedrock_stub import template_completion
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 VALID_PROJECT_PATH = os.path.join(HERE, "test_data/valid_dbt_project")
 
+SQL_MODELS = {
+    "stg_orders": "select id, amount from raw.orders",
+    "stg_customers": "select id, name from raw.customers",
+    "int_orders": "select id from {{ ref('stg_orders') }}",
+    "int_customers": "select id from {{ ref('stg_customers') }}",
+    "fct_sales": "select * from {{ ref('int_orders') }} join {{ ref('int_customers') }} using (id)",
+}
+
+
+def create_sql_project(folder: str, models: dict[str, str]) -> str:
+    with open(os.path.join(folder, "dbt_project.yml"), "w", encoding="utf-8") as f:
+        f.write("name: sql_project\n")
+
+    os.makedirs(os.path.join(folder, "models"))
+
+    for name, sql in models.items():
+        with open(os.path.join(folder, "models", f"{name}.sql"), "w", encoding="utf-8") as f:
+            f.write(sql)
+
+    return folder
+
 
 class DocumentationGeneratorTestCase(unittest.TestCase):
     """
@@ -33,3 +58,249 @@ class DocumentationGeneratorTestCase(unittest.TestCase):
         """
         with self.assertRaises(Exception):
             DocumentationGenerator(VALID_PROJECT_PATH, None)
+
+    def test_models_interpreted_in_dependency_order(self):
+        """
+        Test for the case when a model and its upstream models are documented concurrently.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+
+        prompts = {}
+
+        def completion(prompt):
+            name = json.loads(template_completion(prompt))["name"]
+            prompts[name] = prompt
+            return template_completion(prompt)
+
+        client = LocalBedrockClient(completion=completion, completion_latency_ms=20)
+        generator = DocumentationGenerator(
+            folder, database_path=os.path.join(folder, "db.json"), bedrock_client=client
+        )
+        generator.dbt_project.parse()
+
+        report = generator.generate_documentation_for_models(["fct_sales"], max_concurrency=4)
+
+        self.assertEqual(set(report["interpreted"]), set(SQL_MODELS))
+        self.assertEqual(report["interpreted"][-1], "fct_sales")
+        self.assertIn("Stub interpretation of int_orders.", "".join(m["content"] for m in prompts["fct_sales"]))
+        self.assertGreater(client.stats()["peak_concurrency"], 1)
+
+        project = DbtProject(folder, database_path=os.path.join(folder, "db.json"))
+        self.assertEqual(project.get_single_model("fct_sales")["interpretation"]["name"], "fct_sales")
+
+    def test_prompt_lists_only_referenced_upstream_columns(self):
+        """
+        Test for the case when a model only uses some of the columns of a wide upstream model.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+
+        prompts = {}
+
+        def completion(prompt):
+            interpretation = json.loads(template_completion(prompt))
+            prompts[interpretation["name"]] = "".join(m["content"] for m in prompt)
+
+            if interpretation["name"] == "stg_orders":
+                interpretation["columns"] = [
+                    {"name": name, "description": f"The {name} of the order."}
+                    for name in ["id", "amount"] + [f"metric_{i}" for i in range(20)]
+                ]
+
+            return json.dumps(interpretation)
+
+        generator = DocumentationGenerator(
+            folder,
+            database_path=os.path.join(folder, "db.json"),
+            bedrock_client=LocalBedrockClient(completion=completion),
+        )
+        generator.dbt_project.parse()
+
+        generator.generate_documentation_for_models(["int_orders"])
+
+        self.assertIn('{"name":"id","description":"The id of the order."}', prompts["int_orders"])
+        self.assertNotIn("amount", prompts["int_orders"])
+        self.assertNotIn("metric_0", prompts["int_orders"])
+
+    def test_unchanged_models_not_interpreted_again(self):
+        """
+        Test for the case when models are documented again after some of their SQL changed.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+
+        client = LocalBedrockClient()
+        generator = DocumentationGenerator(
+            folder, database_path=os.path.join(folder, "db.json"), bedrock_client=client
+        )
+        generator.dbt_project.parse()
+
+        generator.generate_documentation_for_models(["int_orders", "int_customers"])
+        report = generator.generate_documentation_for_models(["int_orders", "int_customers"])
+
+        self.assertEqual(report["interpreted"], [])
+        self.assertEqual(client.stats()["requests"], 4)
+
+        with open(os.path.join(folder, "models", "stg_orders.sql"), "w", encoding="utf-8") as f:
+            f.write("select id, amount, status from raw.orders")
+        generator.dbt_project.parse()
+
+        report = generator.generate_documentation_for_models(["int_orders", "int_customers"])
+
+        # The new interpretation of stg_orders is the same, so int_orders does not need to change.
+        self.assertEqual(report["interpreted"], ["stg_orders"])
+        self.assertEqual(
+            generator.generate_documentation_for_models(["int_orders"], force=True)["interpreted"], ["int_orders"]
+        )
+
+    def test_single_model_documented_with_its_deps(self):
+        """
+        Test for the case when one model is documented, then documented again.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+
+        client = LocalBedrockClient()
+        generator = DocumentationGenerator(
+            folder, database_path=os.path.join(folder, "db.json"), bedrock_client=client
+        )
+        generator.dbt_project.parse()
+
+        interpretation = generator.generate_documentation("fct_sales")
+        generator.generate_documentation("fct_sales")
+
+        self.assertEqual(interpretation["name"], "fct_sales")
+        self.assertEqual(client.stats()["requests"], 5)
+
+        generator.generate_documentation("fct_sales", write_documentation_to_yaml=True)
+        report = generator.generate_documentation_for_models(["int_orders"], write_documentation_to_yaml=True)
+
+        self.assertEqual(client.stats()["requests"], 5)
+        self.assertEqual(report["reused"], ["stg_orders", "int_orders"])
+        self.assertTrue(os.path.isfile(os.path.join(folder, "models", "_fct_sales.yml")))
+        self.assertTrue(os.path.isfile(os.path.join(folder, "models", "_int_orders.yml")))
+
+    def test_models_sharing_a_schema_file_written_together(self):
+        """
+        Test for the case when the interpretations of models documented in the same schema file are written.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+        schema_path = os.path.join(folder, "models", "schema.yml")
+
+        with open(schema_path, "w", encoding="utf-8") as f:
+            f.write(
+                "version: 2\n"
+                "models:\n"
+                "  # Staging models\n"
+                "  - name: stg_orders\n"
+                "    description: Old description.\n"
+                "  - name: stg_customers\n"
+                "    description: Old description.\n"
+                "  - name: int_orders\n"
+                "    description: Written by hand.\n"
+            )
+
+        generator = DocumentationGenerator(
+            folder, database_path=os.path.join(folder, "db.json"), bedrock_client=LocalBedrockClient()
+        )
+        generator.dbt_project.parse()
+
+        report = generator.generate_documentation_for_models(
+            ["stg_orders", "stg_customers"], write_documentation_to_yaml=True
+        )
+        self.assertEqual(set(report["failed"]), {"stg_orders", "stg_customers"})
+
+        report = generator.generate_documentation_for_models(
+            ["stg_orders", "stg_customers"], write_documentation_to_yaml=True, overwrite_existing=True, force=True
+        )
+
+        with open(schema_path, encoding="utf-8") as f:
+            content = f.read()
+
+        self.assertEqual(report["failed"], {})
+        self.assertIn("# Staging models", content)
+        self.assertIn("Stub interpretation of stg_orders.", content)
+        self.assertIn("Stub interpretation of stg_customers.", content)
+        self.assertIn("Written by hand.", content)
+        self.assertNotIn("Old description.", content)
+        self.assertFalse(os.path.exists(f"{schema_path}.tmp"))
+
+    def test_failure_only_blocks_downstream_models(self):
+        """
+        Test for the case when the interpretation of an upstream model fails.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+
+        def completion(prompt):
+            if "called stg_orders" in "".join(m["content"] for m in prompt):
+                return "not json"
+
+            return template_completion(prompt)
+
+        generator = DocumentationGenerator(
+            folder,
+            database_path=os.path.join(folder, "db.json"),
+            bedrock_client=LocalBedrockClient(completion=completion),
+        )
+        generator.dbt_project.parse()
+
+        report = generator.generate_documentation_for_models(["fct_sales"])
+
+        self.assertEqual(list(report["failed"]), ["stg_orders"])
+        self.assertEqual(set(report["blocked"]), {"int_orders", "fct_sales"})
+        self.assertEqual(set(report["interpreted"]), {"stg_customers", "int_customers"})
+
+    def test_project_run_resumed_from_checkpoint(self):
+        """
+        Test for the case when a project-wide run fails halfway and is started again.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_sql_project(folder, SQL_MODELS)
+        checkpoint_path = os.path.join(folder, "checkpoint.json")
+        failing = {"stg_orders"}
+
+        def completion(prompt):
+            if any(f"called {name}" in m["content"] for m in prompt for name in failing):
+                raise Exception("Throttled")
+
+            return template_completion(prompt)
+
+        client = LocalBedrockClient(completion=completion)
+        generator = DocumentationGenerator(
+            folder, database_path=os.path.join(folder, "db.json"), bedrock_client=client
+        )
+        generator.dbt_project.parse()
+        progress = []
+
+        report = generator.generate_project_documentation(
+            checkpoint_path, reinterpret_existing=True, on_progress=progress.append
+        )
+
+        with open(checkpoint_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["completed"], ["int_customers", "stg_customers"])
+
+        self.assertEqual(set(report["blocked"]), {"int_orders", "fct_sales"})
+        self.assertEqual(progress[-1]["status"], "blocked")
+        self.assertEqual(progress[-1]["finished"], 5)
+        self.assertEqual(progress[-1]["total"], 5)
+        self.assertEqual(progress[-1]["blocked"], 2)
+
+        failing.clear()
+        report = generator.generate_project_documentation(
+            checkpoint_path, reinterpret_existing=True, on_progress=progress.append
+        )
+
+        self.assertEqual(set(report["interpreted"]), {"stg_orders", "int_orders", "fct_sales"})
+        self.assertEqual(set(report["reused"]), {"stg_customers", "int_customers"})
+        self.assertFalse(os.path.exists(checkpoint_path))
+        self.assertEqual(progress[-1]["eta_seconds"], 0)
@@ -0,0 +1,95 @@
+import io
+import json
+import math
+import unittest
+from unittest import mock
+
+from dbt_llm_tools import (
+    BedrockEmbeddingBackend,
+    EmbeddingBackend,
+    HashingEmbeddingBackend,
+    SentenceTransformerEmbeddingBackend,
+)
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class EmbeddingBackendTestCase(unittest.TestCase):
+    """
+    Test cases for the embedding backends.
+    """
+
+    def test_hashing_embeddings_are_deterministic_and_normalized(self):
+        """
+        Test for the case when the same text is embedded twice by the hashing backend.
+        """
+        backend = HashingEmbeddingBackend(dimensions=256)
+
+        first, second = backend.embed_many(["dim_customers", "dim_customers"])
+
+        self.assertEqual(len(first), 256)
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(math.sqrt(sum(x * x for x in first)), 1.0)
+
+    def test_hashing_embeddings_reflect_shared_vocabulary(self):
+        """
+        Test for the case when related and unrelated texts are embedded by the hashing backend.
+        """
+        backend = HashingEmbeddingBackend()
+
+        query, related, unrelated = backend.embed_many(
+            [
+                "how many orders did each customer place",
+                "The table fct_orders contains one row per customer order",
+                "The table dim_campaigns lists marketing spend",
+            ]
+        )
+
+        self.assertGreater(cosine(query, related), cosine(query, unrelated))
+
+    def test_hashing_embedding_of_empty_text(self):
+        """
+        Test for the case when a text without any terms is embedded by the hashing backend.
+        """
+        self.assertEqual(HashingEmbeddingBackend(dimensions=4).embed("!!"), [0.0] * 4)
+
+    def test_bedrock_backend_embeds_many_texts(self):
+        """
+        Test for the case when the Bedrock backend embeds several texts.
+        """
+        client = mock.Mock()
+        client.invoke_model.side_effect = lambda **kwargs: {
+            "body": io.BytesIO(
+                json.dumps({"embedding": [len(json.loads(kwargs["body"])["inputText"])]}).encode()
+            )
+        }
+
+        backend = BedrockEmbeddingBackend(max_workers=4, client=client)
+
+        self.assertEqual(backend.embed_many(["a", "bb", "ccc"]), [[1], [2], [3]])
+        self.assertEqual(client.invoke_model.call_count, 3)
+
+    def test_incomplete_backend_rejected(self):
+        """
+        Test for the case when a backend that does not implement embed_many is created.
+        """
+
+        class IncompleteEmbeddingBackend(EmbeddingBackend):  # pylint: disable=abstract-method
+            """
+            Embedding backend that forgot to implement embed_many.
+            """
+
+            model_id = "incomplete"
+
+        with self.assertRaises(TypeError):
+            IncompleteEmbeddingBackend()  # pylint: disable=abstract-class-instantiated
+
+    def test_sentence_transformer_backend_without_package(self):
+        """
+        Test for the case when sentence-transformers is not installed.
+        """
+        with mock.patch.dict("sys.modules", {"sentence_transformers": None}):
+            with self.assertRaises(Exception):
+                SentenceTransformerEmbeddingBackend()
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dbt_llm_tools import DbtModel, VectorStore
+from dbt_llm_tools.evaluation import evaluate_retrieval, percentile, read_examples
+from tests.test_data.model_examples import (
+    MODEL_WITH_NAME_AND_DESCRIPTION,
+    MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS,
+    MODEL_WITH_ONLY_NAME,
+)
+
+
+class EvaluationTestCase(unittest.TestCase):
+    """
+    Test cases for the retrieval evaluation harness.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+        self.store = VectorStore(vector_db_path=self.folder, test_mode=True, cache_size=0)
+        self.store.upsert_models(
+            [
+                DbtModel(MODEL_WITH_ONLY_NAME),
+                DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+                DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+            ]
+        )
+
+    def test_recall_and_mrr_reported(self):
+        """
+        Test for the case when labelled questions are evaluated offline.
+        """
+        examples = [
+            {"question": "model_with_only_name", "relevant": ["model_with_only_name"]},
+            {
+                "question": "col_1_description col_2_description",
+                "relevant": ["model_with_name_description_and_columns"],
+            },
+            {"question": "model_with_only_name", "relevant": ["missing_model"]},
+        ]
+
+        report = evaluate_retrieval(self.store, examples, k=2, mode="lexical")
+
+        self.assertEqual(report["examples"], 3)
+        self.assertAlmostEqual(report["recall_at_k"], 2 / 3)
+        self.assertAlmostEqual(report["mrr"], 2 / 3)
+        self.assertEqual(report["missed"], ["model_with_only_name"])
+        self.assertLessEqual(report["p50_ms"], report["p99_ms"])
+
+    def test_deterministic_offline_embeddings(self):
+        """
+        Test for the case when the same questions are evaluated twice with the hashing embedder.
+        """
+        examples = [{"question": "model_description", "relevant": ["model_with_name_and_description"]}]
+
+        first = evaluate_retrieval(self.store, examples, k=1)
+        second = evaluate_retrieval(self.store, examples, k=1)
+
+        self.assertEqual(first["recall_at_k"], second["recall_at_k"])
+        self.assertEqual(first["mrr"], second["mrr"])
+
+    def test_examples_read_from_file(self):
+        """
+        Test for the case when labelled questions are read from a JSONL file, with an invalid line.
+        """
+        path = os.path.join(self.folder, "examples.jsonl")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"question": "a", "relevant": ["b"]}) + "\n\n")
+
+        self.assertEqual(read_examples(path), [{"question": "a", "relevant": ["b"]}])
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"question": "a"}) + "\n")
+
+        with self.assertRaises(Exception):
+            read_examples(path)
+
+    def test_percentile(self):
+        """
+        Test for the case when percentiles are taken with the nearest-rank method.
+        """
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_no_examples(self):
+        """
+        Test for the case when no labelled questions are given.
+        """
+        with self.assertRaises(Exception):
+            evaluate_retrieval(self.store, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from dbt_llm_tools.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+class LexicalIndexTestCase(unittest.TestCase):
+    """
+    Test cases for the LexicalIndex class.
+    """
+
+    def test_identifiers_are_tokenized_whole_and_split(self):
+        """
+        Test for the case when a text contains snake case identifiers.
+        """
+        self.assertEqual(
+            tokenize("The table dim_customers"),
+            ["the", "table", "dim_customers", "dim", "customers"],
+        )
+
+    def test_exact_identifier_ranks_first(self):
+        """
+        Test for the case when the query contains the exact name of a model.
+        """
+        index = LexicalIndex()
+        index.upsert(
+            ["dim_customers", "fct_orders", "dim_products"],
+            [
+                "The table dim_customers contains one row per customer.",
+                "The table fct_orders contains one row per order. Columns: order_id, customer_id",
+                "The table dim_products contains one row per product.",
+            ],
+        )
+
+        results = index.search("which table has order_id?", n_results=3)
+
+        self.assertEqual(results[0][0], "fct_orders")
+
+    def test_search_restricted_to_candidates(self):
+        """
+        Test for the case when the search is restricted to a set of candidate documents.
+        """
+        index = LexicalIndex()
+        index.upsert(["a", "b"], ["customers table", "customers and orders table"])
+
+        results = index.search("customers", candidate_ids=["b"])
+
+        self.assertEqual([doc_id for doc_id, _ in results], ["b"])
+
+    def test_upsert_replaces_existing_document(self):
+        """
+        Test for the case when a document is upserted twice.
+        """
+        index = LexicalIndex()
+        index.upsert(["a"], ["customers"])
+        index.upsert(["a"], ["orders"])
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.search("customers"), [])
+        self.assertEqual(index.search("orders")[0][0], "a")
+
+    def test_reciprocal_rank_fusion(self):
+        """
+        Test for the case when two rankings are fused.
+        """
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]])
+
+        self.assertEqual([doc_id for doc_id, _ in fused], ["b", "c", "a"])
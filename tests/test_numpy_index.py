@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dbt_llm_tools.numpy_index import NumpyClient, NumpyCollection, matches_where
+
+
+class NumpyCollectionTestCase(unittest.TestCase):
+    """
+    Test cases for the NumpyCollection class.
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_query_returns_exact_nearest_records(self):
+        """
+        Test for the case when several queries are run against the collection at once.
+        """
+        collection = NumpyCollection(self.path, "test", {"hnsw:space": "cosine"})
+        collection.upsert(
+            ids=["x", "y", "z"],
+            embeddings=[[1, 0, 0], [0, 1, 0], [0, 0, 2]],
+            documents=["doc x", "doc y", "doc z"],
+            metadatas=[{"i": 0}, {"i": 1}, {"i": 2}],
+        )
+
+        results = collection.query(query_embeddings=[[0, 0, 1], [1, 0.1, 0]], n_results=2)
+
+        self.assertEqual(results["ids"][0][0], "z")
+        self.assertAlmostEqual(results["distances"][0][0], 0.0, places=5)
+        self.assertEqual(results["ids"][1], ["x", "y"])
+        self.assertEqual(results["documents"][1][0], "doc x")
+        self.assertEqual(results["metadatas"][0][0], {"i": 2})
+
+    def test_l2_and_inner_product_distances(self):
+        """
+        Test for the case when the collection uses the l2 or the inner product distance.
+        """
+        for space, expected in (("l2", 2.0), ("ip", 1.0)):
+            collection = NumpyCollection(f"{self.path}/{space}", space, {"hnsw:space": space})
+            collection.upsert(ids=["x"], embeddings=[[1, 0]])
+
+            results = collection.query(query_embeddings=[[0, 1]], n_results=1)
+
+            self.assertAlmostEqual(results["distances"][0][0], expected, places=5)
+
+    def test_upsert_replaces_existing_records_and_persists(self):
+        """
+        Test for the case when a record is upserted twice and the collection is reloaded.
+        """
+        collection = NumpyCollection(self.path, "test")
+        collection.upsert(ids=["x", "y"], embeddings=[[1, 0], [0, 1]], documents=["a", "b"])
+        collection.upsert(ids=["x"], embeddings=[[0, 1]], documents=["c"])
+
+        reloaded = NumpyCollection(self.path, "test")
+
+        self.assertEqual(reloaded.count(), 2)
+        self.assertEqual(reloaded.get(ids=["x"])["documents"], ["c"])
+        self.assertEqual(reloaded.get(ids=["x"], include=["embeddings"])["embeddings"], [[0.0, 1.0]])
+
+    def test_query_on_empty_collection(self):
+        """
+        Test for the case when an empty collection is queried.
+        """
+        collection = NumpyCollection(self.path, "test")
+
+        self.assertEqual(collection.query(query_embeddings=[[1, 0]], n_results=3)["ids"], [[]])
+
+    def test_client_deletes_collection(self):
+        """
+        Test for the case when a collection is deleted through the client.
+        """
+        client = NumpyClient(self.path)
+        client.get_or_create_collection("test").upsert(ids=["x"], embeddings=[[1, 0]])
+        client.delete_collection("test")
+
+        self.assertEqual(client.get_or_create_collection("test").count(), 0)
+
+    def test_where_filter_restricts_search_space(self):
+        """
+        Test for the case when the collection is queried with a metadata filter.
+        """
+        collection = NumpyCollection(self.path, "test")
+        collection.upsert(
+            ids=["x", "y", "z"],
+            embeddings=[[1, 0], [0.9, 0.1], [0, 1]],
+            metadatas=[{"tag:finance": True}, {}, {"tag:finance": True}],
+        )
+
+        results = collection.query(query_embeddings=[[1, 0]], n_results=5, where={"tag:finance": True})
+
+        self.assertEqual(results["ids"], [["x", "z"]])
+        self.assertEqual(collection.get(where={"tag:finance": True})["ids"], ["x", "z"])
+
+    def test_compressed_index_rescored_at_full_precision(self):
+        """
+        Test for the case when the collection scans an int8 quantized and PCA reduced index.
+        """
+        embeddings = np.random.default_rng(0).normal(size=(200, 32))
+        ids = [f"id_{i}" for i in range(200)]
+
+        exact = NumpyCollection(f"{self.path}/exact", "exact")
+        exact.upsert(ids=ids, embeddings=embeddings.tolist())
+
+        metadata = {"numpy:quantization": "int8", "numpy:pca_dimensions": 8}
+        compressed = NumpyCollection(f"{self.path}/compressed", "compressed", metadata)
+        compressed.upsert(ids=ids[:50], embeddings=embeddings[:50].tolist())
+        compressed.upsert(ids=ids[50:], embeddings=embeddings[50:].tolist())
+
+        queries = embeddings[:5].tolist()
+        expected = exact.query(query_embeddings=queries, n_results=3)
+        results = NumpyCollection(f"{self.path}/compressed", "compressed").query(query_embeddings=queries, n_results=3)
+
+        self.assertTrue(compressed.is_compressed())
+        self.assertEqual(np.load(f"{self.path}/compressed/codes.npy").shape, (200, 8))
+        self.assertEqual(np.load(f"{self.path}/compressed/codes.npy").dtype, np.int8)
+        self.assertEqual([ids[0] for ids in results["ids"]], ids[:5])
+        self.assertAlmostEqual(results["distances"][0][0], 0.0, places=5)
+        self.assertAlmostEqual(results["distances"][4][0], expected["distances"][4][0], places=5)
+
+    def test_invalid_compression_settings(self):
+        """
+        Test for the case when the collection is created with unknown or incomplete compression settings.
+        """
+        with self.assertRaises(Exception):
+            NumpyCollection(self.path, "test", {"numpy:quantization": "int4"})
+
+        with self.assertRaises(Exception):
+            NumpyCollection(self.path, "test", {"numpy:pca_dimensions": 0})
+
+        with self.assertRaises(Exception):
+            NumpyCollection(self.path, "test", {"numpy:quantization": "int8"})
+
+    def test_where_operators(self):
+        """
+        Test for the case when metadata is matched against filters with operators.
+        """
+        metadata = {"materialization": "table", "rows": 10}
+
+        self.assertTrue(matches_where(metadata, {"materialization": {"$in": ["table", "view"]}}))
+        self.assertTrue(matches_where(metadata, {"$and": [{"rows": {"$gte": 10}}, {"materialization": "table"}]}))
+        self.assertTrue(matches_where(metadata, {"$or": [{"rows": {"$lt": 5}}, {"materialization": "table"}]}))
+        self.assertFalse(matches_where(metadata, {"tag:finance": True}))
+        self.assertFalse(matches_where(metadata, {"materialization": {"$ne": "table"}}))
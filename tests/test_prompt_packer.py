@@ -0,0 +1,149 @@
+import unittest
+
+from dbt_llm_tools import DbtModel
+from dbt_llm_tools.prompt_packer import (
+    dump_compact,
+    estimate_tokens,
+    minimize_ref_interpretations,
+    pack_context,
+    referenced_columns,
+    split_document,
+)
+
+WIDE_MODEL = DbtModel(
+    {
+        "name": "fct_orders",
+        "description": "One row per order placed by a customer.",
+        "columns": [{"name": f"metric_{i}", "description": "A daily metric"} for i in range(50)]
+        + [{"name": "customer_id", "description": "The customer that placed the order"}],
+    }
+)
+
+
+def search_result(model_id: str, document: str, distance: float) -> dict:
+    return {"id": model_id, "document": document, "metadata": {}, "distance": distance}
+
+
+class PromptPackerTestCase(unittest.TestCase):
+    """
+    Test cases for the prompt packer.
+    """
+
+    def test_document_split_into_description_and_columns(self):
+        """
+        Test for the case when a model document is split into its parts.
+        """
+        description, columns = split_document(WIDE_MODEL.as_prompt_text())
+
+        self.assertIn("One row per order", description)
+        self.assertEqual(len(columns), 51)
+        self.assertEqual(columns[-1], "customer_id: The customer that placed the order")
+        self.assertEqual(split_document("Free text"), ("Free text", []))
+
+    def test_everything_kept_within_budget(self):
+        """
+        Test for the case when the documents fit into the budget.
+        """
+        document = WIDE_MODEL.as_prompt_text()
+        models, report = pack_context([search_result("fct_orders", document, 0.1)], "orders", 10000)
+
+        self.assertEqual([model["document"] for model in models], [document])
+        self.assertEqual(report["dropped_columns"], {})
+        self.assertGreaterEqual(report["estimated_tokens"], estimate_tokens(document))
+
+    def test_matching_columns_kept_and_rest_dropped(self):
+        """
+        Test for the case when a wide model does not fit and the columns matching the query are kept.
+        """
+        models, report = pack_context(
+            [
+                search_result("dim_customers", "The table dim_customers lists customers.", 0.5),
+                search_result("fct_orders", WIDE_MODEL.as_prompt_text(), 0.1),
+            ],
+            "which customer placed the most orders?",
+            80,
+        )
+
+        self.assertEqual([model["id"] for model in models], ["fct_orders", "dim_customers"])
+        self.assertIn("customer_id", models[0]["document"])
+        self.assertIn("metric_49", report["dropped_columns"]["fct_orders"])
+        self.assertNotIn("customer_id", report["dropped_columns"]["fct_orders"])
+        self.assertLessEqual(report["estimated_tokens"], 80)
+
+    def test_models_truncated_and_dropped_when_budget_exhausted(self):
+        """
+        Test for the case when the descriptions alone exceed the budget.
+        """
+        long_document = "The table long_model is described as follows: " + "word " * 400
+
+        models, report = pack_context(
+            [
+                search_result("long_model", long_document, 0.1),
+                search_result("other_model", "The table other_model does not have a description.", 0.2),
+            ],
+            "anything",
+            100,
+        )
+
+        self.assertEqual(len(models), 1)
+        self.assertTrue(models[0]["document"].endswith("..."))
+        self.assertEqual(report["truncated_models"], ["long_model"])
+        self.assertEqual(report["dropped_models"], ["other_model"])
+        self.assertLessEqual(report["estimated_tokens"], 100)
+
+    def test_referenced_columns_found_in_sql(self):
+        """
+        Test for the case when the columns used by a query are detected.
+        """
+        columns = ["customer_id", "metric_1", "Order_Date", "id"]
+
+        self.assertEqual(
+            referenced_columns("select customer_id, order_date, count(*) from {{ ref('orders') }}", columns),
+            ["customer_id", "Order_Date"],
+        )
+        self.assertEqual(referenced_columns("select o.* from {{ ref('orders') }} as o", columns), columns)
+
+    def test_ref_interpretations_minimized(self):
+        """
+        Test for the case when the interpretations of upstream models are minimized for a query.
+        """
+        interpretation = {**WIDE_MODEL.as_dict(), "tests": ["unique"]}
+        minimized, report = minimize_ref_interpretations(
+            "select customer_id, metric_3 from {{ ref('fct_orders') }}",
+            {"fct_orders": interpretation, "missing": None},
+        )
+
+        self.assertEqual(
+            minimized["fct_orders"],
+            {
+                "name": "fct_orders",
+                "description": "One row per order placed by a customer.",
+                "columns": [
+                    {"name": "metric_3", "description": "A daily metric"},
+                    {"name": "customer_id", "description": "The customer that placed the order"},
+                ],
+            },
+        )
+        self.assertIsNone(minimized["missing"])
+        self.assertEqual(len(report["dropped_columns"]["fct_orders"]), 49)
+        self.assertNotIn('": ', dump_compact(minimized["fct_orders"]))
+
+    def test_ref_interpretations_fitted_into_budget(self):
+        """
+        Test for the case when the minimized interpretations do not fit into the budget.
+        """
+        sql = "select * from {{ ref('fct_orders') }} join {{ ref('long_model') }} using (customer_id)"
+        interpretations = {
+            "fct_orders": WIDE_MODEL.as_dict(),
+            "long_model": {"name": "long_model", "description": "word " * 400},
+        }
+
+        minimized, report = minimize_ref_interpretations(sql, interpretations, 200)
+
+        self.assertEqual(report["truncated_models"], ["long_model"])
+        self.assertTrue(minimized["long_model"]["description"].endswith("..."))
+        self.assertIn("metric_49", report["dropped_columns"]["fct_orders"])
+        self.assertLessEqual(report["estimated_tokens"], 200)
+        self.assertLessEqual(
+            estimate_tokens("".join(dump_compact(value) for value in minimized.values())), 200
+        )
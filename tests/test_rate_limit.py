@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+from dbt_llm_tools import (
+    BedrockCallLedger,
+    BedrockClientFactory,
+    BedrockRateLimiter,
+    LocalBedrockClient,
+    RateLimitedBedrockClient,
+    TokenBucket,
+)
+
+
+class RateLimitTestCase(unittest.TestCase):
+    """
+    Test cases for the Bedrock rate limiter and call ledger.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def test_bucket_waits_when_empty(self):
+        """
+        Test for the case when more tokens are taken than the bucket holds.
+        """
+        bucket = TokenBucket(6000)
+
+        self.assertEqual(bucket.acquire(6000), 0.0)
+        self.assertGreater(bucket.acquire(10), 0.05)
+
+        bucket.debit(-6000)
+        self.assertEqual(bucket.acquire(6000), 0.0)
+
+    def test_limits_applied_per_model_id(self):
+        """
+        Test for the case when requests are sent to a limited and an unlimited model id.
+        """
+        limiter = BedrockRateLimiter({"limited": {"requests_per_minute": 1200, "tokens_per_minute": 100000}})
+
+        waited = [limiter.acquire("limited", 10) for _ in range(1202)]
+
+        self.assertEqual(sum(waited[:1200]), 0.0)
+        self.assertGreater(waited[-1], 0.0)
+        self.assertEqual(sum(limiter.acquire("unlimited", 10**9) for _ in range(2000)), 0.0)
+
+        with self.assertRaises(Exception):
+            BedrockRateLimiter(default_limit={"requests_per_second": 1})
+
+    def test_calls_recorded_in_ledger(self):
+        """
+        Test for the case when completions, streamed completions and embeddings go through the wrapper.
+        """
+        ledger = BedrockCallLedger(os.path.join(self.folder, "ledger.db"))
+        self.addCleanup(ledger.close)
+        client = RateLimitedBedrockClient(
+            LocalBedrockClient(), BedrockRateLimiter(default_limit={"tokens_per_minute": 100000}), ledger
+        )
+        prompt = json.dumps({"input": [{"role": "user", "content": "Which model lists the orders?"}]})
+
+        response = client.invoke_model(modelId="anthropic.claude-v2", body=prompt)
+        self.assertIn("stub answer", json.loads(response["body"].read())["completion"])
+
+        chunks = list(client.invoke_model_with_response_stream(modelId="anthropic.claude-v2", body=prompt)["body"])
+        client.invoke_model(modelId="amazon.titan-embed-text-v1", body=json.dumps({"inputText": "orders"}))
+
+        calls = ledger.get_calls()
+        summary = {(row["model_id"], row["operation"]): row for row in ledger.summarize()}
+
+        self.assertEqual(len(chunks), 11)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(summary[("anthropic.claude-v2", "InvokeModelWithResponseStream")]["calls"], 1)
+        self.assertEqual(calls[1]["output_tokens"], calls[0]["output_tokens"])
+        self.assertGreater(calls[0]["input_tokens"], 0)
+        self.assertEqual(calls[2]["output_tokens"], 0)
+        self.assertIsNone(calls[2]["error"])
+
+    def test_token_counts_and_errors_from_bedrock(self):
+        """
+        Test for the case when Bedrock returns token counts and retries, or fails.
+        """
+        ledger = BedrockCallLedger(os.path.join(self.folder, "ledger.db"))
+        self.addCleanup(ledger.close)
+        stub = mock.Mock()
+        stub.invoke_model.return_value = {
+            "body": io.BytesIO(b'{"completion": "An answer."}'),
+            "ResponseMetadata": {
+                "RetryAttempts": 2,
+                "HTTPHeaders": {"x-amzn-bedrock-input-token-count": "42", "x-amzn-bedrock-output-token-count": "7"},
+            },
+        }
+        client = RateLimitedBedrockClient(stub, ledger=ledger)
+
+        client.invoke_model(modelId="anthropic.claude-v2", body="{}")
+
+        stub.invoke_model.side_effect = ClientError(
+            {"Error": {"Code": "ThrottlingException"}, "ResponseMetadata": {"RetryAttempts": 7}}, "InvokeModel"
+        )
+        with self.assertRaises(ClientError):
+            client.invoke_model(modelId="anthropic.claude-v2", body="{}")
+
+        calls = ledger.get_calls()
+
+        self.assertEqual((calls[0]["input_tokens"], calls[0]["output_tokens"], calls[0]["retries"]), (42, 7, 2))
+        self.assertEqual(calls[1]["retries"], 7)
+        self.assertIn("ThrottlingException", calls[1]["error"])
+        self.assertEqual(ledger.summarize()[0]["errors"], 1)
+
+    def test_shared_client_wrapped_when_limits_configured(self):
+        """
+        Test for the case when rate limits and a ledger are configured on the client factory.
+        """
+        factory = BedrockClientFactory()
+        stub = LocalBedrockClient()
+        factory.set_client(stub)
+
+        self.assertIs(factory.get_client(), stub)
+
+        factory.configure(
+            rate_limits={"anthropic.claude-v2": {"requests_per_minute": 100}},
+            ledger_path=os.path.join(self.folder, "ledger.db"),
+        )
+        self.addCleanup(factory.get_ledger().close)
+        client = factory.get_client()
+
+        self.assertIsInstance(client, RateLimitedBedrockClient)
+        self.assertIs(client.client, stub)
+        self.assertIs(factory.get_client(), client)
+
+        with self.assertRaises(Exception):
+            factory.configure(rate_limits={"anthropic.claude-v2": {"requests_per_minute": 0}})
+
+        self.assertEqual(factory.rate_limits, {"anthropic.claude-v2": {"requests_per_minute": 100}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from dbt_llm_tools import Chatbot, DbtModel
+from dbt_llm_tools.server import DbtLlmServer
+from tests.test_chatbot import VALID_PROJECT_PATH, StubBedrockClient
+from tests.test_data.model_examples import (
+    MODEL_WITH_NAME_AND_DESCRIPTION,
+    MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS,
+)
+
+
+class DbtLlmServerTestCase(unittest.TestCase):
+    """
+    Test cases for the DbtLlmServer class.
+    """
+
+    def setUp(self):
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        self.client = StubBedrockClient(["The ", "answer"])
+        chatbot = Chatbot(
+            VALID_PROJECT_PATH,
+            database_path=os.path.join(vector_db_path, "db.json"),
+            vector_db_path=vector_db_path,
+            bedrock_client=self.client,
+        )
+
+        chatbot.store.upsert_models(
+            [DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION), DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS)]
+        )
+
+        self.server = DbtLlmServer(chatbot, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def request(self, path: str, body: dict = None) -> tuple[int, bytes]:
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(f"http://127.0.0.1:{self.server.server_address[1]}{path}", data=data)
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def test_question_answered(self):
+        """
+        Test for the case when a question is asked with and without streaming.
+        """
+        status, body = self.request("/ask", {"query": "What does the model contain?"})
+        _, streamed = self.request("/ask", {"query": "Which columns are there?", "stream": True})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {"answer": "The answer"})
+        self.assertEqual(streamed, b"The answer")
+
+    def test_search_and_models_listed(self):
+        """
+        Test for the case when the vector store is searched and listed.
+        """
+        _, search = self.request("/search", {"queries": ["col_1"], "n_results": 1, "mode": "lexical"})
+        _, models = self.request("/models?limit=1&include=metadatas")
+
+        self.assertEqual(json.loads(search)["results"][0][0]["id"], "model_with_name_description_and_columns")
+        self.assertEqual(json.loads(models)["count"], 2)
+        self.assertEqual(list(json.loads(models)["models"][0]), ["id", "metadata"])
+
+    def test_health_and_metrics_reported(self):
+        """
+        Test for the case when the health and metrics endpoints are read after a few requests.
+        """
+        self.request("/ask", {"query": ""})
+        self.request("/unknown")
+        _, health = self.request("/health")
+        _, metrics = self.request("/metrics")
+
+        metrics = json.loads(metrics)
+        self.assertEqual(json.loads(health), {"status": "ok", "models": 2, "reindex": "idle"})
+        self.assertEqual(metrics["endpoints"]["/ask"]["errors"], 1)
+        self.assertEqual(metrics["endpoints"]["unknown"]["requests"], 1)
+        self.assertIn("answers", metrics["caches"])
+
+    def test_reindex_started_in_background(self):
+        """
+        Test for the case when the vector store is rebuilt from the dbt project.
+        """
+        status, _ = self.request("/reindex", {})
+
+        for _ in range(100):
+            if json.loads(self.request("/health")[1])["reindex"] != "running":
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(status, 202)
+        self.assertEqual(json.loads(self.request("/health")[1])["reindex"], "done")
+
+    def test_invalid_requests_rejected(self):
+        """
+        Test for the case when requests are sent to unknown endpoints or with invalid bodies, and the
+        connection is kept alive after an unknown endpoint.
+        """
+        self.assertEqual(self.request("/unknown")[0], 404)
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        self.addCleanup(connection.close)
+
+        connection.request("POST", "/unknown", body=json.dumps({"query": "col_1"}))
+        response = connection.getresponse()
+        response.read()
+
+        connection.request("GET", "/health")
+        health = connection.getresponse()
+        health.read()
+
+        self.assertEqual(response.status, 404)
+        self.assertEqual(health.status, 200)
+        self.assertEqual(self.request("/ask", {"query": ""})[0], 400)
+        self.assertEqual(self.request("/search", {"query": "col_1", "mode": "unknown"})[0], 400)
@@ -1,8 +1,19 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
-from dbt_llm_tools import DbtModel, VectorStore
+from chromadb.api.models.Collection import Collection
+
+from dbt_llm_tools import DbtModel, HashingEmbeddingBackend, VectorStore
+from dbt_llm_tools.numpy_index import NumpyCollection
 from tests.test_data.model_examples import (
     INVALID_MODEL,
+    MODEL_DIRECTORY_ENTRY_WITH_TAGS,
     MODEL_WITH_NAME_AND_DESCRIPTION,
     MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS,
     MODEL_WITH_ONLY_NAME,
@@ -70,6 +81,37 @@ class VectorStoreTestCase(unittest.TestCase):
 
         self.assertEqual(len(vector_store.get_models()), 3)
 
+    def test_models_listed_with_paging_and_projection(self):
+        """
+        Test for the case when the stored models are counted and listed page by page.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        for engine in ("chroma", "numpy"):
+            vector_db_path = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, vector_db_path)
+
+            vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine=engine)
+            vector_store.upsert_models(list_of_valid_models)
+
+            all_ids = vector_store.list_model_ids()
+            first_page = vector_store.get_models(limit=2, include=["metadatas"])
+
+            self.assertEqual(vector_store.count_models(), 3)
+            self.assertEqual(len(all_ids), 3)
+            self.assertEqual([model["id"] for model in first_page], all_ids[:2])
+            self.assertNotIn("document", first_page[0])
+            self.assertIn("metadata", first_page[0])
+            self.assertEqual(vector_store.list_model_ids(limit=2, offset=2), all_ids[2:])
+            self.assertEqual(vector_store.get_models(limit=0), [])
+
+            with self.assertRaises(Exception):
+                vector_store.get_models(include=["embeddings"])
+
     def test_vector_store_queried_without_query_string(self):
         """
         Test for the case when the vector store is queried without a query string.
@@ -107,3 +149,394 @@ class VectorStoreTestCase(unittest.TestCase):
 
         vector_store.reset_collection()
         self.assertEqual(len(vector_store.get_models()), 0)
+
+    def test_vector_store_queried_in_lexical_mode(self):
+        """
+        Test for the case when the vector store is queried with the local lexical index only.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_store = VectorStore(
+            "api_key", test_mode=True, vector_db_path=".local_storage/test_chroma.db"
+        )
+        vector_store.upsert_models(list_of_valid_models)
+
+        results = vector_store.query_collection("col_2", mode="lexical")
+
+        self.assertEqual(results[0]["id"], "model_with_name_description_and_columns")
+        self.assertIn("col_2_description", results[0]["document"])
+
+    def test_lexical_index_reloaded_after_upsert_by_another_store(self):
+        """
+        Test for the case when another store on the same path upserts models after the first query.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        reader = VectorStore(test_mode=True, vector_db_path=vector_db_path)
+        writer = VectorStore(test_mode=True, vector_db_path=vector_db_path)
+
+        self.assertEqual(reader.query_collection("col_2", mode="lexical"), [])
+
+        writer.upsert_models([DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS)])
+        results = reader.query_collection("col_2", mode="lexical")
+
+        self.assertEqual([result["id"] for result in results], ["model_with_name_description_and_columns"])
+
+    def test_vector_store_queried_in_hybrid_mode(self):
+        """
+        Test for the case when the vector store is queried with both the lexical and vector indexes.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_store = VectorStore(
+            "api_key", test_mode=True, vector_db_path=".local_storage/test_chroma.db"
+        )
+        vector_store.upsert_models(list_of_valid_models)
+
+        results = vector_store.query_collection("model_with_only_name", n_results=2, mode="hybrid")
+
+        self.assertEqual(len(results), 2)
+        self.assertIn("model_with_only_name", [result["id"] for result in results])
+
+    def test_vector_store_queried_with_invalid_mode(self):
+        """
+        Test for the case when the vector store is queried with an unknown search mode.
+        """
+        vector_store = VectorStore(
+            "api_key", test_mode=True, vector_db_path=".local_storage/test_chroma.db"
+        )
+
+        with self.assertRaises(Exception):
+            vector_store.query_collection("query", mode="fuzzy")
+
+    def test_repeated_query_served_from_cache(self):
+        """
+        Test for the case when the same query is sent twice and the collection is then upserted.
+        """
+        vector_store = VectorStore(
+            "api_key", test_mode=True, vector_db_path=".local_storage/test_chroma.db"
+        )
+        vector_store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+
+        vector_store.query_collection("model description")
+        vector_store.query_collection("model  description ")
+        self.assertEqual(vector_store.get_cache_stats()["results"]["hits"], 1)
+
+        vector_store.upsert_models([DbtModel(MODEL_WITH_ONLY_NAME)])
+        vector_store.query_collection("model description")
+
+        stats = vector_store.get_cache_stats()
+        self.assertEqual(stats["results"]["misses"], 2)
+        self.assertEqual(stats["embeddings"]["hits"], 1)
+
+    def test_vector_store_queried_with_many_queries(self):
+        """
+        Test for the case when several queries are sent in a single batch.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_store = VectorStore(
+            "api_key", test_mode=True, vector_db_path=".local_storage/test_chroma.db"
+        )
+        vector_store.upsert_models(list_of_valid_models)
+
+        results = vector_store.query_collection_many(
+            ["model_with_only_name", "col_1", "model_with_only_name"], n_results=2, mode="lexical"
+        )
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0]["id"], "model_with_only_name")
+        self.assertEqual(results[1][0]["id"], "model_with_name_description_and_columns")
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(len(vector_store.query_collection_many(["col_1", "col_2"], n_results=2)[1]), 2)
+
+        with self.assertRaises(Exception):
+            vector_store.query_collection_many(["valid query", ""])
+
+    def test_vector_store_queried_asynchronously(self):
+        """
+        Test for the case when the vector store is queried from coroutines.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, cache_size=0)
+        vector_store.upsert_models(list_of_valid_models)
+
+        async def query_all():
+            return await asyncio.gather(
+                vector_store.aquery_collection("model with name description and columns col_1"),
+                vector_store.aquery_collection_many(["col_1", "model_with_only_name"], mode="hybrid"),
+            )
+
+        single, many = asyncio.run(query_all())
+
+        self.assertEqual(single, vector_store.query_collection("model with name description and columns col_1"))
+        self.assertEqual(many, vector_store.query_collection_many(["col_1", "model_with_only_name"], mode="hybrid"))
+
+        with self.assertRaises(Exception):
+            asyncio.run(vector_store.aquery_collection(""))
+
+    def test_chroma_queried_one_at_a_time(self):
+        """
+        Test for the case when many coroutines query a Chroma collection at once.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, cache_size=0)
+        vector_store.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+
+        query = Collection.query
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def tracked_query(collection, *args, **kwargs):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+
+            try:
+                time.sleep(0.002)
+                return query(collection, *args, **kwargs)
+            finally:
+                with lock:
+                    state["running"] -= 1
+
+        async def query_all():
+            return await asyncio.gather(*(vector_store.aquery_collection(f"question {i}") for i in range(50)))
+
+        with mock.patch.object(Collection, "query", tracked_query):
+            results = asyncio.run(query_all())
+
+        self.assertEqual(len(results), 50)
+        self.assertEqual(state["peak"], 1)
+
+    def test_vector_store_with_numpy_engine(self):
+        """
+        Test for the case when the vector store uses the NumPy engine.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        vector_store.upsert_models(list_of_valid_models)
+
+        results = vector_store.query_collection("model with name description and columns col_1")
+
+        self.assertEqual(len(vector_store.get_models()), 3)
+        self.assertEqual(results[0]["id"], "model_with_name_description_and_columns")
+
+        vector_store.reset_collection()
+        self.assertEqual(len(vector_store.get_models()), 0)
+
+    def test_numpy_collection_written_once_per_upsert(self):
+        """
+        Test for the case when more models than fit in one embedding batch are upserted into the NumPy engine.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        upsert = NumpyCollection.upsert
+        calls = []
+
+        def counted_upsert(collection, *args, **kwargs):
+            calls.append(kwargs["ids"])
+            return upsert(collection, *args, **kwargs)
+
+        with mock.patch("dbt_llm_tools.vector_store.UPSERT_BATCH_SIZE", 1), \
+                mock.patch.object(NumpyCollection, "upsert", counted_upsert):
+            vector_store.upsert_models(list_of_valid_models)
+
+        self.assertEqual(calls, [[model.name for model in list_of_valid_models]])
+        self.assertEqual(vector_store.count_models(), 3)
+        self.assertEqual(len(vector_store.query_collection("col_1", mode="lexical")), 1)
+
+    def test_numpy_collection_reloaded_after_upsert_by_another_store(self):
+        """
+        Test for the case when another store on the same path upserts models into the NumPy engine.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        reader = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        writer = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+
+        reader.upsert_models([DbtModel(MODEL_WITH_ONLY_NAME)])
+        writer.upsert_models([DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS)])
+
+        results = reader.query_collection("model with name description and columns col_1")
+
+        self.assertEqual(len(reader.get_models()), 2)
+        self.assertEqual(results[0]["id"], "model_with_name_description_and_columns")
+
+        reader.upsert_models([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+        self.assertEqual(len(writer.get_models()), 3)
+
+    def test_vector_store_with_compressed_numpy_index(self):
+        """
+        Test for the case when the NumPy engine stores quantized and PCA reduced embeddings.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel(MODEL_WITH_NAME_DESCRIPTION_AND_COLUMNS),
+        ]
+
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(
+            test_mode=True, vector_db_path=vector_db_path, engine="numpy", quantization="int8", pca_dimensions=2
+        )
+        vector_store.upsert_models(list_of_valid_models)
+
+        results = vector_store.query_collection("model with name description and columns col_1")
+
+        self.assertTrue(vector_store.get_collection().is_compressed())
+        self.assertEqual(results[0]["id"], "model_with_name_description_and_columns")
+
+        with self.assertRaises(Exception):
+            VectorStore(test_mode=True, vector_db_path=vector_db_path, quantization="int8")
+
+    def test_vector_store_with_invalid_engine(self):
+        """
+        Test for the case when the vector store is initialized with an unknown engine.
+        """
+        with self.assertRaises(Exception):
+            VectorStore(test_mode=True, vector_db_path=".local_storage/test_chroma.db", engine="faiss")
+
+    def test_vector_store_queried_with_where_filter(self):
+        """
+        Test for the case when the vector store is queried with a metadata filter.
+        """
+        list_of_valid_models = [
+            DbtModel(MODEL_WITH_ONLY_NAME),
+            DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION),
+            DbtModel.from_directory_entry(MODEL_DIRECTORY_ENTRY_WITH_TAGS),
+        ]
+
+        for engine in ("chroma", "numpy"):
+            vector_db_path = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, vector_db_path)
+
+            vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine=engine)
+            vector_store.upsert_models(list_of_valid_models)
+
+            for mode in ("vector", "lexical", "hybrid"):
+                results = vector_store.query_collection(
+                    "model revenue", n_results=3, mode=mode, where={"tag:finance": True}
+                )
+                self.assertEqual([result["id"] for result in results], ["fct_revenue"])
+
+            results = vector_store.query_collection(
+                "revenue", where={"$and": [{"folder:models/marts": True}, {"materialization": "table"}]}
+            )
+            self.assertEqual(results[0]["metadata"]["path"], "models/marts/finance/fct_revenue.sql")
+
+    def test_vector_store_reindexed_without_downtime(self):
+        """
+        Test for the case when the collection is rebuilt in the background while it is being queried.
+        """
+        release = threading.Event()
+
+        class BlockingEmbeddingBackend(HashingEmbeddingBackend):
+            """
+            Embedding backend that waits for the test before embedding documents.
+            """
+
+            def embed_many(self, texts):
+                release.wait(timeout=5)
+                return super().embed_many(texts)
+
+        for engine in ("chroma", "numpy"):
+            vector_db_path = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, vector_db_path)
+
+            vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine=engine)
+            vector_store.upsert_models([DbtModel(MODEL_WITH_ONLY_NAME)])
+            other_reader = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine=engine)
+
+            writer = VectorStore(
+                vector_db_path=vector_db_path, engine=engine, embedding_backend=BlockingEmbeddingBackend()
+            )
+            release.clear()
+            future = writer.reindex([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)], background=True)
+
+            results = vector_store.query_collection("model", mode="lexical")
+            self.assertEqual([result["id"] for result in results], ["model_with_only_name"])
+
+            release.set()
+            future.result(timeout=10)
+
+            for store in (vector_store, other_reader, writer):
+                results = store.query_collection("model", mode="lexical")
+                self.assertEqual([result["id"] for result in results], ["model_with_name_and_description"])
+
+    def test_collection_reset_after_reindex_by_another_store(self):
+        """
+        Test for the case when the collection is reset by a store that has not seen another store's reindex yet.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        writer = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        writer.reindex([DbtModel(MODEL_WITH_ONLY_NAME), DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)])
+
+        vector_store.reset_collection()
+
+        self.assertEqual(vector_store.count_models(), 0)
+        self.assertEqual(writer.count_models(), 0)
+
+    def test_old_versions_garbage_collected_after_reindex(self):
+        """
+        Test for the case when the collection is rebuilt several times.
+        """
+        vector_db_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vector_db_path)
+
+        vector_store = VectorStore(test_mode=True, vector_db_path=vector_db_path, engine="numpy")
+        vector_store.upsert_models([DbtModel(MODEL_WITH_ONLY_NAME)])
+
+        for _ in range(3):
+            vector_store.reindex([DbtModel(MODEL_WITH_NAME_AND_DESCRIPTION)], keep_versions=1)
+
+        names = [collection.name for collection in vector_store.get_client().list_collections()]
+
+        self.assertEqual(names, ["model_documentation_v2", "model_documentation_v3"])
+        self.assertEqual(vector_store.get_collection().name, "model_documentation_v3")
+        self.assertFalse(os.path.exists(os.path.join(vector_db_path, "model_documentation.lexical.json")))
+        self.assertEqual(len(vector_store.get_models()), 1)
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import yaml
+
+from dbt_llm_tools.yaml_writer import merge_models_into_yaml, write_models_to_yaml
+
+SCHEMA = (
+    "version: 2\n"
+    "\n"
+    "models:\n"
+    "  # Orders\n"
+    "  - name: orders\n"
+    "    description: Old description.\n"
+    "    columns:\n"
+    "      - name: id\n"
+    "\n"
+    "  # Customers\n"
+    "  - name: customers  # kept by hand\n"
+    "    description: The customers.\n"
+    "\n"
+    "sources:\n"
+    "  - name: raw\n"
+)
+
+
+class YamlWriterTestCase(unittest.TestCase):
+    """
+    Test cases for the YAML writer functions.
+    """
+
+    def test_model_replaced_in_place(self):
+        """
+        Test for the case when a model of a schema file is replaced.
+        """
+        merged = merge_models_into_yaml(SCHEMA, [{"name": "orders", "description": "New description."}])
+
+        self.assertEqual(
+            merged,
+            SCHEMA.replace(
+                "  - name: orders\n    description: Old description.\n    columns:\n      - name: id\n",
+                "  - name: orders\n    description: New description.\n",
+            ),
+        )
+
+    def test_new_model_appended(self):
+        """
+        Test for the case when a model is not in the schema file yet.
+        """
+        merged = merge_models_into_yaml(SCHEMA, [{"name": "payments", "description": "The payments."}])
+        content = yaml.safe_load(merged)
+
+        self.assertEqual([model["name"] for model in content["models"]], ["orders", "customers", "payments"])
+        self.assertEqual(content["sources"], [{"name": "raw"}])
+        self.assertIn("# kept by hand", merged)
+
+    def test_crlf_line_endings_kept(self):
+        """
+        Test for the case when the schema file has Windows line endings.
+        """
+        merged = merge_models_into_yaml(SCHEMA.replace("\n", "\r\n"), [{"name": "orders", "description": "New."}])
+
+        self.assertNotIn("\n", merged.replace("\r\n", ""))
+        self.assertIn("description: New.", merged)
+
+    def test_flow_style_schema_dumped_again(self):
+        """
+        Test for the case when the models of the schema file cannot be edited line by line.
+        """
+        merged = merge_models_into_yaml(
+            "version: 2\nmodels: [{name: orders}, {name: customers}]\n",
+            [{"name": "orders", "description": "New description."}],
+        )
+
+        self.assertEqual(
+            yaml.safe_load(merged),
+            {"version": 2, "models": [{"name": "orders", "description": "New description."}, {"name": "customers"}]},
+        )
+
+    def test_schema_file_written_atomically(self):
+        """
+        Test for the case when models are written to a new schema file and then to an existing one.
+        """
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        yaml_path = os.path.join(folder, "_orders.yml")
+
+        write_models_to_yaml(yaml_path, [{"name": "orders"}])
+        write_models_to_yaml(yaml_path, [{"name": "orders", "description": "New."}, {"name": "customers"}])
+
+        with open(yaml_path, encoding="utf-8") as f:
+            content = yaml.safe_load(f)
+
+        self.assertEqual(content["models"], [{"name": "orders", "description": "New."}, {"name": "customers"}])
+        self.assertEqual(os.listdir(folder), ["_orders.yml"])
+
+
+if __name__ == "__main__":
+    unittest.main()